@@ -0,0 +1,135 @@
+import pytest
+import numpy as np
+from tfhe.bootstrap import (
+    BootstrappingKey,
+    make_test_vector,
+    modulus_switch,
+    _rotate_rows,
+)
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey
+from tfhe.encoding import decode_int, encode_int
+from tfhe.keystore import KeyStore
+from tfhe.poly import negacyclic_rotate
+from tfhe.torus import Torus
+
+N_LWE = 32
+BIG_N = 256
+P = 8
+
+
+@pytest.fixture(scope="module")
+def keys():
+    lwe_sk = LWESecretKey(N_LWE)
+    rlwe_sk = RLWESecretKey(BIG_N, k=2)
+    bsk = BootstrappingKey(lwe_sk, rlwe_sk, 2 ** -40, l=3, bg_bit=8)
+    return lwe_sk, rlwe_sk, bsk
+
+
+def _encrypt(sk, m, p=P, sigma=2 ** -25):
+    c = TLWE(sk.n, sigma, p)
+    c.encrypt(sk, Torus.from_int(m, p))
+    return c
+
+
+def test_modulus_switch():
+    big_n = 16
+    data = np.array([0, 2 ** 63, 2 ** 64 - 1, 2 ** 58 - 1, 2 ** 58, 3 << 58], dtype=np.uint64)
+    assert list(modulus_switch(data, big_n)) == [0, 16, 0, 0, 1, 2]
+
+
+def test_test_vector():
+    tv = make_test_vector(lambda m: m + 1, 8, 16)
+    assert list(tv.to_int(8)) == [1, 1, 2, 2, 2, 2, 3, 3, 3, 3, 4, 4, 4, 4, 7, 7]
+    with pytest.raises(ValueError):
+        make_test_vector([0, 1], 8, 16)
+
+
+@pytest.mark.parametrize("m", range(P // 2))
+def test_bootstrap_identity(keys, m):
+    lwe_sk, rlwe_sk, bsk = keys
+    c = _encrypt(lwe_sk, m)
+    res = bsk.bootstrap(c, make_test_vector(lambda x: x, P, BIG_N))
+    assert res.n == 2 * BIG_N
+    assert res.decrypt(rlwe_sk.to_lwe_key()).to_int(P) == m
+
+
+@pytest.mark.parametrize("m", range(P // 2))
+def test_bootstrap_lut(keys, m):
+    lwe_sk, rlwe_sk, bsk = keys
+    lut = [3, 0, 6, 5]
+    c = _encrypt(lwe_sk, m)
+    res = bsk.bootstrap(c, make_test_vector(lut, P, BIG_N, p_out=16), p=16)
+    assert res.decrypt(rlwe_sk.to_lwe_key()).to_int(16) == lut[m]
+
+
+@pytest.mark.parametrize("m", range(P // 2))
+def test_bootstrap_padding(keys, m):
+    # phases in the upper half of the torus give the negated output
+    lwe_sk, rlwe_sk, bsk = keys
+    c = _encrypt(lwe_sk, m + P // 2)
+    res = bsk.bootstrap(c, make_test_vector(lambda x: x + 1, P, BIG_N))
+    assert res.decrypt(rlwe_sk.to_lwe_key()).to_int(P) == -(m + 1) % P
+
+
+def test_bootstrap_refreshes_noise(keys):
+    lwe_sk, rlwe_sk, bsk = keys
+    # the output noise only depends on the bootstrapping key, not on the input one
+    c = _encrypt(lwe_sk, 1, sigma=2 ** -9)
+    res = bsk.bootstrap(c, make_test_vector(lambda x: x, P, BIG_N))
+    phase = int((res.b - Torus(np.dot(rlwe_sk.to_lwe_key().bits(), res.mask))).data)
+    error = (phase - 2 ** 61 + 2 ** 63) % 2 ** 64 - 2 ** 63
+    assert abs(error) < 2 ** 50
+
+
+def test_bootstrapping_key_store(keys, tmp_path):
+    lwe_sk, rlwe_sk, bsk = keys
+    store = KeyStore(str(tmp_path))
+    bsk.save(store, "bsk")
+    loaded = BootstrappingKey.load(store, "bsk")
+    assert (loaded.n, loaded.big_n, loaded.k, loaded.l, loaded.bg_bit) == (
+        bsk.n, bsk.big_n, bsk.k, bsk.l, bsk.bg_bit
+    )
+    c = _encrypt(lwe_sk, 2)
+    res = loaded.bootstrap(c, make_test_vector(lambda x: x, P, BIG_N))
+    assert res.decrypt(rlwe_sk.to_lwe_key()).to_int(P) == 2
+    store.save_secret_key("sk", lwe_sk)
+    with pytest.raises(ValueError):
+        BootstrappingKey.load(store, "sk")
+
+
+@pytest.mark.parametrize("a", [[0, 1, 16, 31], [5, 17, 3, 30]])
+def test_rotate_rows(a):
+    big_n = 16
+    data = np.random.randint(0, 2 ** 64, size=(4, 3, big_n), dtype=np.uint64)
+    rotated = _rotate_rows(data, np.array(a), big_n)
+    for i in range(4):
+        assert np.array_equal(rotated[i], negacyclic_rotate(data[i], a[i]))
+
+
+def test_bootstrap_batch(keys):
+    lwe_sk, rlwe_sk, bsk = keys
+    messages = [0, 1, 2, 3, 5, 7, 2, 1]
+    batch = TLWEBatch(N_LWE, 2 ** -25, P)
+    batch.encrypt(lwe_sk, encode_int(messages, P))
+    tv = make_test_vector(lambda x: 3 - x, P, BIG_N)
+    res = bsk.bootstrap_batch(batch, tv)
+    assert len(res) == len(messages) and res.n == 2 * BIG_N
+    out_sk = rlwe_sk.to_lwe_key()
+    expected = [3 - m if m < 4 else -(3 - m + 4) % P for m in messages]
+    assert list(decode_int(res.decrypt(out_sk), P)) == expected
+    # same result as bootstrapping them one by one
+    for i, c in enumerate(batch.to_tlwes()[:3]):
+        single = bsk.bootstrap(c, tv)
+        assert np.array_equal(single.mask, res.mask[i])
+        assert single.b.data == res.b[i]
+
+
+def test_bootstrap_batch_test_vectors(keys):
+    lwe_sk, rlwe_sk, bsk = keys
+    cs = [_encrypt(lwe_sk, m) for m in [1, 2, 3]]
+    luts = [[1, 2, 3, 0], [0, 0, 0, 3], [2, 2, 2, 1]]
+    tvs = np.stack([make_test_vector(lut, P, BIG_N).data for lut in luts])
+    res = bsk.bootstrap_batch(cs, tvs)
+    assert list(decode_int(res.decrypt(rlwe_sk.to_lwe_key()), P)) == [2, 0, 1]
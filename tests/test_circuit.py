@@ -0,0 +1,136 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+import numpy as np
+from tfhe import gates
+from tfhe.circuit import Circuit, init_worker
+from tfhe.gates import CloudKey
+from tfhe.keystore import KeyStore
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+
+
+@pytest.fixture(scope="module")
+def keys():
+    sk = gates.SecretKey(n=32, big_n=256)
+    return sk, gates.CloudKey(sk)
+
+
+def adder(bits):
+    """
+    Ripple carry adder of two `bits` bits integers, least significant bit first
+    """
+    circuit = Circuit()
+    a = [circuit.input() for _ in range(bits)]
+    b = [circuit.input() for _ in range(bits)]
+    carry = None
+    for x, y in zip(a, b):
+        s = circuit.xor(x, y)
+        if carry is None:
+            circuit.output(s)
+            carry = circuit.and_(x, y)
+        else:
+            circuit.output(circuit.xor(s, carry))
+            carry = circuit.or_(circuit.and_(x, y), circuit.and_(s, carry))
+    circuit.output(carry)
+    return circuit
+
+
+def to_bits(value, bits):
+    return [bool(value >> i & 1) for i in range(bits)]
+
+
+def test_compile_levels():
+    program = adder(3).compile()
+    assert program.n_inputs == 6
+    assert program.n_bootstraps == 2 + 5 * 2
+    # the carry chain: each bit needs the and with the previous carry, then an or
+    assert program.n_levels == 5
+    assert [len(w) for w, _ in program.levels] == [6, 2, 1, 2, 1]
+    assert program.outputs[0].shape == (4, 18)
+
+
+def test_linear_fusion():
+    circuit = Circuit()
+    x, y = circuit.input(), circuit.input()
+    z = circuit.not_(circuit.not_(x)) + y - y + 2 * x - x * 2
+    circuit.output(circuit.nand(z, y))
+    program = circuit.compile()
+    assert program.n_bootstraps == 1
+    weights, _ = program.levels[0]
+    assert list(weights[0]) == [-1, -1]
+
+
+@pytest.mark.parametrize("a, b", [(0, 0), (3, 5), (7, 7), (6, 1)])
+def test_adder(keys, a, b):
+    sk, ck = keys
+    program = adder(3).compile()
+    inputs = sk.encrypt(to_bits(a, 3) + to_bits(b, 3))
+    res = program.run(ck, inputs)
+    assert isinstance(res, TLWEBatch) and len(res) == 4
+    assert list(sk.decrypt(res)) == to_bits(a + b, 4)
+    assert [t["level"] for t in program.timings] == [1, 2, 3, 4, 5]
+    assert [t["bootstraps"] for t in program.timings] == [6, 2, 1, 2, 1]
+    assert all(t["seconds"] >= 0 for t in program.timings)
+
+
+def test_mux_and_constants(keys):
+    sk, ck = keys
+    circuit = Circuit()
+    s, a, b = circuit.input(), circuit.input(), circuit.input()
+    circuit.output(circuit.mux(s, a, b), circuit.not_(s), circuit.nand(a, circuit.linear([], 1)))
+    program = circuit.compile()
+    assert program.n_levels == 1 and program.n_bootstraps == 3
+    for bits in itertools.product([False, True], repeat=3):
+        res = sk.decrypt(program.run(ck, sk.encrypt(list(bits))))
+        assert list(res) == [bits[1] if bits[0] else bits[2], not bits[0], not bits[1]]
+
+
+def test_executor(keys):
+    sk, ck = keys
+    program = adder(4).compile()
+    inputs = sk.encrypt(to_bits(11, 4) + to_bits(6, 4))
+    with ThreadPoolExecutor(2) as executor:
+        res = program.run(ck, inputs.to_tlwes(), executor=executor, chunks=3)
+    assert list(sk.decrypt(res)) == to_bits(17, 5)
+
+
+def test_process_executor(keys, tmp_path):
+    sk, ck = keys
+    program = adder(2).compile()
+    inputs = sk.encrypt(to_bits(3, 2) + to_bits(1, 2))
+    with ProcessPoolExecutor(2) as executor:
+        with pytest.raises(ValueError):
+            program.run(ck, inputs, executor=executor)
+    ck.save(KeyStore(str(tmp_path)), "cloud")
+    loaded = CloudKey.load(KeyStore(str(tmp_path)), "cloud")
+    with ProcessPoolExecutor(2, initializer=init_worker, initargs=loaded.location) as executor:
+        res = program.run(loaded, inputs, executor=executor, chunks=2)
+    assert list(sk.decrypt(res)) == to_bits(4, 3)
+
+
+def test_wire_numpy_weights():
+    circuit = Circuit()
+    x, y = circuit.input(), circuit.input()
+    weights = np.array([2, -3])
+    circuit.output(x * weights[0] + weights[1] * y)
+    program = circuit.compile()
+    weights, _ = program.outputs
+    assert list(weights[0]) == [2, -3]
+
+
+def test_errors(keys):
+    sk, ck = keys
+    circuit = Circuit()
+    x = circuit.input()
+    with pytest.raises(ValueError):
+        circuit.compile()
+    with pytest.raises(ValueError):
+        Circuit().bootstrap(x)
+    with pytest.raises(ValueError):
+        circuit.gate("nope", x, x)
+    with pytest.raises(TypeError):
+        x * 0.5
+    circuit.output(x)
+    with pytest.raises(ValueError):
+        circuit.compile().run(ck, sk.encrypt([True, False]))
@@ -0,0 +1,107 @@
+import pytest
+import numpy as np
+from tfhe import serialization
+from tfhe.ciphertexts import LWESecretKey, RLWESecretKey, TLWE, TLWEBatch, TRLWE
+from tfhe.ciphertexts.compact import (
+    CompactTLWE,
+    CompactTLWEBatch,
+    CompactTRLWE,
+    expand,
+    shrink,
+    switch_modulus,
+)
+from tfhe.encoding import decode_int, encode_int
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+@pytest.mark.parametrize("bits", [16, 32])
+def test_shrink_expand(bits):
+    data = np.random.randint(0, 2 ** 64, size=100, dtype=np.uint64)
+    small = shrink(data, bits)
+    assert small.dtype.itemsize * 8 == bits
+    error = (expand(small) - data).astype(np.int64)
+    assert np.all(np.abs(error) <= 2 ** (63 - bits))
+    with pytest.raises(ValueError):
+        shrink(data, 8)
+
+
+@pytest.mark.parametrize("bits, p", [(32, 2 ** 16), (16, 2 ** 4)])
+def test_compact_tlwe(bits, p):
+    sk = LWESecretKey(630)
+    for m in [0, 1, p // 2, p - 1]:
+        c = TLWE(630, 2 ** -40, p)
+        c.encrypt(sk, Torus.from_int(m, p))
+        compact = switch_modulus(c, bits)
+        assert isinstance(compact, CompactTLWE)
+        assert compact.nbytes == 631 * bits // 8
+        assert compact.decrypt(sk).to_int(p) == m
+        assert compact.expand().decrypt(sk).to_int(p) == m
+
+
+@pytest.mark.parametrize("bits, p", [(32, 2 ** 16), (16, 2 ** 4)])
+def test_compact_batch(bits, p):
+    sk = LWESecretKey(630)
+    messages = np.arange(40) % p
+    c = TLWEBatch(630, 2 ** -40, p)
+    c.encrypt(sk, encode_int(messages, p))
+    compact = switch_modulus(c, bits)
+    assert isinstance(compact, CompactTLWEBatch) and len(compact) == 40
+    assert np.array_equal(decode_int(compact.decrypt(sk), p), messages)
+
+
+@pytest.mark.parametrize("bits, p", [(32, 2 ** 16), (16, 2 ** 4)])
+def test_compact_trlwe(bits, p):
+    big_n, k = 1024, 2
+    sk = RLWESecretKey(big_n, k)
+    messages = np.arange(big_n) % p
+    c = TRLWE(big_n, 2 ** -40, p, k)
+    c.encrypt(sk, TorusPolynomial.from_int(messages, p, big_n))
+    compact = switch_modulus(c, bits)
+    assert isinstance(compact, CompactTRLWE)
+    assert compact.nbytes == (k + 1) * big_n * bits // 8
+    assert np.array_equal(compact.decrypt(sk).to_int(p), messages)
+
+
+def test_compact_serialization():
+    sk = LWESecretKey(64)
+    c = TLWEBatch(64, 2 ** -40, 2 ** 8)
+    c.encrypt(sk, encode_int(np.arange(10), 2 ** 8))
+    full = serialization.dumps(c)
+    for bits in [32, 16]:
+        compact = switch_modulus(c, bits)
+        data = serialization.dumps(compact)
+        assert len(data) <= len(full) * bits / 64 + 64
+        loaded = serialization.loads(data)
+        assert isinstance(loaded, CompactTLWEBatch) and loaded.bits == bits
+        assert np.array_equal(loaded.mask, compact.mask)
+        assert np.array_equal(decode_int(loaded.decrypt(sk), 2 ** 8), np.arange(10))
+    single = switch_modulus(c.to_tlwes()[3], 32)
+    loaded = serialization.loads(serialization.dumps(single))
+    assert isinstance(loaded, CompactTLWE) and loaded.decrypt(sk).to_int(2 ** 8) == 3
+    rsk = RLWESecretKey(16)
+    r = TRLWE(16, 2 ** -40, 2 ** 8)
+    r.encrypt(rsk, TorusPolynomial.from_int(np.arange(16), 2 ** 8, 16))
+    loaded = serialization.loads(serialization.dumps(switch_modulus(r, 16)))
+    assert isinstance(loaded, CompactTRLWE)
+    assert np.array_equal(loaded.decrypt(rsk).to_int(2 ** 8), np.arange(16))
+
+
+def test_switch_modulus_errors():
+    with pytest.raises(TypeError):
+        switch_modulus(Torus(0))
+    with pytest.raises(ValueError):
+        switch_modulus(TLWE(4, 0, 2))
+
+
+def test_switch_modulus_precision():
+    sk = LWESecretKey(630)
+    c = TLWE(630, 2 ** -40, 2 ** 12)
+    c.encrypt(sk, Torus.from_int(5, 2 ** 12))
+    with pytest.raises(ValueError):
+        switch_modulus(c, 16)
+    assert switch_modulus(c, 32).decrypt(sk).to_int(2 ** 12) == 5
+    r = TRLWE(1024, 2 ** -40, 2 ** 10, 2)
+    r.encrypt(RLWESecretKey(1024, 2), TorusPolynomial.from_int([1], 2 ** 10, 1024))
+    with pytest.raises(ValueError):
+        switch_modulus(r, 16)
@@ -0,0 +1,155 @@
+import pytest
+import numpy as np
+from tfhe import encoding
+from tfhe.torus import Torus
+
+
+@pytest.mark.parametrize("log2_p", [1, 3, 8, 16, 32, 63])
+def test_int_encoding_exact(log2_p):
+    p = 2 ** log2_p
+    values = np.random.randint(0, min(p, 2 ** 62), size=1000, dtype=np.int64)
+    data = encoding.encode_int(values, p)
+    assert data.dtype == np.uint64
+    assert np.array_equal(data, values.astype(np.uint64) << np.uint64(64 - log2_p))
+    assert np.array_equal(encoding.decode_int(data, p), values)
+
+
+@pytest.mark.parametrize("p", [3, 10, 1000, 2 ** 8])
+def test_int_encoding_matches_torus(p):
+    values = np.random.randint(0, p, size=100)
+    data = encoding.encode_int(values, p)
+    for value, d in zip(values, data):
+        assert Torus(d).to_int(p) == value
+    assert np.array_equal(encoding.decode_int(data, p), values)
+
+
+@pytest.mark.parametrize("log2_p", [3, 8, 16])
+def test_int_decoding_rounds_noise(log2_p):
+    p = 2 ** log2_p
+    values = np.random.randint(0, p, size=1000)
+    noise = np.random.randint(-(2 ** 40), 2 ** 40, size=1000).astype(np.uint64)
+    data = encoding.encode_int(values, p) + noise
+    assert np.array_equal(encoding.decode_int(data, p), values)
+    assert np.array_equal(
+        encoding.round_torus(data, p), encoding.encode_int(values, p)
+    )
+
+
+def test_int_encoding_policies():
+    p = 2 ** 3
+    values = [-1, 3, 8, 9]
+    data = encoding.encode_int(values, p, policy="wrap")
+    assert np.array_equal(encoding.decode_int(data, p), [7, 3, 0, 1])
+    data, count = encoding.encode_int(values, p, policy="count")
+    assert count == 3
+    assert np.array_equal(encoding.decode_int(data, p), [7, 3, 0, 1])
+    with pytest.raises(ValueError):
+        encoding.encode_int(values, p, policy="raise")
+    with pytest.raises(ValueError):
+        encoding.encode_int(values, p, policy="ignore")
+
+
+def test_real_encoding():
+    values = np.array([0.0, 0.25, 0.5, 0.75, 0.1])
+    data = encoding.encode_real(values)
+    assert np.allclose(encoding.decode_real(data, 2 ** 16), values, atol=2 ** -16)
+    data, count = encoding.encode_real([-0.25, 1.5], policy="count")
+    assert count == 2
+    assert np.allclose(encoding.decode_real(data, 2 ** 16), [0.75, 0.5])
+
+
+def test_real_encoding_exact():
+    values = [0.5, -0.5, 1.5, 0.25, 0.75, -0.25, 1 - 2 ** -60, -(2 ** -60)]
+    data = encoding.encode_real(values, policy="wrap")
+    expected = [2 ** 63, 2 ** 63, 2 ** 63, 2 ** 62, 3 * 2 ** 62, 3 * 2 ** 62, 0, 2 ** 64 - 16]
+    assert data.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "data_range",
+    [
+        (0, 2),
+        (-2, 1),
+        (-5.5, -4),
+        (-3.1, 3.5),
+    ],
+)
+@pytest.mark.parametrize("log2_p", [3, 8, 16, 32])
+def test_float_encoding(data_range, log2_p):
+    p = 2 ** log2_p
+    precision = (data_range[1] - data_range[0]) / p
+    values = np.random.uniform(data_range[0], data_range[1] - precision, size=1000)
+    data = encoding.encode_float(values, p, data_range)
+    result = encoding.decode_float(data, p, data_range)
+    assert np.allclose(result, values, atol=precision)
+    with pytest.raises(ValueError):
+        encoding.encode_float([data_range[1]], p, data_range, policy="raise")
+    with pytest.raises(TypeError):
+        encoding.encode_float(values, p, data_range[0])
+
+
+@pytest.mark.parametrize(
+    "encoder, values",
+    [
+        (encoding.IntEncoder(2 ** 8), np.arange(0, 2 ** 8)),
+        (encoding.IntEncoder(10), np.arange(0, 10)),
+        (encoding.RealEncoder(2 ** 8), np.arange(0, 2 ** 8) / 2 ** 8),
+        (
+            encoding.FloatEncoder(2 ** 8, (-2, 1)),
+            -2 + np.arange(0, 2 ** 8) * 3 / 2 ** 8,
+        ),
+    ],
+)
+def test_encoder_roundtrip_and_pickle(encoder, values):
+    import pickle
+
+    data = encoder.encode(values)
+    assert data.dtype == np.uint64
+    assert np.allclose(encoder.decode(data), values)
+    loaded = pickle.loads(pickle.dumps(encoder))
+    assert np.array_equal(loaded.encode(values), data)
+    assert np.allclose(loaded.decode(data), values)
+    t = encoder.torus(values[3])
+    assert np.ndim(t.data) == 0
+    assert np.isclose(encoder.decode(t), values[3])
+
+
+def test_encoder_feeds_ciphertexts():
+    from tfhe.ciphertexts import LWESecretKey, RLWESecretKey, TLWE, TRLWE
+
+    encoder = encoding.FloatEncoder(2 ** 8, (-1, 1))
+    sk = LWESecretKey(600)
+    c = TLWE(600, 2 ** -30, 2 ** 8)
+    c.encrypt(sk, encoder.torus(0.5))
+    assert np.ndim(c.decrypt(sk).data) == 0
+    assert np.isclose(encoder.decode(c.decrypt(sk)), 0.5)
+    assert np.ndim(encoding.IntEncoder(8, policy="count").torus(3).data) == 0
+
+    big_n = 2 ** 10
+    values = np.linspace(-1, 0.9, big_n)
+    rsk = RLWESecretKey(big_n)
+    c = TRLWE(big_n, 2 ** -30, 2 ** 8)
+    c.encrypt(rsk, encoder.polynomial(values, big_n))
+    assert np.allclose(encoder.decode(c.decrypt(rsk)), values, atol=encoder.step)
+
+
+def test_encoder_policy():
+    encoder = encoding.IntEncoder(2 ** 4, policy="count")
+    data, count = encoder.encode([1, 17, -1])
+    assert count == 2
+    assert encoder.torus(17).data == encoder.torus(1).data
+    with pytest.raises(ValueError):
+        encoding.IntEncoder(2 ** 4, policy="raise").torus(17)
+
+
+def test_encoder_is_abstract():
+    class Incomplete(encoding.Encoder):
+        def _to_int(self, values):
+            return np.asarray(values), np.zeros(len(values), dtype=bool)
+
+    with pytest.raises(TypeError):
+        Incomplete(2 ** 4)
+    encoder = encoding.RealEncoder(2 ** 4)
+    data = encoder.encode([0.25, 0.5])
+    assert np.array_equal(encoder.decode(data), [0.25, 0.5])
+    assert encoder.decode(Torus(data[0])) == 0.25
@@ -0,0 +1,63 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.gadget import decompose, gadget, recompose
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+def _loop_decompose(data, l, bg_bit):
+    # reference: digit by digit with explicit carries
+    bg = 1 << bg_bit
+    precision = l * bg_bit
+    x = data.astype(object)
+    if precision < 64:
+        x = (x + (1 << (63 - precision))) % 2 ** 64 >> (64 - precision)
+    digits = np.zeros((l,) + data.shape, dtype=np.int64)
+    for j in reversed(range(l)):
+        d = x % bg
+        x = x // bg
+        carry = d >= bg // 2
+        digits[j] = np.where(carry, d - bg, d).astype(np.int64)
+        x = x + carry
+    return np.moveaxis(digits, 0, -2)
+
+
+@pytest.mark.parametrize("l, bg_bit", [(3, 6), (2, 10), (4, 8), (1, 16), (4, 16), (8, 8)])
+def test_decompose(l, bg_bit):
+    data = np.random.randint(0, 2 ** 64, size=(3, 64), dtype=np.uint64)
+    digits = decompose(data, l, bg_bit)
+    assert digits.shape == (3, l, 64)
+    assert np.all(digits >= -(2 ** (bg_bit - 1)))
+    assert np.all(digits < 2 ** (bg_bit - 1))
+    error = (recompose(digits, l, bg_bit) - data).astype(np.int64)
+    if l * bg_bit < 64:
+        assert np.all(np.abs(error) <= 2 ** (63 - l * bg_bit))
+    else:
+        assert np.all(error == 0)
+    assert np.array_equal(digits, _loop_decompose(data, l, bg_bit))
+
+
+def test_decompose_edges():
+    l, bg_bit = 3, 6
+    data = np.array([0, 2 ** 63, 2 ** 64 - 1, 2 ** 63 - 1, 1 << (64 - 18)], dtype=np.uint64)
+    assert np.array_equal(decompose(data, l, bg_bit), _loop_decompose(data, l, bg_bit))
+
+
+def test_decompose_inputs():
+    big_n, k, l, bg_bit = 32, 2, 3, 6
+    sk = RLWESecretKey(big_n, k)
+    c = TRLWE(big_n, 2 ** -20, 8, k)
+    c.encrypt(sk, TorusPolynomial.from_int(np.arange(big_n) % 8, 8, big_n))
+    data = c.to_array()
+    assert np.array_equal(decompose(c, l, bg_bit), decompose(data, l, bg_bit))
+    assert np.array_equal(c.b.decompose(l, bg_bit), decompose(data[k], l, bg_bit))
+    batch = np.stack([data, data[::-1]])
+    digits = decompose(batch, l, bg_bit)
+    assert digits.shape == (2, k + 1, l, big_n)
+    assert np.array_equal(digits[1], decompose(data[::-1], l, bg_bit))
+
+
+def test_gadget():
+    assert list(gadget(2, 8)) == [2 ** 56, 2 ** 48]
+    with pytest.raises(ValueError):
+        gadget(5, 16)
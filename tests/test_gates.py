@@ -0,0 +1,93 @@
+import itertools
+
+import pytest
+import numpy as np
+from tfhe import gates
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+
+TRUTH_TABLES = {
+    "nand": lambda a, b: not (a and b),
+    "and": lambda a, b: a and b,
+    "or": lambda a, b: a or b,
+    "nor": lambda a, b: not (a or b),
+    "xor": lambda a, b: a != b,
+    "xnor": lambda a, b: a == b,
+}
+
+PAIRS = list(itertools.product([False, True], repeat=2))
+
+
+@pytest.fixture(scope="module")
+def keys():
+    sk = gates.SecretKey(n=32, big_n=256)
+    return sk, gates.CloudKey(sk)
+
+
+def test_encrypt_decrypt(keys):
+    sk, _ = keys
+    assert sk.decrypt(sk.encrypt(True)) is True
+    assert sk.decrypt(sk.encrypt(False)) is False
+    bits = [True, False, False, True]
+    c = sk.encrypt(bits)
+    assert isinstance(c, TLWEBatch)
+    assert list(sk.decrypt(c)) == bits
+
+
+@pytest.mark.parametrize("name", sorted(TRUTH_TABLES))
+@pytest.mark.parametrize("a, b", PAIRS)
+def test_gate(keys, name, a, b):
+    sk, ck = keys
+    function = {"and": gates.and_, "or": gates.or_}.get(name) or getattr(gates, name)
+    res = function(ck, sk.encrypt(a), sk.encrypt(b))
+    assert isinstance(res, TLWE) and res.n == 32
+    assert sk.decrypt(res) == TRUTH_TABLES[name](a, b)
+
+
+@pytest.mark.parametrize("name", sorted(TRUTH_TABLES))
+def test_gate_batch(keys, name):
+    sk, ck = keys
+    a, b = np.array(PAIRS * 2).T
+    res = gates.gate(ck, name, sk.encrypt(a), sk.encrypt(b))
+    assert isinstance(res, TLWEBatch) and len(res) == 8
+    assert list(sk.decrypt(res)) == [TRUTH_TABLES[name](x, y) for x, y in zip(a, b)]
+
+
+def test_not(keys):
+    sk, ck = keys
+    assert sk.decrypt(gates.not_(ck, sk.encrypt(True))) is False
+    assert list(sk.decrypt(gates.not_(ck, sk.encrypt([True, False])))) == [False, True]
+
+
+@pytest.mark.parametrize("s, a, b", list(itertools.product([False, True], repeat=3)))
+def test_mux(keys, s, a, b):
+    sk, ck = keys
+    res = gates.mux(ck, sk.encrypt(s), sk.encrypt(a), sk.encrypt(b))
+    assert sk.decrypt(res) == (a if s else b)
+
+
+def test_mux_batch(keys):
+    sk, ck = keys
+    s, a, b = np.array(list(itertools.product([False, True], repeat=3))).T
+    res = gates.mux(ck, sk.encrypt(s), sk.encrypt(a), sk.encrypt(b))
+    assert list(sk.decrypt(res)) == list(np.where(s, a, b))
+
+
+def test_apply(keys):
+    sk, ck = keys
+    names = sorted(TRUTH_TABLES) * 4
+    a, b = np.array([pair for pair in PAIRS for _ in range(6)]).T
+    res = gates.apply(ck, names, sk.encrypt(a), sk.encrypt(b))
+    expected = [TRUTH_TABLES[n](x, y) for n, x, y in zip(names, a, b)]
+    assert list(sk.decrypt(res)) == expected
+    with pytest.raises(ValueError):
+        gates.apply(ck, ["nope"], sk.encrypt([True]), sk.encrypt([True]))
+
+
+def test_gate_chain(keys):
+    # the output noise doesn't grow along a chain of gates
+    sk, ck = keys
+    c = sk.encrypt(False)
+    for i in range(10):
+        c = gates.xor(ck, c, sk.encrypt(True))
+        assert sk.decrypt(c) == (i % 2 == 0)
@@ -0,0 +1,64 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts import LWESecretKey, RLWESecretKey, TLWE
+from tfhe.keystore import KeyStore
+from tfhe.torus import Torus
+
+
+def test_save_open(tmp_path):
+    store = KeyStore(str(tmp_path / "keys"))
+    a = np.random.randint(0, 2 ** 64, size=(10, 20, 30), dtype=np.uint64)
+    c = np.random.randn(4, 8) + 1j * np.random.randn(4, 8)
+    store.save("a", a, big_n=1024, note="test")
+    store.save("c", c)
+    assert store.names() == ["a", "c"]
+    assert "a" in store and "b" not in store
+    assert store.metadata("a") == {"big_n": 1024, "note": "test"}
+
+    reopened = KeyStore(str(tmp_path / "keys"))
+    mapped = reopened.open("a")
+    assert isinstance(mapped, np.memmap)
+    assert not mapped.flags.writeable
+    assert np.array_equal(mapped, a)
+    assert np.array_equal(reopened.open("c"), c)
+    with pytest.raises(KeyError):
+        reopened.open("b")
+
+    store.save("a", a[:2])
+    assert KeyStore(str(tmp_path / "keys")).open("a").shape == (2, 20, 30)
+    store.delete("c")
+    assert store.names() == ["a"]
+
+
+def test_secret_keys(tmp_path):
+    store = KeyStore(str(tmp_path))
+    sk = LWESecretKey(600)
+    rsk = RLWESecretKey(1024, 2)
+    store.save_secret_key("lwe", sk)
+    store.save_secret_key("rlwe", rsk)
+    loaded = KeyStore(str(tmp_path)).load_secret_key("lwe")
+    assert np.array_equal(loaded.bits(), sk.bits())
+    c = TLWE(600, 2 ** -30, 2 ** 8)
+    c.encrypt(sk, Torus.from_int(5, 2 ** 8))
+    assert c.decrypt(loaded).to_int(2 ** 8) == 5
+    loaded = store.load_secret_key("rlwe")
+    assert (loaded.big_n, loaded.k) == (1024, 2)
+    assert np.array_equal(loaded.bits_at(1), rsk.bits_at(1))
+    store.save("other", np.zeros(3))
+    with pytest.raises(ValueError):
+        store.load_secret_key("other")
+    with pytest.raises(TypeError):
+        store.save_secret_key("bad", np.zeros(3))
+
+
+def test_little_endian(tmp_path):
+    store = KeyStore(str(tmp_path))
+    a = np.arange(10, dtype=np.uint64)
+    store.save("big", a.astype(">u8"))
+    store.save("native", a)
+    store.save("bytes", a.astype(np.uint8))
+    for name in ["big", "native"]:
+        assert store._manifest[name]["dtype"] == "<u8"
+        assert np.array_equal(store.open(name), a)
+    assert (tmp_path / "big.bin").read_bytes() == a.astype("<u8").tobytes()
+    assert np.array_equal(store.open("bytes"), a)
@@ -0,0 +1,143 @@
+import pytest
+import numpy as np
+from tfhe.bootstrap import BootstrappingKey, make_test_vector
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.encoding import decode_int, encode_int
+from tfhe.keystore import KeyStore
+from tfhe.keyswitch import (
+    KeySwitchingKey,
+    PackingKeySwitchingKey,
+    decompose_unsigned,
+    unpack,
+)
+from tfhe.torus import Torus
+
+N_IN = 256
+N_OUT = 32
+P = 8
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return LWESecretKey(N_IN), LWESecretKey(N_OUT)
+
+
+@pytest.mark.parametrize("t, base_bit", [(8, 2), (4, 4), (3, 5), (16, 4)])
+def test_decompose_unsigned(t, base_bit):
+    data = np.random.randint(0, 2 ** 64, size=(3, 5), dtype=np.uint64)
+    digits = decompose_unsigned(data, t, base_bit)
+    assert digits.shape == (3, 5, t)
+    assert np.all((digits >= 0) & (digits < 2 ** base_bit))
+    weights = np.array([1 << (64 - base_bit * (j + 1)) for j in range(t)], dtype=np.uint64)
+    recomposed = (digits.astype(np.uint64) * weights).sum(axis=-1, dtype=np.uint64)
+    error = (recomposed - data).astype(np.int64)
+    if t * base_bit < 64:
+        assert np.all(np.abs(error) <= 2 ** (63 - t * base_bit))
+    else:
+        assert np.all(error == 0)
+
+
+@pytest.mark.parametrize("dtype", [np.uint64, np.uint32, np.uint16])
+def test_keyswitch(keys, dtype):
+    sk_in, sk_out = keys
+    ksk = KeySwitchingKey(sk_in, sk_out, 2 ** -30, base_bit=2, t=8, dtype=dtype)
+    assert ksk.table.shape == (N_IN, 8, 4, N_OUT + 1)
+    assert ksk.table.dtype == dtype
+    for m in range(P):
+        c = TLWE(N_IN, 2 ** -30, P)
+        c.encrypt(sk_in, Torus.from_int(m, P))
+        res = ksk.keyswitch(c)
+        assert isinstance(res, TLWE) and res.n == N_OUT
+        assert res.decrypt(sk_out).to_int(P) == m
+
+
+@pytest.mark.parametrize("dtype", [np.uint64, np.uint16])
+def test_keyswitch_batch(keys, dtype, monkeypatch):
+    sk_in, sk_out = keys
+    ksk = KeySwitchingKey(sk_in, sk_out, 2 ** -30, base_bit=4, t=4, dtype=dtype)
+    messages = np.arange(50) % P
+    batch = TLWEBatch(N_IN, 2 ** -30, P)
+    batch.encrypt(sk_in, encode_int(messages, P))
+    res = ksk.keyswitch(batch)
+    assert isinstance(res, TLWEBatch) and res.n == N_OUT and len(res) == 50
+    assert np.array_equal(decode_int(res.decrypt(sk_out), P), messages)
+    # same result with small chunks and one by one
+    monkeypatch.setattr("tfhe.keyswitch.CHUNK_BYTES", 1000)
+    chunked = ksk.keyswitch(batch)
+    assert np.array_equal(chunked.mask, res.mask) and np.array_equal(chunked.b, res.b)
+    single = ksk.keyswitch(batch[7])
+    assert np.array_equal(single.mask, res.mask[7]) and single.b.data == res.b[7]
+
+
+def test_keyswitch_errors(keys):
+    sk_in, sk_out = keys
+    with pytest.raises(ValueError):
+        KeySwitchingKey(sk_in, sk_out, 2 ** -30, dtype=np.int32)
+    ksk = KeySwitchingKey(sk_out, sk_out, 2 ** -30)
+    with pytest.raises(ValueError):
+        ksk.keyswitch(TLWE(N_IN, 0, P))
+    with pytest.raises(TypeError):
+        ksk.keyswitch(Torus(0))
+
+
+def test_bootstrap_keyswitch(tmp_path):
+    # bootstrapped ciphertexts switched back to the input key can be bootstrapped again
+    lwe_sk = LWESecretKey(N_OUT)
+    rlwe_sk = RLWESecretKey(128, k=2)
+    bsk = BootstrappingKey(lwe_sk, rlwe_sk, 2 ** -40, l=3, bg_bit=8)
+    store = KeyStore(str(tmp_path))
+    KeySwitchingKey(rlwe_sk.to_lwe_key(), lwe_sk, 2 ** -30, dtype=np.uint32).save(store, "ksk")
+    ksk = KeySwitchingKey.load(store, "ksk")
+    assert (ksk.n_in, ksk.n_out, ksk.t, ksk.base_bit) == (256, N_OUT, 8, 2)
+    tv = make_test_vector(lambda m: (m + 1) % (P // 2), P, 128)
+    c = TLWE(N_OUT, 2 ** -30, P)
+    c.encrypt(lwe_sk, Torus.from_int(0, P))
+    for i in range(1, 6):
+        c = ksk.keyswitch(bsk.bootstrap(c, tv))
+        assert c.decrypt(lwe_sk).to_int(P) == i % (P // 2)
+    store.save_secret_key("sk", lwe_sk)
+    with pytest.raises(ValueError):
+        KeySwitchingKey.load(store, "sk")
+
+
+@pytest.mark.parametrize("count", [1, 50, 128])
+def test_pack_unpack(count, tmp_path):
+    lwe_sk = LWESecretKey(N_OUT)
+    rlwe_sk = RLWESecretKey(128, k=2)
+    pksk = PackingKeySwitchingKey(lwe_sk, rlwe_sk, 2 ** -40, l=6, bg_bit=4)
+    assert pksk.fourier.shape == (64, N_OUT * 6, 3 * 4)
+    store = KeyStore(str(tmp_path))
+    pksk.save(store, "pksk")
+    pksk = PackingKeySwitchingKey.load(store, "pksk")
+    assert (pksk.n, pksk.big_n, pksk.k) == (N_OUT, 128, 2)
+    messages = np.random.randint(0, P, size=count)
+    batch = TLWEBatch(N_OUT, 2 ** -30, P)
+    batch.encrypt(lwe_sk, encode_int(messages, P))
+    packed = pksk.pack(batch)
+    assert isinstance(packed, TRLWE)
+    decrypted = packed.decrypt(rlwe_sk).to_int(P)
+    assert np.array_equal(decrypted[:count], messages)
+    assert np.all(decrypted[count:] == 0)
+    # from a list of TLWE as well
+    assert np.array_equal(pksk.pack(batch.to_tlwes()).decrypt(rlwe_sk).to_int(P)[:count], messages)
+    unpacked = unpack(packed, count)
+    assert len(unpacked) == count
+    assert np.array_equal(decode_int(unpacked.decrypt(rlwe_sk.to_lwe_key()), P), messages)
+    ksk = KeySwitchingKey(rlwe_sk.to_lwe_key(), lwe_sk, 2 ** -30)
+    switched = unpack(packed, count, ksk)
+    assert np.array_equal(decode_int(switched.decrypt(lwe_sk), P), messages)
+
+
+def test_pack_errors():
+    lwe_sk = LWESecretKey(8)
+    pksk = PackingKeySwitchingKey(lwe_sk, RLWESecretKey(16), 2 ** -40)
+    batch = TLWEBatch(8, 2 ** -30, P)
+    batch.encrypt(lwe_sk, np.zeros(17, dtype=np.uint64))
+    with pytest.raises(ValueError):
+        pksk.pack(batch)
+    c = TLWE(4, 0, P)
+    c.encrypt(LWESecretKey(4), Torus(0))
+    with pytest.raises(ValueError):
+        pksk.pack([c])
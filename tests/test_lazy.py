@@ -0,0 +1,151 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.lazy import LinearCombination, is_lazy, lazy, linear_combination
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+def encrypt_tlwe(sk, m, p, rng):
+    c = TLWE(sk.n, 2 ** -30, p)
+    c.encrypt(sk, Torus.from_int(m, p), rng)
+    return c
+
+
+def encrypt_trlwe(sk, m, p, rng):
+    c = TRLWE(sk.big_n, 2 ** -30, p, sk.k)
+    u = TorusPolynomial.from_array(Torus.from_int(m, p).data.repeat(sk.big_n), sk.big_n)
+    c.encrypt(sk, u, rng)
+    return c
+
+
+def test_lazy_context():
+    assert not is_lazy()
+    with lazy():
+        assert is_lazy()
+        with lazy(False):
+            assert not is_lazy()
+        assert is_lazy()
+    assert not is_lazy()
+
+
+@pytest.mark.parametrize("n", [100, 630])
+def test_lazy_tlwe(n):
+    rng = np.random.default_rng(0)
+    p = 64
+    sk = LWESecretKey(n, rng)
+    c1, c2, c3 = (encrypt_tlwe(sk, m, p, rng) for m in (3, 5, 1))
+    with lazy():
+        expression = 3 * c1 + c2 - c3 * 5 + Torus.from_int(2, p)
+    assert isinstance(expression, LinearCombination)
+    eager = 3 * c1 + c2 - c3 * 5 + Torus.from_int(2, p)
+    res = expression.evaluate()
+    assert isinstance(res, TLWE)
+    np.testing.assert_array_equal(res.mask, eager.mask)
+    assert res.b.data == eager.b.data
+    assert res.decrypt(sk).to_int(p) == (9 + 5 - 5 + 2) % p
+
+
+@pytest.mark.parametrize("k", [1, 2])
+def test_lazy_trlwe(k):
+    rng = np.random.default_rng(1)
+    big_n, p = 256, 64
+    sk = RLWESecretKey(big_n, k, rng)
+    c1, c2 = encrypt_trlwe(sk, 7, p, rng), encrypt_trlwe(sk, 4, p, rng)
+    constant = TorusPolynomial.from_array(Torus.from_int(1, p).data.repeat(big_n), big_n)
+    with lazy():
+        expression = -(c1 * 2) + c2 - constant
+    eager = c2 - c1 * 2 - constant
+    res = expression.evaluate()
+    assert isinstance(res, TRLWE)
+    np.testing.assert_array_equal(res.to_array(), eager.to_array())
+    np.testing.assert_array_equal(Torus(expression.decrypt(sk).data).to_int(p), (-14 + 4 - 1) % p)
+
+
+def test_lazy_repeated_ciphertext():
+    rng = np.random.default_rng(2)
+    p = 64
+    sk = LWESecretKey(100, rng)
+    c1, c2 = encrypt_tlwe(sk, 3, p, rng), encrypt_tlwe(sk, 1, p, rng)
+    with lazy():
+        expression = c1 + c2 + c1 * 4 - c2
+    ciphertexts, coefficients = expression._merged()
+    assert coefficients == [5, 0]
+    np.testing.assert_array_equal(expression.evaluate().mask, (c1 * 5).mask)
+
+
+def test_lazy_mixed_outside_block():
+    rng = np.random.default_rng(3)
+    p = 64
+    sk = LWESecretKey(100, rng)
+    c1, c2 = encrypt_tlwe(sk, 3, p, rng), encrypt_tlwe(sk, 1, p, rng)
+    assert isinstance(c1 + c2, TLWE)
+    expression = c1 + LinearCombination.of(c2) * 3
+    assert isinstance(expression, LinearCombination)
+    assert expression.decrypt(sk).to_int(p) == 6
+
+
+def test_linear_combination():
+    rng = np.random.default_rng(4)
+    p = 256
+    sk = LWESecretKey(200, rng)
+    messages = rng.integers(0, p, 20)
+    weights = rng.integers(-4, 5, 20)
+    ciphertexts = [encrypt_tlwe(sk, int(m), p, rng) for m in messages]
+    res = linear_combination(weights.tolist(), ciphertexts)
+    assert res.decrypt(sk).to_int(p) == int(weights @ messages) % p
+
+
+def test_lazy_errors():
+    rng = np.random.default_rng(5)
+    c1 = encrypt_tlwe(LWESecretKey(100, rng), 1, 64, rng)
+    c2 = encrypt_tlwe(LWESecretKey(200, rng), 1, 64, rng)
+    with lazy():
+        expression = c1 + c2
+    with pytest.raises(ValueError):
+        expression.evaluate()
+    with pytest.raises(ValueError):
+        LinearCombination().evaluate()
+    with pytest.raises(TypeError):
+        LinearCombination.of(c1) * 0.5
+
+
+def test_lazy_type_checks():
+    rng = np.random.default_rng(6)
+    p = 64
+    c = encrypt_tlwe(LWESecretKey(100, rng), 1, p, rng)
+    sk = RLWESecretKey(64, 1, rng)
+    r = encrypt_trlwe(sk, 1, p, rng)
+    batch = TLWEBatch(100, 2 ** -30, p)
+    polynomial = TorusPolynomial.from_array(np.zeros(64, dtype=np.uint64), 64)
+    with lazy():
+        for expression in [
+            lambda: c + batch,
+            lambda: c - np.zeros(100, dtype=np.uint64),
+            lambda: c + r,
+            lambda: c + polynomial,
+            lambda: r - Torus.from_int(1, p),
+            lambda: (c * 2) + (r * 2),
+        ]:
+            with pytest.raises(TypeError):
+                expression()
+
+
+def test_lazy_rsub():
+    rng = np.random.default_rng(7)
+    p = 64
+    sk = LWESecretKey(100, rng)
+    c = encrypt_tlwe(sk, 5, p, rng)
+    with lazy():
+        expression = Torus.from_int(2, p) - c
+    assert isinstance(expression, LinearCombination)
+    assert expression.decrypt(sk).to_int(p) == (2 - 5) % p
+    rsk = RLWESecretKey(64, 1, rng)
+    r = encrypt_trlwe(rsk, 5, p, rng)
+    constant = TorusPolynomial.from_array(Torus.from_int(2, p).data.repeat(64), 64)
+    with lazy():
+        expression = constant - r
+    assert isinstance(expression, LinearCombination)
+    np.testing.assert_array_equal(Torus(expression.decrypt(rsk).data).to_int(p), (2 - 5) % p)
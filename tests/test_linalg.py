@@ -0,0 +1,90 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.encoding import decode_int, encode_int
+from tfhe import linalg
+from tfhe.linalg import dot, estimate_noise, matvec
+
+N = 200
+P = 2 ** 10
+
+
+@pytest.fixture(scope="module")
+def sk():
+    return LWESecretKey(N, np.random.default_rng(0))
+
+
+def encrypt(sk, messages, sigma=2 ** -40, rng=None):
+    c = TLWEBatch(N, sigma, P)
+    c.encrypt(sk, encode_int(np.asarray(messages) % P, P), rng)
+    return c
+
+
+@pytest.mark.parametrize("m, size", [(1, 1), (7, 30), (64, 200)])
+def test_matvec(sk, m, size):
+    rng = np.random.default_rng(m)
+    messages = rng.integers(0, P, size)
+    weights = rng.integers(-20, 21, (m, size))
+    res, noise = matvec(weights, encrypt(sk, messages, rng=rng))
+    assert isinstance(res, TLWEBatch)
+    assert len(res) == m
+    np.testing.assert_array_equal(decode_int(res.decrypt(sk), P), (weights @ messages) % P)
+    assert noise.shape == (m,)
+
+
+def test_matvec_matches_eager(sk):
+    rng = np.random.default_rng(1)
+    batch = encrypt(sk, rng.integers(0, P, 5), rng=rng)
+    weights = np.array([[3, -1, 0, 7, -5]])
+    res, _ = matvec(weights, batch)
+    eager = batch[0] * 3 + batch[1] * -1 + batch[3] * 7 + batch[4] * -5
+    np.testing.assert_array_equal(res.mask[0], eager.mask)
+    assert res.b[0] == eager.b.data
+
+
+def test_matvec_chunks(sk, monkeypatch):
+    rng = np.random.default_rng(2)
+    messages = rng.integers(0, P, 50)
+    weights = rng.integers(-100, 101, (40, 50))
+    batch = encrypt(sk, messages, rng=rng)
+    expected, _ = matvec(weights, batch)
+    # blocks of one mask row and a few weights
+    monkeypatch.setattr(linalg, "CHUNK_BYTES", 8 * 3)
+    res, _ = matvec(weights, batch)
+    np.testing.assert_array_equal(res.mask, expected.mask)
+    np.testing.assert_array_equal(res.b, expected.b)
+
+
+def test_dot(sk):
+    rng = np.random.default_rng(3)
+    messages = rng.integers(0, P, 30)
+    weights = rng.integers(-50, 51, 30)
+    ciphertexts = [encrypt(sk, messages, rng=rng)[i] for i in range(30)]
+    res, noise = dot(weights, ciphertexts, sigma=2 ** -20)
+    assert isinstance(res, TLWE)
+    assert res.decrypt(sk).to_int(P) == int(weights @ messages) % P
+    assert noise == pytest.approx(2 ** -20 * np.sqrt(np.sum(weights ** 2)))
+
+
+def test_estimate_noise(sk):
+    rng = np.random.default_rng(4)
+    sigma = 2 ** -20
+    size = 20
+    weights = rng.integers(-30, 31, (2000, size))
+    batch = encrypt(sk, np.zeros(size, dtype=np.int64), sigma, rng)
+    res, noise = matvec(weights, batch)
+    np.testing.assert_allclose(noise, estimate_noise(weights, sigma))
+    # the normalized errors of the outputs have a standard deviation close to 1
+    errors = (res.b - res.mask @ sk.bits()).astype(np.int64) / 2.0 ** 64
+    assert np.std(errors / noise) == pytest.approx(1, rel=0.1)
+
+
+def test_linalg_errors(sk):
+    batch = encrypt(sk, [1, 2, 3])
+    with pytest.raises(ValueError):
+        matvec(np.ones((2, 4), dtype=np.int64), batch)
+    with pytest.raises(ValueError):
+        matvec(np.ones(3, dtype=np.int64), batch)
+    with pytest.raises(TypeError):
+        dot(np.ones(3) * 0.5, batch)
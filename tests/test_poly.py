@@ -0,0 +1,111 @@
+import pytest
+import numpy as np
+from tfhe import poly
+from tfhe.poly import negacyclic_mul, negacyclic_rotate, negacyclic_rotate_sub, get_fft
+
+
+def random_poly(big_n, high=2 ** 64):
+    return np.random.randint(0, high, size=big_n, dtype=np.uint64)
+
+
+@pytest.mark.parametrize("big_n", [2 ** 4, 2 ** 9, 2 ** 10, 2 ** 11])
+def test_fft_mul_matches_schoolbook(big_n):
+    p1 = random_poly(big_n)
+    p2 = random_poly(big_n)
+    expected = negacyclic_mul(p1, p2, big_n, backend="schoolbook")
+    result = negacyclic_mul(p1, p2, big_n, backend="fft")
+    assert result.dtype == np.uint64
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("big_n", [2 ** 10, 2 ** 11])
+def test_fft_mul_binary_key(big_n):
+    key = random_poly(big_n, high=2)
+    p = random_poly(big_n)
+    expected = negacyclic_mul(key, p, big_n, backend="schoolbook")
+    result = negacyclic_mul(key, p, big_n, backend="fft")
+    assert np.array_equal(result, expected)
+
+
+def test_fft_mul_negacyclic_wrap():
+    big_n = 8
+    x = np.zeros(big_n, dtype=np.uint64)
+    x[big_n - 1] = 1
+    # X^(N-1) * X^(N-1) = X^(2N-2) = -X^(N-2)
+    result = negacyclic_mul(x, x, big_n, backend="fft")
+    expected = np.zeros(big_n, dtype=np.uint64)
+    expected[big_n - 2] = np.uint64(2 ** 64 - 1)
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("big_n", [2 ** 4, 2 ** 10])
+def test_fft_split_combine(big_n):
+    fft = get_fft(big_n)
+    x = random_poly(big_n)
+    limbs = fft.split(x)
+    assert limbs.shape == (fft.limbs, big_n)
+    assert np.all(np.abs(limbs) <= 2 ** (fft.limb_bits - 1))
+    assert np.array_equal(fft.combine(limbs), x)
+
+
+def test_set_backend():
+    big_n = 2 ** 6
+    p1 = random_poly(big_n)
+    p2 = random_poly(big_n)
+    previous = poly.get_backend()
+    try:
+        poly.set_backend("schoolbook")
+        assert poly.get_backend() == "schoolbook"
+        expected = negacyclic_mul(p1, p2, big_n)
+    finally:
+        poly.set_backend(previous)
+    assert np.array_equal(negacyclic_mul(p1, p2, big_n), expected)
+    with pytest.raises(ValueError):
+        poly.set_backend("unknown")
+
+
+@pytest.mark.parametrize("length", [0, 1, 5, 8, 9, 16, 17, 31])
+def test_polymod(length):
+    big_n = 8
+    p = random_poly(length)
+    expected = [0] * big_n
+    for i, coeff in enumerate(p.tolist()):
+        sign = -1 if (i // big_n) % 2 else 1
+        expected[i % big_n] = (expected[i % big_n] + sign * coeff) % 2 ** 64
+    result = poly.polymod(p, big_n)
+    assert result.dtype == np.uint64
+    assert result.tolist() == expected
+
+
+def test_polymod_no_copy_when_reduced():
+    p = random_poly(16)
+    assert poly.polymod(p, 16) is p
+
+
+def _monomial(a, big_n):
+    monomial = np.zeros(big_n, dtype=np.uint64)
+    monomial[a % big_n] = 1 if a % (2 * big_n) < big_n else 2 ** 64 - 1
+    return monomial
+
+
+@pytest.mark.parametrize("a", [0, 1, 5, 15, 16, 17, 31, 32, -3, -17])
+def test_negacyclic_rotate(a):
+    big_n = 16
+    data = np.random.randint(0, 2 ** 64, size=(2, big_n), dtype=np.uint64)
+    expected = np.stack(
+        [negacyclic_mul(_monomial(a, big_n), d, big_n, backend="schoolbook") for d in data]
+    )
+    assert np.array_equal(negacyclic_rotate(data, a), expected)
+    assert np.array_equal(negacyclic_rotate_sub(data, a), expected - data)
+    out = np.empty_like(data)
+    assert negacyclic_rotate(data, a, out=out) is out
+    assert np.array_equal(out, expected)
+    negacyclic_rotate_sub(data, a, out=out)
+    assert np.array_equal(out, expected - data)
+    # in place
+    inplace = data.copy()
+    negacyclic_rotate(inplace, a, out=inplace)
+    assert np.array_equal(inplace, expected)
+    inplace = data.copy()
+    negacyclic_rotate_sub(inplace, a, out=inplace)
+    assert np.array_equal(inplace, expected - data)
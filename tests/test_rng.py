@@ -0,0 +1,112 @@
+import threading
+
+import pytest
+import numpy as np
+from tfhe import rng
+from tfhe.ciphertexts import LWESecretKey, RLWESecretKey, TLWE, TLWEBatch, TRLWE
+from tfhe.encoding import decode_real, encode_int
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+@pytest.mark.parametrize("bit_generator", ["philox", "sfc64"])
+def test_make_rng_reproducible(bit_generator):
+    r1 = rng.make_rng(42, bit_generator)
+    r2 = rng.make_rng(42, bit_generator)
+    assert np.array_equal(rng.uniform_torus(100, r1), rng.uniform_torus(100, r2))
+    with pytest.raises(ValueError):
+        rng.make_rng(42, "mt19937")
+
+
+def test_seed_and_spawn():
+    rng.seed(1234)
+    a = rng.uniform_torus(10)
+    children = rng.spawn(2)
+    rng.seed(1234)
+    assert np.array_equal(rng.uniform_torus(10), a)
+    children_again = rng.spawn(2)
+    for c1, c2 in zip(children, children_again):
+        assert np.array_equal(rng.uniform_torus(10, c1), rng.uniform_torus(10, c2))
+    assert not np.array_equal(
+        rng.uniform_torus(10, children[0]), rng.uniform_torus(10, children[1])
+    )
+    rng.seed()
+
+
+def test_threads_use_independent_streams():
+    results = {}
+
+    def sample(i):
+        results[i] = rng.uniform_torus(10)
+
+    threads = [threading.Thread(target=sample, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    samples = [tuple(r.tolist()) for r in results.values()]
+    assert len(set(samples)) == 4
+
+
+def test_bulk_sampling():
+    r = rng.make_rng(0)
+    mask = rng.uniform_torus((50, 600), r)
+    assert mask.shape == (50, 600) and mask.dtype == np.uint64
+    bits = rng.binary(1000, r)
+    assert set(bits.tolist()) <= {0, 1}
+    sigma = 2 ** -10
+    noise = rng.gaussian_torus(100000, sigma, r)
+    assert noise.dtype == np.uint64
+    real = noise.astype(np.int64) / 2 ** 64
+    assert abs(real.std() - sigma) < sigma * 0.05
+
+
+def test_encryption_reproducible():
+    p = 2 ** 8
+    sk = LWESecretKey(600, rng=rng.make_rng(1))
+    assert np.array_equal(sk.bits(), LWESecretKey(600, rng=rng.make_rng(1)).bits())
+    c1 = TLWE(600, 2 ** -20, p)
+    c2 = TLWE(600, 2 ** -20, p)
+    c1.encrypt(sk, Torus.from_int(3, p), rng=rng.make_rng(7))
+    c2.encrypt(sk, Torus.from_int(3, p), rng=rng.make_rng(7))
+    assert np.array_equal(c1.mask, c2.mask)
+    assert c1.b.data == c2.b.data
+    assert c1.decrypt(sk).to_int(p) == 3
+
+    batch = TLWEBatch(600, 2 ** -20, p)
+    batch.encrypt(sk, encode_int([1, 2, 3], p), rng=rng.make_rng(7))
+    assert np.array_equal(batch.decrypt(sk), encode_int([1, 2, 3], p))
+
+    big_n = 2 ** 9
+    rsk = RLWESecretKey(big_n, 2, rng=rng.make_rng(1))
+    u = TorusPolynomial.from_int([5] * big_n, p, big_n)
+    c1 = TRLWE(big_n, 2 ** -20, p, 2)
+    c2 = TRLWE(big_n, 2 ** -20, p, 2)
+    c1.encrypt(rsk, u, rng=rng.make_rng(7))
+    c2.encrypt(rsk, u, rng=rng.make_rng(7))
+    assert np.array_equal(c1.b.data, c2.b.data)
+    assert np.array_equal(c1.decrypt(rsk).to_int(p), u.to_int(p))
+
+
+def test_new_seed():
+    seeds = {rng.new_seed() for _ in range(100)}
+    assert len(seeds) == 100
+    assert max(seeds) >= 2 ** 64
+    assert all(0 <= s < 2 ** rng.SEED_BITS for s in seeds)
+    assert rng.new_seed(rng.make_rng(3)) == rng.new_seed(rng.make_rng(3))
+
+
+def test_fork_stream_differs_from_spawned(monkeypatch):
+    rng.seed(5)
+    root = rng._root["seed_seq"]
+    (first,) = rng.spawn(1)
+    # a child forked with pid 3 must not replay the streams spawned from the root's child (3,)
+    monkeypatch.setattr(rng.os, "getpid", lambda: 3)
+    (forked,) = rng.spawn(1)
+    (spawned,) = np.random.SeedSequence(root.entropy, spawn_key=(3,)).spawn(1)
+    spawned = rng.make_rng(spawned)
+    values = forked.integers(0, 2 ** 63, 8)
+    for other in [first, spawned]:
+        assert not np.array_equal(values, other.integers(0, 2 ** 63, 8))
+    monkeypatch.undo()
+    rng.seed()
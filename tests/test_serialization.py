@@ -0,0 +1,162 @@
+import io
+
+import pytest
+import numpy as np
+from tfhe import serialization
+from tfhe.ciphertexts import LWESecretKey, RLWESecretKey, TLWE, TLWEBatch, TRLWE
+from tfhe.encoding import decode_int, encode_int
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+P = 2 ** 8
+
+
+def test_secret_keys_roundtrip():
+    sk = LWESecretKey(600)
+    loaded = serialization.loads(serialization.dumps(sk))
+    assert loaded.n == 600
+    assert np.array_equal(loaded.bits(), sk.bits())
+    rsk = RLWESecretKey(1024, 2)
+    loaded = serialization.loads(serialization.dumps(rsk))
+    assert (loaded.big_n, loaded.k) == (1024, 2)
+    for i in range(2):
+        assert np.array_equal(loaded.bits_at(i), rsk.bits_at(i))
+
+
+@pytest.mark.parametrize("seeded", [False, True])
+def test_tlwe_roundtrip(seeded):
+    sk = LWESecretKey(600)
+    c = TLWE(600, 2 ** -30, P)
+    if seeded:
+        c.encrypt_seeded(sk, Torus.from_int(42, P))
+    else:
+        c.encrypt(sk, Torus.from_int(42, P))
+    data = serialization.dumps(c)
+    if seeded:
+        assert len(data) < 100
+    else:
+        assert len(data) >= 8 * 601
+    loaded = serialization.loads(data)
+    assert (loaded.n, loaded.p, loaded.sigma) == (600, P, 2 ** -30)
+    assert loaded.is_compressed() == seeded
+    assert loaded.decrypt(sk).to_int(P) == 42
+
+
+@pytest.mark.parametrize("seeded", [False, True])
+def test_trlwe_roundtrip(seeded):
+    big_n = 1024
+    values = np.random.randint(0, P, size=big_n)
+    sk = RLWESecretKey(big_n, 2)
+    c = TRLWE(big_n, 2 ** -30, P, 2)
+    u = TorusPolynomial.from_int(values, P, big_n)
+    if seeded:
+        c.encrypt_seeded(sk, u)
+    else:
+        c.encrypt(sk, u)
+    loaded = serialization.loads(serialization.dumps(c))
+    assert (loaded.big_n, loaded.k) == (big_n, 2)
+    assert np.array_equal(loaded.decrypt(sk).to_int(P), values)
+
+
+def test_zero_copy_loads():
+    sk = LWESecretKey(600)
+    batch = TLWEBatch(600, 2 ** -30, P)
+    batch.encrypt(sk, encode_int(np.arange(50), P))
+    data = serialization.dumps(batch)
+    loaded = serialization.loads(data)
+    assert not loaded.mask.flags.owndata
+    assert not loaded.mask.flags.writeable
+    assert np.array_equal(loaded.mask, batch.mask)
+    assert np.array_equal(decode_int((loaded + loaded).decrypt(sk), P), (2 * np.arange(50)) % P)
+    assert loaded.copy().mask.flags.writeable
+
+
+def test_stream_many_records():
+    sk = LWESecretKey(600)
+    batch = TLWEBatch(600, 2 ** -30, P)
+    batch.encrypt(sk, encode_int(np.arange(100), P))
+    seeded = TLWEBatch(600, 2 ** -30, P)
+    seeded.encrypt_seeded(sk, encode_int(np.arange(10), P))
+    c = TLWE(600, 2 ** -30, P)
+    c.encrypt(sk, Torus.from_int(7, P))
+    f = io.BytesIO()
+    for obj in [sk, batch, seeded, c]:
+        serialization.dump(obj, f)
+    f.seek(0)
+    loaded = list(serialization.iter_load(f))
+    assert len(loaded) == 4
+    assert np.array_equal(loaded[0].bits(), sk.bits())
+    assert np.array_equal(decode_int(loaded[1].decrypt(sk), P), np.arange(100))
+    assert loaded[2].is_compressed()
+    assert np.array_equal(decode_int(loaded[2].decrypt(sk), P), np.arange(10))
+    assert loaded[3].decrypt(sk).to_int(P) == 7
+    assert len(list(serialization.iter_loads(f.getvalue()))) == 4
+
+
+def test_invalid_records():
+    with pytest.raises(ValueError):
+        serialization.loads(b"XXXX" + bytes(100))
+    with pytest.raises(TypeError):
+        serialization.dumps(Torus(1))
+    with pytest.raises(ValueError):
+        serialization.dumps(TLWE(600, 2 ** -30, P))
+
+
+def test_wide_seed_roundtrip():
+    sk = LWESecretKey(600)
+    c = TLWE(600, 2 ** -30, P)
+    c.encrypt_seeded(sk, Torus.from_int(7, P), seed=2 ** 100 + 5)
+    loaded = serialization.loads(serialization.dumps(c))
+    assert loaded.seed == 2 ** 100 + 5
+    assert loaded.decrypt(sk).to_int(P) == 7
+
+
+def test_version_1_record():
+    sk = LWESecretKey(600)
+    c = TLWE(600, 2 ** -30, P)
+    c.encrypt_seeded(sk, Torus.from_int(9, P), seed=12345)
+    params = serialization._PARAMS_V1[serialization.KIND_TLWE].pack(600, P, 2 ** -30, 12345, 0)
+    params += bytes(-(serialization._HEADER.size + len(params)) % 16)
+    header = serialization._HEADER.pack(
+        serialization.MAGIC, 1, serialization.KIND_TLWE, serialization.FLAG_SEEDED, 64,
+        len(params), 8,
+    )
+    record = header + params + np.array([c.b.data], dtype="<u8").tobytes()
+    loaded = serialization.loads(record)
+    assert loaded.seed == 12345
+    assert loaded.decrypt(sk).to_int(P) == 9
+
+
+class ShortReads(io.RawIOBase):
+    """
+    Stream returning at most 7 bytes per read, like a pipe
+    """
+
+    def __init__(self, data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self.data.read(min(7, len(buffer)))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+def test_load_truncated_and_short_reads():
+    sk = LWESecretKey(600)
+    batch = TLWEBatch(600, 2 ** -30, P)
+    batch.encrypt(sk, encode_int(np.arange(5), P))
+    data = serialization.dumps(sk) + serialization.dumps(batch)
+    loaded = list(serialization.iter_load(ShortReads(data)))
+    assert len(loaded) == 2
+    assert np.array_equal(decode_int(loaded[1].decrypt(sk), P), np.arange(5))
+    for cut in [1, 15, 100]:
+        with pytest.raises(ValueError):
+            list(serialization.iter_load(io.BytesIO(data[:-cut])))
+    with pytest.raises(ValueError):
+        list(serialization.iter_load(io.BytesIO(data + data[:10])))
+    with pytest.raises(EOFError):
+        serialization.load(io.BytesIO(b""))
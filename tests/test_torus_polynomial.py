@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+from tfhe.poly import negacyclic_mul
 from tfhe.torus_polynomial import TorusPolynomial
 
 
@@ -129,3 +130,77 @@ def test_torus_polynomial_sub_batched(r1, r2, big_n):
     assert len(result) == big_n
     for i in range(big_n):
         assert equal_torus_elem(result[i], (r1 - r2) % 1)
+
+
+@pytest.mark.parametrize("big_n", [2 ** 10, 2 ** 9])
+def test_torus_polynomial_inplace_ops(big_n):
+    a = np.random.randint(0, 2 ** 64, size=big_n, dtype=np.uint64)
+    b = np.random.randint(0, 2 ** 64, size=big_n, dtype=np.uint64)
+    u1 = TorusPolynomial(a, big_n)
+    u2 = TorusPolynomial(b, big_n)
+    data = u1.data
+    u1 += u2
+    assert u1.data is data
+    assert np.array_equal(u1.data, a + b)
+    u1 -= u2
+    assert u1.data is data
+    assert np.array_equal(u1.data, a)
+    assert np.array_equal((-u1).data, np.uint64(0) - a)
+    assert np.array_equal((u1 + (-u1)).data, np.zeros(big_n, dtype=np.uint64))
+    assert np.array_equal(u1.__rsub__(u2).data, b - a)
+
+
+def test_torus_polynomial_ops_mismatch():
+    u1 = TorusPolynomial([1], 2 ** 9)
+    u2 = TorusPolynomial([1], 2 ** 10)
+    with pytest.raises(ValueError):
+        u1 + u2
+    with pytest.raises(ValueError):
+        u1 -= u2
+    with pytest.raises(TypeError):
+        u1 += 1
+
+
+@pytest.mark.parametrize("i", [-3, -1, 0, 2, 5])
+def test_torus_polynomial_mul_int(i):
+    p = 2 ** 8
+    u = TorusPolynomial.from_int([3] * 2 ** 9, p, 2 ** 9)
+    result = (u * i).to_int(p)
+    for j in range(2 ** 9):
+        assert result[j] == (3 * i) % p
+
+
+@pytest.mark.parametrize("a", [0, 3, 16, 20, -1])
+def test_torus_polynomial_rotate(a):
+    big_n = 16
+    p = TorusPolynomial.from_array(
+        np.random.randint(0, 2 ** 64, size=big_n, dtype=np.uint64), big_n
+    )
+    monomial = [0] * big_n
+    monomial[a % big_n] = 1 if a % (2 * big_n) < big_n else -1
+    expected = negacyclic_mul(np.array(monomial, dtype=np.int64).astype(np.uint64), p.data, big_n)
+    assert np.array_equal(p.rotate(a).data, expected)
+    assert np.array_equal(p.rotate_sub(a).data, expected - p.data)
+    q = p.copy()
+    assert q.rotate(a, out=q) is q
+    assert np.array_equal(q.data, expected)
+    out = TorusPolynomial([0], big_n)
+    p.rotate_sub(a, out=out)
+    assert np.array_equal(out.data, expected - p.data)
+    with pytest.raises(ValueError):
+        p.rotate(a, out=TorusPolynomial([0], 2 * big_n))
+
+
+def test_torus_polynomial_encoding_policy(capsys):
+    p = 2 ** 4
+    poly = TorusPolynomial.from_int([1, 17, -1], p, 8)
+    assert list(poly.to_int(p)[:3]) == [1, 1, p - 1]
+    poly, count = TorusPolynomial.from_int([1, 17, -1], p, 8, policy="count")
+    assert count == 2
+    with pytest.raises(ValueError):
+        TorusPolynomial.from_int([17], p, 8, policy="raise")
+    with pytest.raises(ValueError):
+        TorusPolynomial.from_float([2.5], p, (-1, 1), 8, policy="raise")
+    _, count = TorusPolynomial.from_float([0.5, 2.5], p, (-1, 1), 8, policy="count")
+    assert count == 1
+    assert capsys.readouterr().out == ""
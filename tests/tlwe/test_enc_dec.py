@@ -63,3 +63,16 @@ def test_tlwe_enc_dec_float(data_range, n, sigma):
     result = c.decrypt(sk).to_float(p, data_range)
     precision = (data_range[1] - data_range[0]) / p
     assert np.allclose(result, f, atol=precision)
+
+
+@pytest.mark.parametrize("n", [600, 1024])
+def test_tlwe_mask_is_array(n):
+    sk = LWESecretKey(n)
+    c = TLWE(n, 2 ** -30, 2 ** 8)
+    c.encrypt(sk, Torus.from_int(3, 2 ** 8))
+    assert isinstance(c.mask, np.ndarray)
+    assert c.mask.dtype == np.uint64
+    assert c.mask.shape == (n,)
+    c_copy = c.copy()
+    c_copy.mask[0] += np.uint64(1)
+    assert c_copy.mask[0] != c.mask[0]
@@ -91,4 +91,19 @@ def test_tlwe_mul_int(i1, i2, n, sigma):
     c1.encrypt(sk, u1)
     c_mul = c1 * i2
     result = c_mul.decrypt(sk).to_int(P)
-    assert result == expected
\ No newline at end of file
+    assert result == expected
+
+
+@pytest.mark.parametrize("i1", [0, 3, 17, P - 1])
+@pytest.mark.parametrize("i2", [-1, -3, -10])
+@pytest.mark.parametrize("n", [600, 1024])
+@pytest.mark.parametrize("sigma", [2 ** -30])
+def test_tlwe_mul_negative_int(i1, i2, n, sigma):
+    u1 = Torus.from_int(i1, P)
+    expected = (i1 * i2) % P
+    sk = LWESecretKey(n)
+    c1 = TLWE(n, sigma, P)
+    c1.encrypt(sk, u1)
+    c_mul = c1 * i2
+    result = c_mul.decrypt(sk).to_int(P)
+    assert result == expected
@@ -100,4 +100,15 @@ def test_tlwe_mul_int(u1, i2, n, sigma):
     c1.encrypt(sk, u1)
     c_mul = c1 * i2
     result = c_mul.decrypt(sk).to_real(p)
-    assert equal_torus_elem(result, expected.to_real(p), atol=0.1)
\ No newline at end of file
+    assert equal_torus_elem(result, expected.to_real(p), atol=0.1)
+
+@pytest.mark.parametrize("i1, i2", [(1, 3), (5, 2), (0, 7)])
+def test_tlwe_rsub_plain(i1, i2):
+    p = 8
+    sk = LWESecretKey(600)
+    c = TLWE(600, 2 ** -30, p)
+    c.encrypt(sk, Torus.from_int(i2, p))
+    assert (-c).decrypt(sk).to_int(p) == -i2 % p
+    res = Torus.from_int(i1, p) - c
+    assert isinstance(res, TLWE)
+    assert res.decrypt(sk).to_int(p) == (i1 - i2) % p
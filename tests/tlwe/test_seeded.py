@@ -0,0 +1,94 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts import LWESecretKey, TLWE, TLWEBatch
+from tfhe.encoding import decode_int, encode_int
+from tfhe.torus import Torus
+
+
+P = 2 ** 8
+
+
+@pytest.mark.parametrize("i", [0, 13, P - 1])
+@pytest.mark.parametrize("n", [600, 1023, 1024])
+def test_tlwe_seeded_enc_dec(i, n):
+    sk = LWESecretKey(n)
+    c = TLWE(n, 2 ** -30, P)
+    c.encrypt_seeded(sk, Torus.from_int(i, P))
+    assert c.is_compressed()
+    assert c.decrypt(sk).to_int(P) == i
+    assert not c.is_compressed()
+    c.compress()
+    assert c.is_compressed()
+    assert c.decrypt(sk).to_int(P) == i
+
+
+def test_tlwe_seeded_ops():
+    n = 600
+    sk = LWESecretKey(n)
+    c1 = TLWE(n, 2 ** -30, P)
+    c2 = TLWE(n, 2 ** -30, P)
+    c1.encrypt_seeded(sk, Torus.from_int(3, P), seed=1)
+    c2.encrypt(sk, Torus.from_int(5, P))
+    c3 = c1.copy()
+    assert c3.is_compressed()
+    assert ((c1 + c2) * 2).decrypt(sk).to_int(P) == 16
+    assert (c3 - c2).decrypt(sk).to_int(P) == (3 - 5) % P
+    same_seed = TLWE(n, 2 ** -30, P)
+    same_seed.encrypt_seeded(sk, Torus.from_int(3, P), seed=1)
+    assert np.array_equal(same_seed.mask, c1.mask)
+
+
+@pytest.mark.parametrize("n", [600, 1023])
+def test_tlwe_batch_seeded(n):
+    m = 20
+    values = np.random.randint(0, P, size=m)
+    sk = LWESecretKey(n)
+    batch = TLWEBatch(n, 2 ** -30, P)
+    batch.encrypt_seeded(sk, encode_int(values, P))
+    assert batch.is_compressed()
+    # single ciphertexts and slices stay compressed
+    c = batch[5]
+    assert c.is_compressed()
+    assert c.decrypt(sk).to_int(P) == values[5]
+    sub = batch[3:7]
+    assert sub.is_compressed()
+    assert np.array_equal(decode_int(sub.decrypt(sk), P), values[3:7])
+    # expanding the whole batch and each of its ciphertexts give the same masks
+    tlwes = batch.to_tlwes()
+    assert all(t.is_compressed() for t in tlwes)
+    rebuilt = TLWEBatch.from_tlwes(tlwes[::-1])
+    assert np.array_equal(rebuilt.mask, batch.mask[::-1])
+    assert np.array_equal(decode_int(batch.decrypt(sk), P), values)
+    assert np.array_equal(decode_int((batch + batch).decrypt(sk), P), (2 * values) % P)
+
+
+def test_tlwe_batch_mixed_decompression():
+    n = 600
+    sk = LWESecretKey(n)
+    batch = TLWEBatch(n, 2 ** -30, P)
+    batch.encrypt_seeded(sk, encode_int(np.arange(100), P))
+    c = TLWE(n, 2 ** -30, P)
+    c.encrypt(sk, Torus.from_int(200, P))
+    # sparse offsets within the same seed, plus a regular ciphertext
+    mixed = TLWEBatch.from_tlwes([batch[0], c, batch[99], batch[50]])
+    assert np.array_equal(decode_int(mixed.decrypt(sk), P), [0, 200, 99, 50])
+    batch[1] = c
+    assert not batch.is_compressed()
+    assert batch.seed is None
+    assert decode_int(batch.decrypt(sk), P)[1] == 200
+
+
+def test_tlwe_seeded_copy_edit():
+    n = 600
+    sk = LWESecretKey(n)
+    c = TLWE(n, 2 ** -30, P)
+    c.encrypt_seeded(sk, Torus.from_int(3, P))
+    assert c.decrypt(sk).to_int(P) == 3
+    # the expanded copy owns its mask, which can't be dropped anymore
+    edited = c.copy()
+    assert not edited.is_compressed()
+    edited.mask += c.mask
+    edited.b += c.b
+    with pytest.raises(ValueError):
+        edited.compress()
+    assert edited.decrypt(sk).to_int(P) == 6
@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts import LWESecretKey, TLWE, TLWEBatch
+from tfhe.torus import Torus
+
+
+P = 2 ** 8
+
+
+def encode(values):
+    return np.array([Torus.from_int(int(v), P).data for v in values], dtype=np.uint64)
+
+
+def decode(data):
+    return np.array([Torus(x).to_int(P) for x in data])
+
+
+@pytest.mark.parametrize("m", [1, 10, 100])
+@pytest.mark.parametrize("n", [600, 1024])
+@pytest.mark.parametrize("sigma", [2 ** -15, 2 ** -30])
+def test_tlwe_batch_enc_dec(m, n, sigma):
+    values = np.random.randint(0, P, size=m)
+    sk = LWESecretKey(n)
+    c = TLWEBatch(n, sigma, P)
+    c.encrypt(sk, encode(values))
+    assert c.mask.shape == (m, n)
+    assert c.b.shape == (m,)
+    assert len(c) == m
+    assert np.array_equal(decode(c.decrypt(sk)), values)
+
+
+@pytest.mark.parametrize("n", [600, 1024])
+def test_tlwe_batch_ops(n):
+    m = 50
+    sigma = 2 ** -30
+    v1 = np.random.randint(0, P, size=m)
+    v2 = np.random.randint(0, P, size=m)
+    w = np.random.randint(-10, 10, size=m)
+    sk = LWESecretKey(n)
+    c1 = TLWEBatch(n, sigma, P)
+    c2 = TLWEBatch(n, sigma, P)
+    c1.encrypt(sk, encode(v1))
+    c2.encrypt(sk, encode(v2))
+    assert np.array_equal(decode((c1 + c2).decrypt(sk)), (v1 + v2) % P)
+    assert np.array_equal(decode((c1 - c2).decrypt(sk)), (v1 - v2) % P)
+    assert np.array_equal(decode((c1 * 3).decrypt(sk)), (v1 * 3) % P)
+    assert np.array_equal(decode((-2 * c1).decrypt(sk)), (v1 * -2) % P)
+    assert np.array_equal(decode((c1 * w).decrypt(sk)), (v1 * w) % P)
+    assert np.array_equal(decode((w * c1).decrypt(sk)), (v1 * w) % P)
+    assert np.array_equal(
+        decode((c1 + Torus.from_int(5, P)).decrypt(sk)), (v1 + 5) % P
+    )
+    assert np.array_equal(decode((c1 - encode(v2)).decrypt(sk)), (v1 - v2) % P)
+
+
+def test_tlwe_batch_indexing():
+    n = 600
+    sigma = 2 ** -30
+    values = np.random.randint(0, P, size=10)
+    sk = LWESecretKey(n)
+    batch = TLWEBatch(n, sigma, P)
+    batch.encrypt(sk, encode(values))
+    c = batch[3]
+    assert isinstance(c, TLWE)
+    assert c.decrypt(sk).to_int(P) == values[3]
+    sub = batch[2:5]
+    assert isinstance(sub, TLWEBatch)
+    assert np.array_equal(decode(sub.decrypt(sk)), values[2:5])
+    new = TLWE(n, sigma, P)
+    new.encrypt(sk, Torus.from_int(42, P))
+    batch[0] = new
+    assert decode(batch.decrypt(sk))[0] == 42
+    tlwes = batch.to_tlwes()
+    assert len(tlwes) == 10
+    rebuilt = TLWEBatch.from_tlwes(tlwes)
+    assert np.array_equal(rebuilt.mask, batch.mask)
+    assert np.array_equal(rebuilt.b, batch.b)
+
+
+def test_tlwe_batch_param_mismatch():
+    sk = LWESecretKey(600)
+    c1 = TLWEBatch(600, 2 ** -30, P)
+    c2 = TLWEBatch(600, 2 ** -30, P)
+    c1.encrypt(sk, encode([1, 2, 3]))
+    c2.encrypt(sk, encode([1, 2]))
+    with pytest.raises(ValueError):
+        c1 + c2
+    with pytest.raises(ValueError):
+        c1 * [1, 2]
+    with pytest.raises(TypeError):
+        c1 * 1.5
+
+
+def test_tlwe_batch_rsub():
+    sk = LWESecretKey(600)
+    c = TLWEBatch(600, 2 ** -30, P)
+    c.encrypt(sk, encode([1, 2, 3]))
+    assert np.array_equal(decode((-c).decrypt(sk)), [P - 1, P - 2, P - 3])
+    res = encode([5, 5, 5]) - c
+    assert isinstance(res, TLWEBatch)
+    assert np.array_equal(decode(res.decrypt(sk)), [4, 3, 2])
+    res = Torus.from_int(1, P) - c
+    assert np.array_equal(decode(res.decrypt(sk)), [0, P - 1, P - 2])
+
+
+def test_tlwe_batch_mul_numpy_int():
+    sk = LWESecretKey(600)
+    c = TLWEBatch(600, 2 ** -30, P)
+    c.encrypt(sk, encode([1, 2, 3]))
+    weights = np.array([3, -2])
+    assert np.array_equal(decode((c * weights[0]).decrypt(sk)), [3, 6, 9])
+    assert np.array_equal(decode((weights[1] * c).decrypt(sk)), [P - 2, P - 4, P - 6])
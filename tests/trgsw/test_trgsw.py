@@ -0,0 +1,58 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.trgsw import TRGSW
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.gadget import decompose
+from tfhe.poly import negacyclic_mul
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+P = 2 ** 8
+
+
+@pytest.mark.parametrize("mu", [0, 1, 2, -1])
+def test_external_product_exact(mu):
+    # noise free TRGSW, compare the Fourier domain product with schoolbook products
+    big_n, k, l, bg_bit = 64, 2, 3, 8
+    sk = RLWESecretKey(big_n, k)
+    g = TRGSW(big_n, 0, k, l, bg_bit)
+    g.encrypt(sk, mu)
+    c = TRLWE(big_n, 2 ** -30, P, k)
+    c.encrypt(sk, TorusPolynomial.from_int(np.arange(big_n) % P, P, big_n))
+    result = g.external_product(c).to_array()
+    digits = decompose(c.to_array(), l, bg_bit).reshape(-1, big_n)
+    expected = np.zeros((k + 1, big_n), dtype=np.uint64)
+    for r in range(len(digits)):
+        for col in range(k + 1):
+            expected[col] += negacyclic_mul(
+                digits[r].astype(np.uint64), g.data[r, col], big_n, backend="schoolbook"
+            )
+    assert np.array_equal(result, expected)
+
+
+@pytest.mark.parametrize("mu", [0, 1, 3, -1])
+@pytest.mark.parametrize("big_n", [512, 1024])
+@pytest.mark.parametrize("k", [1, 2])
+def test_external_product(mu, big_n, k):
+    sk = RLWESecretKey(big_n, k)
+    values = np.random.randint(0, P, size=big_n)
+    c = TRLWE(big_n, 2 ** -30, P, k)
+    c.encrypt(sk, TorusPolynomial.from_int(values, P, big_n))
+    g = TRGSW(big_n, 2 ** -30, k, l=3, bg_bit=6)
+    g.encrypt(sk, mu)
+    result = (g * c).decrypt(sk).to_int(P)
+    assert np.array_equal(result, (mu * values) % P)
+
+
+def test_trgsw_rows():
+    big_n, k = 256, 1
+    sk = RLWESecretKey(big_n, k)
+    g = TRGSW(big_n, 2 ** -30, k, l=2, bg_bit=4)
+    g.encrypt(sk, 1)
+    rows = g.rows
+    assert len(rows) == (k + 1) * 2
+    # row (i = k, j) encrypts the constant 1 / Bg^(j+1)
+    phase = rows[k * 2 + 1].decrypt(sk).to_real(2 ** 16)
+    assert np.isclose(phase[0], 1 / 2 ** 8)
+    with pytest.raises(TypeError):
+        g * 3
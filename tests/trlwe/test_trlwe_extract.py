@@ -0,0 +1,72 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE, sample_extract
+from tfhe.encoding import decode_int
+from tfhe.torus_polynomial import TorusPolynomial
+
+P = 2 ** 8
+
+
+def _encrypt(big_n, k):
+    sk = RLWESecretKey(big_n, k)
+    messages = np.random.randint(0, P, size=big_n)
+    c = TRLWE(big_n, 2 ** -30, P, k)
+    c.encrypt(sk, TorusPolynomial.from_int(messages, P, big_n))
+    return sk, c, messages
+
+
+@pytest.mark.parametrize("big_n", [16, 1024])
+@pytest.mark.parametrize("k", [1, 2])
+@pytest.mark.parametrize("i", [0, 1, 7, -1, -16])
+def test_extract(big_n, k, i):
+    sk, c, messages = _encrypt(big_n, k)
+    extracted = c.extract(i)
+    assert isinstance(extracted, TLWE)
+    assert extracted.n == k * big_n
+    assert extracted.decrypt(sk.to_lwe_key()).to_int(P) == messages[i]
+
+
+@pytest.mark.parametrize("big_n", [16, 1024])
+@pytest.mark.parametrize("k", [1, 3])
+def test_extract_all(big_n, k):
+    sk, c, messages = _encrypt(big_n, k)
+    batch = c.extract_all()
+    assert isinstance(batch, TLWEBatch)
+    assert len(batch) == big_n and batch.n == k * big_n
+    lwe_sk = sk.to_lwe_key()
+    assert np.array_equal(decode_int(batch.decrypt(lwe_sk), P), messages)
+    indices = [3, 0, 3, big_n - 1]
+    subset = c.extract(indices)
+    assert np.array_equal(decode_int(subset.decrypt(lwe_sk), P), messages[indices])
+    single = c.extract(5)
+    assert np.array_equal(batch.mask[5], single.mask)
+    assert batch.b[5] == single.b.data
+
+
+def test_sample_extract_stacked():
+    big_n, k = 16, 2
+    data = np.random.randint(0, 2 ** 64, size=(4, k + 1, big_n), dtype=np.uint64)
+    masks, bodies = sample_extract(data, [1, 2])
+    assert masks.shape == (4, 2, k * big_n) and bodies.shape == (4, 2)
+    masks0, bodies0 = sample_extract(data, 0)
+    assert masks0.shape == (4, k * big_n) and bodies0.shape == (4,)
+    for r in range(4):
+        c = TRLWE.from_array(data[r], 0, P)
+        assert np.array_equal(c.extract([1, 2]).mask, masks[r])
+        assert np.array_equal(c.extract(0).mask, masks0[r])
+
+
+def test_extract_nothing_encrypted():
+    with pytest.raises(RuntimeError):
+        TRLWE(16, 0, P).extract(0)
+
+
+def test_extract_out_of_range():
+    sk, c, messages = _encrypt(16, 1)
+    for indices in [16, -17, [0, 16]]:
+        with pytest.raises(IndexError):
+            c.extract(indices)
+    subset = c.extract([-1, -2])
+    assert np.array_equal(decode_int(subset.decrypt(sk.to_lwe_key()), P), messages[[-1, -2]])
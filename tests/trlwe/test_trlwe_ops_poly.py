@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.trlwe import *
+from tfhe.integer_polynomial import IntegerPolynomial
+from tfhe.lazy import lazy
+from tfhe.poly import negacyclic_mul
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+def encrypt(sk, messages, p, rng):
+    c = TRLWE(sk.big_n, 2 ** -40, p, sk.k)
+    c.encrypt(sk, TorusPolynomial.from_int(messages, p, sk.big_n), rng)
+    return c
+
+
+@pytest.mark.parametrize("big_n", [16, 1024, 2048])
+@pytest.mark.parametrize("bound", [2, 256, 2 ** 16])
+def test_integer_polynomial_mul_torus(big_n, bound):
+    rng = np.random.default_rng(big_n + bound)
+    coefficients = rng.integers(-bound + 1, bound, big_n)
+    data = rng.integers(0, 2 ** 64, (3, big_n), dtype=np.uint64)
+    poly = IntegerPolynomial(coefficients, big_n)
+    expected = [
+        negacyclic_mul(d, coefficients.astype(np.uint64), big_n, backend="schoolbook")
+        for d in data
+    ]
+    np.testing.assert_array_equal(poly.mul_torus(data), expected)
+
+
+def test_integer_polynomial_reduction():
+    poly = IntegerPolynomial([1, 2, 3, 4, 5, 6], big_n=4)
+    np.testing.assert_array_equal(poly.data, [1 - 5, 2 - 6, 3, 4])
+    with pytest.raises(ValueError):
+        IntegerPolynomial([2 ** 16], big_n=4)
+
+
+@pytest.mark.parametrize("k", [1, 2])
+def test_trlwe_mul_integer_polynomial(k):
+    rng = np.random.default_rng(k)
+    big_n, p = 256, 64
+    sk = RLWESecretKey(big_n, k, rng)
+    messages = rng.integers(0, p, big_n)
+    coefficients = rng.integers(-3, 4, big_n)
+    c = encrypt(sk, messages, p, rng)
+    poly = IntegerPolynomial(coefficients, big_n)
+    expected = negacyclic_mul(
+        messages.astype(np.uint64), coefficients.astype(np.uint64), big_n, backend="schoolbook"
+    ) % np.uint64(p)
+    res = c * poly
+    np.testing.assert_array_equal(res.decrypt(sk).to_int(p), expected)
+    np.testing.assert_array_equal((poly * c).to_array(), res.to_array())
+    # the transform of the plaintext is kept for the next products
+    fourier = poly.fourier
+    c * poly
+    assert poly.fourier is fourier
+
+
+def test_trlwe_mul_batch():
+    rng = np.random.default_rng(3)
+    big_n, p = 128, 32
+    sk = RLWESecretKey(big_n, 1, rng)
+    ciphertexts = [encrypt(sk, rng.integers(0, p, big_n), p, rng) for _ in range(5)]
+    poly = IntegerPolynomial([1, 0, -2], big_n)
+    res = mul_batch(ciphertexts, poly)
+    assert len(res) == 5
+    for r, c in zip(res, ciphertexts):
+        np.testing.assert_array_equal(r.to_array(), (c * poly).to_array())
+    assert mul_batch([], poly) == []
+
+
+def test_trlwe_mul_integer_polynomial_errors():
+    rng = np.random.default_rng(4)
+    sk = RLWESecretKey(64, 1, rng)
+    c = encrypt(sk, [1], 8, rng)
+    with pytest.raises(ValueError):
+        c * IntegerPolynomial([1], 128)
+    with pytest.raises(ValueError):
+        mul_batch([c], IntegerPolynomial([1], 128))
+    with lazy():
+        assert isinstance(c * IntegerPolynomial([2], 64), TRLWE)
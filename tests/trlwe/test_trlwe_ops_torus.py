@@ -1,6 +1,7 @@
 import pytest
 import numpy as np
 from tfhe.ciphertexts.trlwe import *
+from tfhe.torus import Torus
 from tfhe.torus_polynomial import TorusPolynomial
 
 
@@ -115,4 +116,33 @@ def test_trlwe_mul_int(r1, i2, big_n, k, sigma):
     result = c_mul.decrypt(sk).to_real(p)
     assert len(result) == len(expected) == big_n
     for r, e in zip(result, expected):
-        assert equal_torus_elem(r, e, atol=0.1)
\ No newline at end of file
+        assert equal_torus_elem(r, e, atol=0.1)
+
+
+@pytest.mark.parametrize("a", [0, 5, 64, 100, -7])
+@pytest.mark.parametrize("k", [1, 2])
+def test_trlwe_rotate(a, k):
+    big_n, p = 64, 2 ** 8
+    u = TorusPolynomial.from_int(np.arange(big_n) % p, p, big_n)
+    sk = RLWESecretKey(big_n, k)
+    c = TRLWE(big_n, 2 ** -30, p, k)
+    c.encrypt(sk, u)
+    assert np.array_equal(c.rotate(a).decrypt(sk).data, u.rotate(a).data)
+    assert np.array_equal(c.rotate_sub(a).decrypt(sk).data, u.rotate_sub(a).data)
+    c.rotate(a, out=c)
+    assert np.array_equal(c.decrypt(sk).data, u.rotate(a).data)
+
+
+@pytest.mark.parametrize("k", [1, 2])
+def test_trlwe_rsub_plain(k):
+    big_n, p = 64, 2 ** 4
+    sk = RLWESecretKey(big_n, k)
+    c = TRLWE(big_n, 2 ** -30, p, k)
+    messages = np.arange(big_n) % p
+    c.encrypt(sk, TorusPolynomial.from_int(messages, p, big_n))
+    assert np.array_equal((-c).decrypt(sk).to_int(p), -messages % p)
+    res = TorusPolynomial.from_int([1] * big_n, p, big_n) - c
+    assert isinstance(res, TRLWE)
+    assert np.array_equal(res.decrypt(sk).to_int(p), (1 - messages) % p)
+    with pytest.raises(TypeError):
+        Torus.from_int(1, p) - c
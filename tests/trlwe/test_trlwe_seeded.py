@@ -0,0 +1,20 @@
+import pytest
+import numpy as np
+from tfhe.ciphertexts.trlwe import *
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+@pytest.mark.parametrize("big_n", [1024, 2048])
+@pytest.mark.parametrize("k", [1, 2])
+def test_trlwe_seeded_enc_dec(big_n, k):
+    p = 2 ** 8
+    values = np.random.randint(0, p, size=big_n)
+    u = TorusPolynomial.from_int(values, p, big_n)
+    sk = RLWESecretKey(big_n, k)
+    c = TRLWE(big_n, 2 ** -30, p, k)
+    c.encrypt_seeded(sk, u)
+    assert c.is_compressed()
+    copy = c.copy()
+    assert np.array_equal(c.decrypt(sk).to_int(p), values)
+    assert not c.is_compressed()
+    assert np.array_equal((copy + c).decrypt(sk).to_int(p), (2 * values) % p)
@@ -0,0 +1,213 @@
+"""
+Programmable bootstrapping of TLWE ciphertexts.
+
+The phase of the input ciphertext is switched to Z_2N and used to rotate a test polynomial
+(the lookup table) by X^-phase through a blind rotation: one CMux per coefficient of the LWE
+secret key, driven by TRGSW encryptions of the key bits under a RLWE key (the bootstrapping
+key). The constant coefficient of the rotated polynomial is then extracted into a fresh TLWE
+ciphertext under the LWE key made of the RLWE key coefficients (`RLWESecretKey.to_lwe_key`).
+"""
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trgsw import TRGSW, external_product_array
+from tfhe.ciphertexts.trlwe import sample_extract
+from tfhe.encoding import encode_int
+from tfhe.poly import get_fft, negacyclic_rotate, negacyclic_rotate_sub
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+
+def modulus_switch(data, big_n):
+    """
+    Round torus elements (uint64) to the closest multiple of 1 / 2N, outputs integers in
+    [0, 2N) (int64)
+    """
+    shift = 64 - (2 * big_n).bit_length() + 1
+    data = np.asarray(data, dtype=np.uint64)
+    rounded = (data >> np.uint64(shift - 1)) + np.uint64(1)
+    return ((rounded >> np.uint64(1)) % np.uint64(2 * big_n)).astype(np.int64)
+
+
+def make_test_vector(f, p, big_n, p_out=None):
+    """
+    Test polynomial evaluating `f` during a bootstrapping.
+
+    The input messages are integers m in [0, p/2) encoded as m / p, the upper half of the torus
+    being kept as padding: for a phase in [1/2, 1) the bootstrapping outputs -f(m - p/2).
+
+    :param f: callable or sequence of p/2 integers giving the output for each input message
+    :param p_out: precision of the output messages, defaults to `p`
+    """
+    if p_out is None:
+        p_out = p
+    half = p // 2
+    if callable(f):
+        lut = np.array([f(m) for m in range(half)], dtype=object)
+    else:
+        lut = np.array(f, dtype=object)
+        if len(lut) != half:
+            raise ValueError(f"the lookup table must have {half} values, got {len(lut)}")
+    lut = encode_int(np.array([int(v) % p_out for v in lut], dtype=object), p_out)
+    # message closest to the phase j / 2N, the window of m spreads around m / p
+    m = (np.arange(big_n) * p + big_n) // (2 * big_n)
+    data = lut[m % half]
+    data[m >= half] = -data[m >= half]
+    return TorusPolynomial.from_array(data, big_n)
+
+
+def _rotate_rows(data, a, big_n):
+    """
+    Multiply polynomials of shape (M, ..., N) by X^a[i] modulo X^N + 1, one exponent per row
+    """
+    # X^a p has p_((j - a) mod N) at position j, negated when j - a wraps an odd number of times
+    index = (np.arange(big_n) - np.asarray(a)[:, None]) % (2 * big_n)
+    index = index.reshape(index.shape[:1] + (1,) * (data.ndim - 2) + index.shape[1:])
+    rotated = np.take_along_axis(data, index % big_n, axis=-1)
+    return np.where(index >= big_n, -rotated, rotated)
+
+
+class BootstrappingKey:
+    """
+    TRGSW encryptions of the bits of a LWE secret key under a RLWE secret key, kept in the
+    Fourier domain as a single array of shape (n, N/2, (k+1)*l, (k+1)*limbs)
+    """
+
+    def __init__(self, lwe_sk, rlwe_sk, sigma, l=3, bg_bit=6, rng=None):
+        """
+        :param sigma: standard deviation of the noise of the TRGSW encryptions
+        """
+        self.n = lwe_sk.n
+        self.big_n = rlwe_sk.big_n
+        self.k = rlwe_sk.k
+        self.sigma = sigma
+        self.l = l
+        self.bg_bit = bg_bit
+        fourier = []
+        for bit in lwe_sk.bits():
+            g = TRGSW(self.big_n, sigma, self.k, l, bg_bit)
+            g.encrypt(rlwe_sk, int(bit), rng)
+            fourier.append(g.fourier)
+        self.fourier = np.stack(fourier)
+
+    @classmethod
+    def from_array(cls, fourier, sigma, l, bg_bit):
+        """
+        Build a key from an existing Fourier-domain array, which isn't copied
+        """
+        key = cls.__new__(cls)
+        key.n = fourier.shape[0]
+        key.big_n = fourier.shape[1] * 2
+        key.k = fourier.shape[3] // get_fft(key.big_n).limbs - 1
+        key.sigma = sigma
+        key.l = l
+        key.bg_bit = bg_bit
+        key.fourier = fourier
+        return key
+
+    def save(self, store, name):
+        """
+        Write the key in a `tfhe.keystore.KeyStore`
+        """
+        store.save(
+            name,
+            self.fourier,
+            kind="bootstrapping_key",
+            sigma=self.sigma,
+            l=self.l,
+            bg_bit=self.bg_bit,
+        )
+
+    @classmethod
+    def load(cls, store, name):
+        """
+        Map a key written with `save`, its pages are only read when they're used
+        """
+        metadata = store.metadata(name)
+        if metadata.get("kind") != "bootstrapping_key":
+            raise ValueError(f"{name} is not a bootstrapping key")
+        return cls.from_array(
+            store.open(name), metadata["sigma"], metadata["l"], metadata["bg_bit"]
+        )
+
+    def blind_rotate(self, c, test_vector):
+        """
+        TRLWE encryption, as a (k+1) x N array, of `test_vector` * X^-phase(c) with the phase
+        switched to Z_2N
+        """
+        if c.n != self.n:
+            raise ValueError(f"expected a TLWE of size {self.n}, got {c.n}")
+        if test_vector.big_n != self.big_n:
+            raise ValueError(f"expected a test polynomial of degree {self.big_n}")
+        a = modulus_switch(c.mask, self.big_n)
+        b = int(modulus_switch(c.b.data, self.big_n))
+        acc = np.zeros((self.k + 1, self.big_n), dtype=np.uint64)
+        negacyclic_rotate(test_vector.data, -b, out=acc[self.k])
+        diff = np.empty_like(acc)
+        for i in np.flatnonzero(a):
+            # CMux: acc + bsk_i * (X^a_i acc - acc)
+            negacyclic_rotate_sub(acc, int(a[i]), out=diff)
+            acc += external_product_array(self.fourier[i], diff, self.l, self.bg_bit)
+        return acc
+
+    def blind_rotate_batch(self, c, test_vector):
+        """
+        Blind rotation of all the ciphertexts of the TLWEBatch `c` at once, outputs an array of
+        shape (M, k+1, N). Each step of the rotation is a single external product over the M
+        accumulators.
+
+        :param test_vector: TorusPolynomial, or (M, N) uint64 array with a test polynomial per
+            ciphertext
+        """
+        if c.n != self.n:
+            raise ValueError(f"expected TLWE of size {self.n}, got {c.n}")
+        if isinstance(test_vector, TorusPolynomial):
+            if test_vector.big_n != self.big_n:
+                raise ValueError(f"expected a test polynomial of degree {self.big_n}")
+            test_vector = test_vector.data
+        test_vector = np.broadcast_to(
+            np.asarray(test_vector, dtype=np.uint64), (len(c), self.big_n)
+        )
+        a = modulus_switch(c.mask, self.big_n)
+        b = modulus_switch(c.b, self.big_n)
+        acc = np.zeros((len(c), self.k + 1, self.big_n), dtype=np.uint64)
+        acc[:, self.k] = _rotate_rows(test_vector, -b, self.big_n)
+        for i in range(self.n):
+            rows = np.flatnonzero(a[:, i])
+            if len(rows) == 0:
+                continue
+            if len(rows) == len(acc):
+                # avoid copying the accumulators with a fancy index
+                rows = slice(None)
+            # CMux on the accumulators actually rotated at this step
+            diff = _rotate_rows(acc[rows], a[rows, i], self.big_n) - acc[rows]
+            acc[rows] += external_product_array(self.fourier[i], diff, self.l, self.bg_bit)
+        return acc
+
+    def bootstrap_batch(self, c, test_vector, p=None):
+        """
+        Bootstrap all the ciphertexts of `c`, a TLWEBatch or a list of TLWE, outputs a TLWEBatch
+        of TLWE of size k*N. See `bootstrap` and `blind_rotate_batch`.
+        """
+        if not isinstance(c, TLWEBatch):
+            c = TLWEBatch.from_tlwes(c)
+        acc = self.blind_rotate_batch(c, test_vector)
+        mask, b = sample_extract(acc, 0)
+        res = TLWEBatch(self.k * self.big_n, self.sigma, c.p if p is None else p)
+        res.mask = mask
+        res.b = b
+        return res
+
+    def bootstrap(self, c, test_vector, p=None):
+        """
+        Bootstrap the TLWE ciphertext `c`, outputs a TLWE of size k*N encrypting the constant
+        coefficient of `test_vector` * X^-phase(c), see `make_test_vector`
+
+        :param p: precision of the output ciphertext, defaults to the one of `c`
+        """
+        acc = self.blind_rotate(c, test_vector)
+        mask, b = sample_extract(acc, 0)
+        res = TLWE(self.k * self.big_n, self.sigma, c.p if p is None else p)
+        res.mask = mask
+        res.b = Torus(b)
+        return res
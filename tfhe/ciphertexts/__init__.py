@@ -0,0 +1,5 @@
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.ciphertexts.trgsw import TRGSW
+from tfhe.ciphertexts.compact import CompactTLWE, CompactTLWEBatch, CompactTRLWE
@@ -0,0 +1,162 @@
+"""
+Compact ciphertexts for storage and transfer.
+
+Switching the modulus of a ciphertext from 2^64 to 2^bits rounds every coefficient of its mask
+and body to the closest multiple of 2^-bits, which only keeps the `bits` most significant bits
+of each torus element. It adds a rounding error of at most 2^-(bits+1) per coefficient, and the
+product of the rounded mask with the secret key, about half of whose dim bits are set, adds up
+to a phase error of the order of sqrt(dim/2) * 2^-bits. `switch_modulus` refuses to go below
+the precision where this error reaches 1/(2p), e.g. bits = 16 only suits a few bits of message
+for n = 630.
+"""
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import TRLWE
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+WORD_DTYPES = {
+    32: np.uint32,
+    16: np.uint16,
+}
+
+
+def _check_bits(bits):
+    if bits not in WORD_DTYPES:
+        raise ValueError(f"bits must be one of {sorted(WORD_DTYPES)}, got {bits}")
+
+
+def shrink(data, bits):
+    """
+    Round torus elements (uint64) to `bits` bits, outputs an array of the `bits` bits word type
+    """
+    _check_bits(bits)
+    shift = np.uint64(64 - bits)
+    data = np.asarray(data, dtype=np.uint64)
+    return ((data + (np.uint64(1) << (shift - np.uint64(1)))) >> shift).astype(WORD_DTYPES[bits])
+
+
+def expand(data):
+    """
+    Inverse of `shrink`, outputs torus elements (uint64) of the same value
+    """
+    data = np.asarray(data)
+    return data.astype(np.uint64) << np.uint64(64 - data.dtype.itemsize * 8)
+
+
+class _Compact:
+    """
+    Ciphertext whose mask and body are stored as `bits` bits words
+    """
+
+    def __init__(self, sigma, p, bits):
+        _check_bits(bits)
+        self.sigma = sigma
+        self.p = p
+        self.bits = bits
+        self.mask = None
+        self.b = None
+
+    @property
+    def nbytes(self):
+        return self.mask.nbytes + self.b.nbytes
+
+    def decrypt(self, sk):
+        """
+        Decrypt with the secret key of the original ciphertext
+        """
+        if self.b is None:
+            raise RuntimeError("nothing is encrypted")
+        return self.expand().decrypt(sk)
+
+
+class CompactTLWE(_Compact):
+    def __init__(self, n, sigma, p, bits=32):
+        super().__init__(sigma, p, bits)
+        self.n = n
+
+    def expand(self):
+        """
+        TLWE ciphertext with 64 bits words, encrypting the same message
+        """
+        c = TLWE(self.n, self.sigma, self.p)
+        c.mask = expand(self.mask)
+        c.b = Torus(expand(self.b))
+        return c
+
+
+class CompactTLWEBatch(_Compact):
+    def __init__(self, n, sigma, p, bits=32):
+        super().__init__(sigma, p, bits)
+        self.n = n
+
+    def __len__(self):
+        return len(self.b)
+
+    def expand(self):
+        """
+        TLWEBatch with 64 bits words, encrypting the same messages
+        """
+        c = TLWEBatch(self.n, self.sigma, self.p)
+        c.mask = expand(self.mask)
+        c.b = expand(self.b)
+        return c
+
+
+class CompactTRLWE(_Compact):
+    def __init__(self, big_n, sigma, p, k=1, bits=32):
+        super().__init__(sigma, p, bits)
+        self.big_n = big_n
+        self.k = k
+
+    def expand(self):
+        """
+        TRLWE ciphertext with 64 bits words, encrypting the same message
+        """
+        c = TRLWE(self.big_n, self.sigma, self.p, self.k)
+        c.mask = [TorusPolynomial.from_array(m, self.big_n) for m in expand(self.mask)]
+        c.b = TorusPolynomial.from_array(expand(self.b), self.big_n)
+        return c
+
+
+def _check_precision(dim, p, bits):
+    """
+    Check that the rounding error of a ciphertext of key size `dim` switched to `bits` bits
+    keeps the messages encoded with `p` decryptable
+    """
+    error = np.sqrt(dim / 2) * 2.0 ** -bits
+    if error >= 1 / (2 * p):
+        raise ValueError(
+            f"{bits} bits words are too small for p = {p} with a key of size {dim}: the "
+            f"rounding error ({error:.2e}) reaches half the message step ({1 / (2 * p):.2e})"
+        )
+
+
+def switch_modulus(c, bits=32):
+    """
+    Rescale a TLWE, TLWEBatch or TRLWE ciphertext to a modulus of 2^bits, outputs the matching
+    compact ciphertext. Raises ValueError if the rounding error could exceed half the step
+    1/p between two messages.
+    """
+    if isinstance(c, (TLWE, TLWEBatch, TRLWE)) and c.b is None:
+        raise ValueError("nothing is encrypted")
+    if isinstance(c, (TLWE, TLWEBatch)):
+        _check_precision(c.n, c.p, bits)
+    elif isinstance(c, TRLWE):
+        _check_precision(c.k * c.big_n, c.p, bits)
+    if isinstance(c, TLWE):
+        res = CompactTLWE(c.n, c.sigma, c.p, bits)
+        res.mask = shrink(c.mask, bits)
+        res.b = shrink(c.b.data, bits)
+    elif isinstance(c, TLWEBatch):
+        res = CompactTLWEBatch(c.n, c.sigma, c.p, bits)
+        res.mask = shrink(c.mask, bits)
+        res.b = shrink(c.b, bits)
+    elif isinstance(c, TRLWE):
+        res = CompactTRLWE(c.big_n, c.sigma, c.p, c.k, bits)
+        res.mask = shrink(np.stack([m.data for m in c.mask]), bits)
+        res.b = shrink(c.b.data, bits)
+    else:
+        raise TypeError(f"can't switch the modulus of object of type {type(c)}")
+    return res
@@ -1,5 +1,7 @@
 import numpy as np
 from tfhe.ciphertexts.ciphertext import Ciphertext
+from tfhe.lazy import LinearCombination, is_lazy
+from tfhe.rng import binary, expand_seed, gaussian_torus, new_seed, uniform_torus
 from tfhe.torus import Torus
 
 
@@ -8,9 +10,19 @@ class LWESecretKey:
     Learning with error secret key. It's a vector of bits of size `n`. This same key will be used
     for encryption and decryption.
     """
-    def __init__(self, n):
+    def __init__(self, n, rng=None):
         self.n = n
-        self.data = [np.random.randint(0, 2, dtype=np.uint64) for _ in range(n)]
+        self.data = binary(n, rng)
+
+    @classmethod
+    def from_bits(cls, bits):
+        """
+        Build a key from an existing vector of bits
+        """
+        key = cls.__new__(cls)
+        key.data = np.asarray(bits, dtype=np.uint64)
+        key.n = len(key.data)
+        return key
 
     def bits(self):
         return self.data
@@ -25,42 +37,93 @@ class TLWE:
         self.p = p
         self.mask = None
         self.b = None
+        # compressed form: the mask is regenerated from the seed when it's first needed
+        self.seed = None
+        self.seed_offset = 0
+
+    @property
+    def mask(self):
+        if self._mask is None and self.seed is not None:
+            self._mask = expand_seed(self.seed, self.n, self.seed_offset)
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = value
+        self.seed = None
+
+    def is_compressed(self):
+        """
+        Check if the ciphertext only holds the seed of its mask and its body
+        """
+        return self._mask is None and self.seed is not None
+
+    def compress(self):
+        """
+        Drop the expanded mask of a ciphertext encrypted with `encrypt_seeded`
+        """
+        if self.seed is None:
+            raise ValueError("only ciphertexts encrypted with a seed can be compressed")
+        self._mask = None
 
     @staticmethod
-    def randn(sigma):
+    def randn(sigma, rng=None):
         """
         Generate a random torus element based on a normal distribution N(0, sigma ^ 2).
         """
-        return Torus.from_real(np.random.randn() * sigma)
+        return Torus(gaussian_torus(None, sigma, rng))
 
     def copy(self):
         new = TLWE(self.n, self.sigma, self.p)
-        new.mask = self.mask.copy()
+        if self.is_compressed():
+            new.seed = self.seed
+            new.seed_offset = self.seed_offset
+        elif self._mask is not None:
+            # the copied mask may be edited in place, it must not be dropped by `compress`
+            new.mask = self._mask.copy()
         new.b = self.b.copy()
         return new
 
-    def random_mask(self):
+    def random_mask(self, rng=None):
         """
         Random mask used to encrypt a torus element. It's a vector of size `n` of random torus
-        elements (uniform distribution).
+        elements (uniform distribution), stored as an uint64 array.
         """
-        return [
-            Torus(t) for t in np.random.randint(0, self.q, size=self.n, dtype=np.uint64)
-        ]
+        return uniform_torus(self.n, rng)
 
-    def encrypt(self, sk, u):
+    def _encrypted_mask(self, sk):
         """
-        Encrypt a torus message `u` with a secret key `sk`
+        Dot product of the mask with the secret key, wrapping around modulo 2^64
         """
-        self.mask = self.random_mask()
         sk_bits = sk.bits()
         assert len(self.mask) == len(sk_bits) == self.n
+        return Torus(np.dot(sk_bits, self.mask))
+
+    def encrypt(self, sk, u, rng=None):
+        """
+        Encrypt a torus message `u` with a secret key `sk`
+
+        :param rng: generator used to sample the mask and the noise, defaults to the one of the
+            calling thread (see `tfhe.rng`)
+        """
+        self.mask = self.random_mask(rng)
+        encrypted_mask = self._encrypted_mask(sk)
+        e = self.randn(self.sigma, rng)
+        self.b = encrypted_mask + u + e
 
-        encrypted_mask = sum(
-            [si * ai for si, ai in zip(sk_bits, self.mask)], start=Torus(0)
-        )
-        e = self.randn(self.sigma)
+    def encrypt_seeded(self, sk, u, seed=None, rng=None):
+        """
+        Encrypt a torus message `u` with a secret key `sk` into the compressed form, where the
+        mask is derived from `seed` and only the seed and the body are kept. A seed must never
+        be reused for two ciphertexts under the same key.
+        """
+        self.seed = new_seed(rng) if seed is None else seed
+        self.seed_offset = 0
+        self._mask = None
+        encrypted_mask = self._encrypted_mask(sk)
+        e = self.randn(self.sigma, rng)
         self.b = encrypted_mask + u + e
+        self.compress()
 
     def decrypt(self, sk):
         """
@@ -68,11 +131,7 @@ class TLWE:
         """
         if self.mask is None:
             raise RuntimeError("nothing is encrypted")
-        sk_bits = sk.bits()
-        assert len(sk_bits) == len(self.mask) == self.n
-        encrypted_mask = sum(
-            [si * ai for si, ai in zip(sk_bits, self.mask)], start=Torus(0)
-        )
+        encrypted_mask = self._encrypted_mask(sk)
         u_noisy = self.b - encrypted_mask
         # unwrapping/wrapping in Torus will just remove noise
         return Torus.from_real(u_noisy.to_real(self.p))
@@ -92,13 +151,14 @@ class TLWE:
         return True
 
     def __add__(self, other):
+        if is_lazy() or isinstance(other, LinearCombination):
+            return LinearCombination.of(self) + other
         if isinstance(other, TLWE):
             if not self.have_same_param(other):
                 raise ValueError("addition need to be done on TLWE of same parameters")
-            res = self.copy()
-            for i in range(len(res.mask)):
-                res.mask[i] += other.mask[i]
-            res.b += other.b
+            res = TLWE(self.n, self.sigma, self.p)
+            res.mask = self.mask + other.mask
+            res.b = self.b + other.b
             return res
         elif isinstance(other, Torus):
             res = self.copy()
@@ -111,15 +171,16 @@ class TLWE:
         return self.__add__(other)
 
     def __sub__(self, other):
+        if is_lazy() or isinstance(other, LinearCombination):
+            return LinearCombination.of(self) - other
         if isinstance(other, TLWE):
             if not self.have_same_param(other):
                 raise ValueError(
                     "subtraction need to be done on TLWE of same parameters"
                 )
-            res = self.copy()
-            for i in range(len(res.mask)):
-                res.mask[i] -= other.mask[i]
-            res.b -= other.b
+            res = TLWE(self.n, self.sigma, self.p)
+            res.mask = self.mask - other.mask
+            res.b = self.b - other.b
             return res
         elif isinstance(other, Torus):
             res = self.copy()
@@ -129,15 +190,24 @@ class TLWE:
             raise TypeError(f"don't support addition of TLWE with {type(other)}")
 
     def __rsub__(self, other):
-        # TODO: negate first maybe?
-        pass
+        if is_lazy():
+            return LinearCombination.of(self).__rsub__(other)
+        return (-self).__add__(other)
+
+    def __neg__(self):
+        res = TLWE(self.n, self.sigma, self.p)
+        res.mask = np.negative(self.mask)
+        res.b = Torus(np.negative(self.b.data))
+        return res
 
     def __mul__(self, other):
+        if is_lazy():
+            return LinearCombination.of(self) * other
         if isinstance(other, int):
-            res = self.copy()
+            other = np.uint64(other % self.q)
+            res = TLWE(self.n, self.sigma, self.p)
+            res.mask = self.mask * other
             res.b = self.b * other
-            for i in range(len(res.mask)):
-                res.mask[i] *= other
             return res
         else:
             raise TypeError(f"don't support multiplication of TLWE with {type(other)}")
@@ -0,0 +1,288 @@
+import numbers
+
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.encoding import round_torus
+from tfhe.rng import (
+    SEED_BLOCK_WORDS,
+    expand_seed,
+    gaussian_torus,
+    new_seed,
+    seed_blocks,
+    uniform_torus,
+)
+from tfhe.torus import Torus
+
+
+def _stack_masks(ciphertexts, n):
+    """
+    Stack the masks of TLWE ciphertexts. Compressed ciphertexts sharing a seed (e.g. taken
+    from the same compressed batch) are expanded together with a single call to the generator.
+    """
+    mask = np.empty((len(ciphertexts), n), dtype=np.uint64)
+    groups = {}
+    for row, c in enumerate(ciphertexts):
+        if c.is_compressed():
+            groups.setdefault(c.seed, []).append((row, c.seed_offset))
+        else:
+            mask[row] = c.mask
+    stride = seed_blocks(n)
+    for seed, entries in groups.items():
+        rows = np.array([row for row, _ in entries])
+        offsets = np.array([offset for _, offset in entries])
+        start = offsets.min()
+        span = offsets.max() - start + stride
+        if span > 2 * stride * len(entries):
+            # too sparse, expanding the whole range would waste more than it saves
+            for row, offset in entries:
+                mask[row] = expand_seed(seed, n, offset)
+            continue
+        words = expand_seed(seed, span * SEED_BLOCK_WORDS, start)
+        index = (offsets - start)[:, None] * SEED_BLOCK_WORDS + np.arange(n)
+        mask[rows] = words[index]
+    return mask
+
+
+class TLWEBatch:
+    """
+    A batch of `m` TLWE ciphertexts with the same parameters, stored as an (m x n) uint64 mask
+    matrix and a vector of `m` uint64 bodies.
+    """
+
+    # let numpy arrays defer to the reflected operators of the batch
+    __array_ufunc__ = None
+
+    def __init__(self, n, sigma, p):
+        self.q = 2 ** 64
+        self.n = n
+        self.sigma = sigma
+        self.p = p
+        self.mask = None
+        self.b = None
+        # compressed form: row i of the mask is regenerated from the seed, starting
+        # `seed_offset + i * seed_blocks(n)` blocks into its stream
+        self.seed = None
+        self.seed_offset = 0
+
+    @property
+    def mask(self):
+        if self._mask is None and self.seed is not None:
+            stride = seed_blocks(self.n)
+            words = expand_seed(
+                self.seed, (len(self), stride * SEED_BLOCK_WORDS), self.seed_offset
+            )
+            self._mask = np.ascontiguousarray(words[:, : self.n])
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = value
+        self.seed = None
+
+    def is_compressed(self):
+        """
+        Check if the batch only holds the seed of its masks and its bodies
+        """
+        return self._mask is None and self.seed is not None
+
+    def compress(self):
+        """
+        Drop the expanded masks of a batch encrypted with `encrypt_seeded`
+        """
+        if self.seed is None:
+            raise ValueError("only ciphertexts encrypted with a seed can be compressed")
+        self._mask = None
+
+    @classmethod
+    def from_tlwes(cls, ciphertexts):
+        """
+        Stack a list of TLWE ciphertexts into a batch
+        """
+        if len(ciphertexts) == 0:
+            raise ValueError("can't build a batch from an empty list of ciphertexts")
+        first = ciphertexts[0]
+        for c in ciphertexts:
+            if not first.have_same_param(c):
+                raise ValueError("a batch must be built from TLWE of same parameters")
+        batch = cls(first.n, first.sigma, first.p)
+        batch.mask = _stack_masks(ciphertexts, first.n)
+        batch.b = np.array([c.b.data for c in ciphertexts], dtype=np.uint64)
+        return batch
+
+    def to_tlwes(self):
+        return [self[i] for i in range(len(self))]
+
+    def _from_arrays(self, mask, b):
+        new = TLWEBatch(self.n, self.sigma, self.p)
+        new.mask = mask
+        new.b = b
+        return new
+
+    def _seeded(self, b, seed_offset):
+        new = TLWEBatch(self.n, self.sigma, self.p)
+        new.b = b
+        new.seed = self.seed
+        new.seed_offset = seed_offset
+        return new
+
+    def copy(self):
+        if self.is_compressed():
+            return self._seeded(self.b.copy(), self.seed_offset)
+        # the copied masks may be edited in place, they must not be dropped by `compress`
+        return self._from_arrays(self.mask.copy(), self.b.copy())
+
+    def __len__(self):
+        if self.b is None:
+            return 0
+        return len(self.b)
+
+    def __getitem__(self, index):
+        stride = seed_blocks(self.n)
+        if isinstance(index, (int, np.integer)):
+            c = TLWE(self.n, self.sigma, self.p)
+            if self.is_compressed():
+                index = range(len(self))[index]
+                c.seed = self.seed
+                c.seed_offset = self.seed_offset + index * stride
+            else:
+                c.mask = self.mask[index].copy()
+            c.b = Torus(self.b[index])
+            return c
+        if self.is_compressed() and isinstance(index, slice) and index.step in (None, 1):
+            start = range(len(self))[index].start
+            return self._seeded(self.b[index], self.seed_offset + start * stride)
+        return self._from_arrays(self.mask[index], self.b[index])
+
+    def __setitem__(self, index, c):
+        if not isinstance(c, TLWE):
+            raise TypeError(f"can't store object of type {type(c)} in a TLWEBatch")
+        if c.n != self.n or c.p != self.p:
+            raise ValueError("TLWE parameters don't match the ones of the batch")
+        mask = self.mask
+        mask[index] = c.mask
+        # the mask doesn't match the seed anymore
+        self.mask = mask
+        self.b[index] = c.b.data
+
+    def random_mask(self, m, rng=None):
+        """
+        Random masks used to encrypt `m` torus elements, as an (m x n) uint64 matrix
+        """
+        return uniform_torus((m, self.n), rng)
+
+    def randn(self, m, rng=None):
+        """
+        Generate `m` random torus elements based on a normal distribution N(0, sigma ^ 2)
+        """
+        return gaussian_torus(m, self.sigma, rng)
+
+    def encrypt(self, sk, u, rng=None):
+        """
+        Encrypt an array of torus elements `u` (uint64 array or list of Torus) with a secret key `sk`
+        """
+        if len(u) > 0 and isinstance(u[0], Torus):
+            u = [t.data for t in u]
+        u = np.asarray(u, dtype=np.uint64)
+        self.mask = self.random_mask(len(u), rng)
+        self.b = self.mask @ sk.bits() + u + self.randn(len(u), rng)
+
+    def encrypt_seeded(self, sk, u, seed=None, rng=None):
+        """
+        Encrypt an array of torus elements `u` into the compressed form, where all the masks
+        are derived from a single `seed` and only the seed and the bodies are kept. A seed must
+        never be reused for two batches under the same key.
+        """
+        if len(u) > 0 and isinstance(u[0], Torus):
+            u = [t.data for t in u]
+        u = np.asarray(u, dtype=np.uint64)
+        self._mask = None
+        # the number of rows of the mask to expand is given by the bodies
+        self.b = np.zeros(len(u), dtype=np.uint64)
+        self.seed = new_seed(rng) if seed is None else seed
+        self.seed_offset = 0
+        self.b = self.mask @ sk.bits() + u + self.randn(len(u), rng)
+        self.compress()
+
+    def decrypt(self, sk):
+        """
+        Decrypt the batch into an uint64 array of torus elements
+        """
+        if self.mask is None:
+            raise RuntimeError("nothing is encrypted")
+        u_noisy = self.b - self.mask @ sk.bits()
+        # rounding to a multiple of 1/p will just remove noise
+        return round_torus(u_noisy, self.p)
+
+    def have_same_param(self, other):
+        """
+        Check if `self` and `other` batches have the same parameters and size
+        """
+        if not isinstance(other, TLWEBatch):
+            raise TypeError(f"can't check parameters with object of type {type(other)}")
+        if self.q != other.q:
+            return False
+        if self.p != other.p:
+            return False
+        if self.n != other.n:
+            return False
+        if len(self) != len(other):
+            return False
+        return True
+
+    def __add__(self, other):
+        if isinstance(other, TLWEBatch):
+            if not self.have_same_param(other):
+                raise ValueError(
+                    "addition need to be done on TLWEBatch of same parameters"
+                )
+            return self._from_arrays(self.mask + other.mask, self.b + other.b)
+        elif isinstance(other, Torus):
+            return self._from_arrays(self.mask.copy(), self.b + other.data)
+        elif isinstance(other, np.ndarray):
+            return self._from_arrays(self.mask.copy(), self.b + other.astype(np.uint64))
+        else:
+            raise TypeError(f"don't support addition of TLWEBatch with {type(other)}")
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if isinstance(other, TLWEBatch):
+            if not self.have_same_param(other):
+                raise ValueError(
+                    "subtraction need to be done on TLWEBatch of same parameters"
+                )
+            return self._from_arrays(self.mask - other.mask, self.b - other.b)
+        elif isinstance(other, Torus):
+            return self._from_arrays(self.mask.copy(), self.b - other.data)
+        elif isinstance(other, np.ndarray):
+            return self._from_arrays(self.mask.copy(), self.b - other.astype(np.uint64))
+        else:
+            raise TypeError(f"don't support subtraction of TLWEBatch with {type(other)}")
+
+    def __rsub__(self, other):
+        return (-self).__add__(other)
+
+    def __neg__(self):
+        return self._from_arrays(np.negative(self.mask), np.negative(self.b))
+
+    def __mul__(self, other):
+        if isinstance(other, numbers.Integral):
+            other = np.uint64(int(other) % self.q)
+            return self._from_arrays(self.mask * other, self.b * other)
+        elif isinstance(other, (list, np.ndarray)):
+            # one integer per ciphertext
+            other = np.asarray(other)
+            if other.shape != (len(self),):
+                raise ValueError(
+                    f"expected {len(self)} integers to multiply the batch with, got shape {other.shape}"
+                )
+            if other.dtype.kind not in "iu":
+                raise TypeError(f"don't support multiplication of TLWEBatch with {other.dtype}")
+            other = other.astype(np.int64).astype(np.uint64)
+            return self._from_arrays(self.mask * other[:, None], self.b * other)
+        else:
+            raise TypeError(f"don't support multiplication of TLWEBatch with {type(other)}")
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
@@ -0,0 +1,93 @@
+import numpy as np
+from tfhe.ciphertexts.trlwe import TRLWE, encrypt_zero_array
+from tfhe.gadget import decompose, gadget
+from tfhe.poly import get_fft
+
+
+def external_product_array(fourier, data, l, bg_bit):
+    """
+    External product of a TRGSW in the Fourier domain, of shape (N/2, (k+1)*l, (k+1)*limbs),
+    with TRLWE ciphertexts stored as uint64 arrays of shape (..., k+1, N)
+    """
+    big_n = data.shape[-1]
+    k1 = data.shape[-2]
+    fft = get_fft(big_n)
+    digits = decompose(data, l, bg_bit).reshape((-1, k1 * l, big_n))
+    # (k+1)*l forward transforms of small integer polynomials
+    transformed = fft.forward(digits)
+    # one small matrix product per frequency, batched over the ciphertexts
+    acc = np.matmul(transformed.transpose(2, 0, 1), fourier)
+    acc = acc.transpose(1, 2, 0).reshape(data.shape[:-2] + (k1, fft.limbs, big_n // 2))
+    return fft.backward_torus(acc)
+
+
+class TRGSW:
+    """
+    TRGSW ciphertext of an integer message `mu`. It's made of (k+1)*l TRLWE encryptions of zero,
+    the row (i, j) having mu / Bg^(j+1) added to its i-th polynomial (the body for i = k).
+    The rows are kept transformed in the Fourier domain for the external product, frequency
+    first so that the product is a matrix product per frequency.
+    """
+
+    def __init__(self, big_n, sigma, k=1, l=3, bg_bit=6):
+        """
+        :param l: number of levels of the gadget decomposition
+        :param bg_bit: log2 of the decomposition base Bg
+        """
+        self.big_n = big_n
+        self.sigma = sigma
+        self.k = k
+        self.l = l
+        self.bg_bit = bg_bit
+        self.data = None
+        self.fourier = None
+
+    def gadget(self):
+        """
+        Torus elements 1 / Bg^(j+1) for each level j
+        """
+        return gadget(self.l, self.bg_bit)
+
+    def encrypt(self, sk, mu, rng=None):
+        """
+        Encrypt an integer message `mu` with a RLWE secret key `sk`
+        """
+        if sk.big_n != self.big_n or sk.k != self.k:
+            raise ValueError("secret key parameters don't match the TRGSW ones")
+        fft = get_fft(self.big_n)
+        rows = (self.k + 1) * self.l
+        data = encrypt_zero_array(sk, rows, self.sigma, rng)
+        scaled_gadget = self.gadget() * np.uint64(mu % 2 ** 64)
+        for i in range(self.k + 1):
+            data[i * self.l : (i + 1) * self.l, i, 0] += scaled_gadget
+        self.data = data
+        fourier = fft.forward_torus(data)
+        self.fourier = np.ascontiguousarray(fourier.transpose(3, 0, 1, 2)).reshape(
+            self.big_n // 2, rows, -1
+        )
+
+    @property
+    def rows(self):
+        """
+        The (k+1)*l rows of the TRGSW as TRLWE ciphertexts
+        """
+        return [TRLWE.from_array(row, self.sigma, 2 ** 64) for row in self.data]
+
+    def external_product(self, c):
+        """
+        External product with a TRLWE ciphertext, outputs a TRLWE encrypting the product of the
+        messages
+        """
+        if not isinstance(c, TRLWE):
+            raise TypeError(f"don't support external product of TRGSW with {type(c)}")
+        if c.big_n != self.big_n or c.k != self.k:
+            raise ValueError("external product need to be done on TRLWE of same parameters")
+        if self.fourier is None:
+            raise RuntimeError("nothing is encrypted")
+        data = external_product_array(self.fourier, c.to_array(), self.l, self.bg_bit)
+        return TRLWE.from_array(data, c.sigma, c.p)
+
+    def __mul__(self, other):
+        if isinstance(other, TRLWE):
+            return self.external_product(other)
+        raise TypeError(f"don't support multiplication of TRGSW with {type(other)}")
@@ -1,7 +1,74 @@
 import numpy as np
 from tfhe.ciphertexts.ciphertext import Ciphertext
+from tfhe.lazy import LinearCombination, is_lazy
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.encoding import round_torus
+from tfhe.integer_polynomial import IntegerPolynomial
+from tfhe.rng import binary, expand_seed, gaussian_torus, new_seed, uniform_torus
+from tfhe.torus import Torus
 from tfhe.torus_polynomial import TorusPolynomial
-from tfhe.poly import polymul
+from tfhe.poly import get_fft, negacyclic_mul
+
+
+def encrypt_zero_array(sk, rows, sigma, rng=None):
+    """
+    `rows` fresh TRLWE encryptions of zero under the RLWE secret key `sk`, stored as an uint64
+    array of shape (rows, k+1, N). The products with the key are done in the Fourier domain for
+    all the rows at once.
+    """
+    fft = get_fft(sk.big_n)
+    masks = uniform_torus((rows, sk.k, sk.big_n), rng)
+    key = fft.forward(np.stack(sk.data))
+    # sum over the key polynomials of mask * key
+    acc = np.einsum("rtlf,tf->rlf", fft.forward_torus(masks), key)
+    bodies = fft.backward_torus(acc) + gaussian_torus((rows, sk.big_n), sigma, rng)
+    return np.concatenate((masks, bodies[:, None, :]), axis=1)
+
+
+def sample_extract(data, indices):
+    """
+    TLWE masks and bodies encrypting the coefficients `indices` (negative ones counting from
+    the end) of TRLWE ciphertexts stored as uint64 arrays of shape (..., k+1, N). Outputs masks
+    of shape (..., m, k*N) and bodies of shape (..., m), or (..., k*N) and (...) for a single
+    index.
+    """
+    big_n = data.shape[-1]
+    single = np.ndim(indices) == 0
+    indices = np.atleast_1d(indices)
+    if np.any((indices < -big_n) | (indices >= big_n)):
+        raise IndexError(f"coefficient indices must be in [-{big_n}, {big_n})")
+    # negative indices count from the end, like numpy ones
+    indices = indices % big_n
+    j = np.arange(big_n)
+    # coefficient i of a * s is sum_(j <= i) a_(i-j) s_j - sum_(j > i) a_(N+i-j) s_j
+    extracted = data[..., :-1, (indices[:, None] - j) % big_n]
+    np.negative(extracted, out=extracted, where=j > indices[:, None])
+    extracted = np.moveaxis(extracted, -3, -2)
+    masks = extracted.reshape(extracted.shape[:-2] + (-1,))
+    bodies = data[..., -1, indices]
+    if single:
+        return masks[..., 0, :], bodies[..., 0]
+    return masks, bodies
+
+
+def mul_batch(ciphertexts, poly):
+    """
+    Multiply a list of TRLWE ciphertexts with the same parameters by the IntegerPolynomial
+    `poly`, with a single transform of all the stacked ciphertexts
+    """
+    if not ciphertexts:
+        return []
+    first = ciphertexts[0]
+    for c in ciphertexts[1:]:
+        if not first.have_same_param(c):
+            raise ValueError("multiplication need to be done on TRLWE of same parameters")
+    if poly.big_n != first.big_n:
+        raise ValueError(
+            f"Polynomial modulus degree don't match {first.big_n} and {poly.big_n}"
+        )
+    data = poly.mul_torus(np.stack([c.to_array() for c in ciphertexts]))
+    return [TRLWE.from_array(d, first.sigma, first.p) for d in data]
 
 
 class RLWESecretKey:
@@ -10,19 +77,35 @@ class RLWESecretKey:
     for encryption and decryption.
     """
 
-    def __init__(self, big_n, k=1):
+    def __init__(self, big_n, k=1, rng=None):
         assert k > 0, "k must be positive"
         self.big_n = big_n
         self.k = k
-        self.data = [
-            np.random.randint(0, 2, size=big_n, dtype=np.uint64) for _ in range(k)
-        ]
+        self.data = list(binary((k, big_n), rng))
+
+    @classmethod
+    def from_bits(cls, bits):
+        """
+        Build a key from an existing (k x N) array of bits
+        """
+        bits = np.asarray(bits, dtype=np.uint64)
+        key = cls.__new__(cls)
+        key.k, key.big_n = bits.shape
+        key.data = list(bits)
+        return key
 
     def bits_at(self, k):
         if not 0 <= k < self.k:
             raise ValueError(f"k must be between 0 and {self.k}")
         return self.data[k]
 
+    def to_lwe_key(self):
+        """
+        LWE secret key of size k*N made of the concatenated key polynomials, which decrypts the
+        TLWE ciphertexts extracted from TRLWE ones
+        """
+        return LWESecretKey.from_bits(np.concatenate(self.data))
+
 
 class TRLWE:
     def __init__(self, big_n, sigma, p, k=1):
@@ -34,49 +117,120 @@ class TRLWE:
         self.k = k
         self.mask = None
         self.b = None
+        # compressed form: the mask is regenerated from the seed when it's first needed
+        self.seed = None
+        self.seed_offset = 0
+
+    @property
+    def mask(self):
+        if self._mask is None and self.seed is not None:
+            words = expand_seed(self.seed, (self.k, self.big_n), self.seed_offset)
+            self._mask = [TorusPolynomial.from_array(a, self.big_n) for a in words]
+        return self._mask
+
+    @mask.setter
+    def mask(self, value):
+        self._mask = value
+        self.seed = None
+
+    def is_compressed(self):
+        """
+        Check if the ciphertext only holds the seed of its mask and its body
+        """
+        return self._mask is None and self.seed is not None
+
+    def compress(self):
+        """
+        Drop the expanded mask of a ciphertext encrypted with `encrypt_seeded`
+        """
+        if self.seed is None:
+            raise ValueError("only ciphertexts encrypted with a seed can be compressed")
+        self._mask = None
 
     @staticmethod
-    def randn(big_n, sigma):
+    def randn(big_n, sigma, rng=None):
         """
         Generate a random torus polynomial element based on a normal distribution N(0, sigma ^ 2).
         """
-        return TorusPolynomial.from_real(
-            [np.random.randn() * sigma for _ in range(big_n)], big_n=big_n
-        )
+        return TorusPolynomial.from_array(gaussian_torus(big_n, sigma, rng), big_n)
 
     def copy(self):
         new = TRLWE(self.big_n, self.sigma, self.p, self.k)
-        new.mask = self.mask.copy()
+        if self.is_compressed():
+            new.seed = self.seed
+            new.seed_offset = self.seed_offset
+        elif self._mask is not None:
+            # the copied mask may be edited in place, it must not be dropped by `compress`
+            new.mask = [m.copy() for m in self._mask]
         new.b = self.b.copy()
         return new
 
-    def random_mask(self):
+    def to_array(self):
+        """
+        Stack the mask and body polynomials into a (k+1) x N uint64 array
+        """
+        return np.stack([m.data for m in self.mask] + [self.b.data])
+
+    @classmethod
+    def from_array(cls, data, sigma, p):
+        """
+        Build a TRLWE ciphertext from a (k+1) x N uint64 array of mask and body polynomials,
+        the polynomials are views of `data`
+        """
+        k = data.shape[0] - 1
+        big_n = data.shape[1]
+        c = cls(big_n, sigma, p, k)
+        c.mask = [TorusPolynomial.from_array(a, big_n) for a in data[:k]]
+        c.b = TorusPolynomial.from_array(data[k], big_n)
+        return c
+
+    def random_mask(self, rng=None):
         """
         Random mask used to encrypt a torus element. It's a vector of size `k` of random torus polynomial
         elements (uniform distribution).
         """
         return [
-            TorusPolynomial(
-                np.random.randint(0, self.q, size=self.big_n, dtype=np.uint64),
-                big_n=self.big_n,
-            )
-            for _ in range(self.k)
+            TorusPolynomial.from_array(a, self.big_n)
+            for a in uniform_torus((self.k, self.big_n), rng)
         ]
 
-    def encrypt(self, sk, u):
+    def _encrypted_mask(self, sk):
         """
-        Encrypt a torus polynomial message `u` with a secret key `sk`
+        Sum of the products of the mask polynomials with the secret key polynomials
         """
-        self.mask = self.random_mask()
         encrypted_mask = TorusPolynomial([0], big_n=self.big_n)
         for i in range(self.k):
             sk_bits = sk.bits_at(i)
             ak = self.mask[i].data
-            coeffs = polymul(sk_bits, ak)
-            encrypted_mask += TorusPolynomial(coeffs, big_n=self.big_n)
+            encrypted_mask.data += negacyclic_mul(sk_bits, ak, self.big_n)
+        return encrypted_mask
 
-        e = self.randn(self.big_n, self.sigma)
+    def encrypt(self, sk, u, rng=None):
+        """
+        Encrypt a torus polynomial message `u` with a secret key `sk`
+
+        :param rng: generator used to sample the mask and the noise, defaults to the one of the
+            calling thread (see `tfhe.rng`)
+        """
+        self.mask = self.random_mask(rng)
+        encrypted_mask = self._encrypted_mask(sk)
+
+        e = self.randn(self.big_n, self.sigma, rng)
+        self.b = encrypted_mask + u + e
+
+    def encrypt_seeded(self, sk, u, seed=None, rng=None):
+        """
+        Encrypt a torus polynomial message `u` with a secret key `sk` into the compressed form,
+        where the mask is derived from `seed` and only the seed and the body are kept. A seed
+        must never be reused for two ciphertexts under the same key.
+        """
+        self.seed = new_seed(rng) if seed is None else seed
+        self.seed_offset = 0
+        self._mask = None
+        encrypted_mask = self._encrypted_mask(sk)
+        e = self.randn(self.big_n, self.sigma, rng)
         self.b = encrypted_mask + u + e
+        self.compress()
 
     def decrypt(self, sk):
         """
@@ -85,16 +239,36 @@ class TRLWE:
         if self.mask is None:
             raise RuntimeError("nothing is encrypted")
 
-        encrypted_mask = TorusPolynomial([0], big_n=self.big_n)
-        for i in range(self.k):
-            sk_bits = sk.bits_at(i)
-            ak = self.mask[i].data
-            coeffs = polymul(sk_bits, ak)
-            encrypted_mask += TorusPolynomial(coeffs, big_n=self.big_n)
+        encrypted_mask = self._encrypted_mask(sk)
 
         u_noisy = self.b - encrypted_mask
         # unwrapping/wrapping in Torus will just remove noise
-        return TorusPolynomial.from_real(u_noisy.to_real(self.p), big_n=self.big_n)
+        return TorusPolynomial.from_array(round_torus(u_noisy.data, self.p), self.big_n)
+
+    def extract(self, indices):
+        """
+        Sample extraction: TLWE encryption of the coefficient `indices` of the message, or a
+        TLWEBatch for a sequence of indices. The extracted ciphertexts are under the key
+        `sk.to_lwe_key()`, of size k*N.
+        """
+        if self.b is None:
+            raise RuntimeError("nothing is encrypted")
+        masks, bodies = sample_extract(self.to_array(), indices)
+        if np.ndim(indices) == 0:
+            res = TLWE(self.k * self.big_n, self.sigma, self.p)
+            res.mask = masks
+            res.b = Torus(bodies)
+        else:
+            res = TLWEBatch(self.k * self.big_n, self.sigma, self.p)
+            res.mask = masks
+            res.b = bodies
+        return res
+
+    def extract_all(self):
+        """
+        Sample extraction of all the N coefficients into a TLWEBatch
+        """
+        return self.extract(np.arange(self.big_n))
 
     def have_same_param(self, other):
         """
@@ -113,12 +287,13 @@ class TRLWE:
         return True
 
     def __add__(self, other):
+        if is_lazy() or isinstance(other, LinearCombination):
+            return LinearCombination.of(self) + other
         if isinstance(other, TRLWE):
             if not self.have_same_param(other):
                 raise ValueError("addition need to be done on TRLWE of same parameters")
-            res = self.copy()
-            for i in range(self.k):
-                res.mask[i] = self.mask[i] + other.mask[i]
+            res = TRLWE(self.big_n, self.sigma, self.p, self.k)
+            res.mask = [a + b for a, b in zip(self.mask, other.mask)]
             res.b = self.b + other.b
             return res
         elif isinstance(other, TorusPolynomial):
@@ -132,15 +307,16 @@ class TRLWE:
         return self.__add__(other)
 
     def __sub__(self, other):
+        if is_lazy() or isinstance(other, LinearCombination):
+            return LinearCombination.of(self) - other
         if isinstance(other, TRLWE):
             if not self.have_same_param(other):
                 raise ValueError(
                     "subtraction need to be done on TRLWE of same parameters"
                 )
-            res = self.copy()
-            for i in range(self.k):
-                res.mask[i] -= other.mask[i]
-            res.b -= other.b
+            res = TRLWE(self.big_n, self.sigma, self.p, self.k)
+            res.mask = [a - b for a, b in zip(self.mask, other.mask)]
+            res.b = self.b - other.b
             return res
         elif isinstance(other, TorusPolynomial):
             res = self.copy()
@@ -150,16 +326,58 @@ class TRLWE:
             raise TypeError(f"don't support addition of TRLWE with {type(other)}")
 
     def __rsub__(self, other):
-        # TODO: negate first maybe?
-        pass
+        if is_lazy():
+            return LinearCombination.of(self).__rsub__(other)
+        return (-self).__add__(other)
+
+    def __neg__(self):
+        return TRLWE.from_array(np.negative(self.to_array()), self.sigma, self.p)
+
+    def _rotated(self, method, a, out):
+        if out is None:
+            out = TRLWE(self.big_n, self.sigma, self.p, self.k)
+            out.mask = [getattr(m, method)(a) for m in self.mask]
+            out.b = getattr(self.b, method)(a)
+            return out
+        if not self.have_same_param(out):
+            raise ValueError("rotation output must be a TRLWE of same parameters")
+        for m, o in zip(self.mask, out.mask):
+            getattr(m, method)(a, out=o)
+        getattr(self.b, method)(a, out=out.b)
+        # the mask doesn't match the seed anymore
+        out.seed = None
+        return out
+
+    def rotate(self, a, out=None):
+        """
+        Multiply the encrypted message by the monomial X^a, in O(N) per polynomial
+
+        :param out: TRLWE receiving the result, it may be `self` for an in-place rotation
+        """
+        return self._rotated("rotate", a, out)
+
+    def rotate_sub(self, a, out=None):
+        """
+        Multiply the encrypted message by X^a - 1, in O(N) per polynomial and without temporaries
+
+        :param out: TRLWE receiving the result, it may be `self`
+        """
+        return self._rotated("rotate_sub", a, out)
 
     def __mul__(self, other):
+        if is_lazy() and not isinstance(other, IntegerPolynomial):
+            return LinearCombination.of(self) * other
         if isinstance(other, int):
-            res = self.copy()
+            res = TRLWE(self.big_n, self.sigma, self.p, self.k)
+            res.mask = [a * other for a in self.mask]
             res.b = self.b * other
-            for i in range(len(res.mask)):
-                res.mask[i] *= other
             return res
+        elif isinstance(other, IntegerPolynomial):
+            if other.big_n != self.big_n:
+                raise ValueError(
+                    f"Polynomial modulus degree don't match {self.big_n} and {other.big_n}"
+                )
+            return TRLWE.from_array(other.mul_torus(self.to_array()), self.sigma, self.p)
         else:
             raise TypeError(f"don't support multiplication of TRLWE with {type(other)}")
 
@@ -0,0 +1,300 @@
+"""
+Boolean circuits traced into a graph and compiled into batched bootstrapping levels.
+
+A `Circuit` records its inputs, linear operations (sums, integer multiples, torus constants)
+and bootstrappings as the nodes of a DAG, through `Wire` objects that support the usual
+operators and the gates of `tfhe.gates`. Compiling the circuit fuses every chain of linear
+operations into a single affine form over the inputs and the bootstrapping outputs, and sorts the
+bootstrappings into levels: a bootstrapping only depends on the outputs of the previous levels.
+A level is then evaluated as one weight matrix product over the values computed so far, followed
+by one batched bootstrapping, optionally split over the workers of an executor.
+
+A process pool never receives the cloud key itself: the key must be saved in a
+`tfhe.keystore.KeyStore` (see `tfhe.gates.CloudKey.save`), every worker maps it once, e.g.
+with `ProcessPoolExecutor(initializer=init_worker, initargs=ck.location)`, and only the
+ciphertexts and the key location are sent with every chunk.
+"""
+import numbers
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.encoding import encode_int
+from tfhe.gates import GATES, P, CloudKey
+from tfhe.keystore import KeyStore
+from tfhe.torus import Torus
+
+INPUT = "input"
+LINEAR = "linear"
+BOOTSTRAP = "bootstrap"
+
+
+# cloud keys mapped by the current process, by (store path, name)
+_worker_keys = {}
+
+
+def _worker_key(path, name):
+    if (path, name) not in _worker_keys:
+        _worker_keys[(path, name)] = CloudKey.load(KeyStore(path), name)
+    return _worker_keys[(path, name)]
+
+
+def init_worker(path, name):
+    """
+    Initializer of a process pool worker, maps the cloud key `name` of the store at `path`
+    """
+    _worker_key(path, name)
+
+
+def _bootstrap_stored(path, name, batch):
+    return _worker_key(path, name).bootstrap(batch)
+
+
+def _constant(value):
+    """
+    Torus constant (uint64) from a Torus, or from an integer number of 1/8 like in `tfhe.gates`
+    """
+    if isinstance(value, Torus):
+        return value.data
+    return encode_int(value % P, P)
+
+
+class Wire:
+    """
+    Value of a node of a circuit, combining wires creates new linear nodes
+    """
+
+    def __init__(self, circuit, index):
+        self.circuit = circuit
+        self.index = index
+
+    def _linear(self, terms, constant=0):
+        return self.circuit.linear(terms, constant)
+
+    def __add__(self, other):
+        if isinstance(other, Wire):
+            return self._linear([(self, 1), (other, 1)])
+        return self._linear([(self, 1)], other)
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        if isinstance(other, Wire):
+            return self._linear([(self, 1), (other, -1)])
+        if isinstance(other, Torus):
+            return self._linear([(self, 1)], Torus(-other.data))
+        return self._linear([(self, 1)], -other)
+
+    def __rsub__(self, other):
+        return self._linear([(self, -1)], other)
+
+    def __neg__(self):
+        return self._linear([(self, -1)])
+
+    def __mul__(self, other):
+        if not isinstance(other, numbers.Integral):
+            raise TypeError(f"don't support multiplication of Wire with {type(other)}")
+        return self._linear([(self, int(other))])
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+
+class Circuit:
+    def __init__(self):
+        # ("input",), ("linear", [(node, coefficient)], constant) or ("bootstrap", node)
+        self.nodes = []
+        self.outputs = []
+
+    def _add(self, node):
+        self.nodes.append(node)
+        return Wire(self, len(self.nodes) - 1)
+
+    def _check(self, wire):
+        if not isinstance(wire, Wire) or wire.circuit is not self:
+            raise ValueError("wires must come from the same circuit")
+        return wire.index
+
+    def input(self):
+        return self._add((INPUT,))
+
+    def linear(self, terms, constant=0):
+        """
+        Wire of sum(coefficient * wire) + constant, the constant being a Torus or a number of 1/8
+        """
+        terms = [(self._check(w), int(coefficient)) for w, coefficient in terms]
+        return self._add((LINEAR, terms, _constant(constant)))
+
+    def bootstrap(self, wire):
+        """
+        Gate bootstrapping of `wire`, see `tfhe.gates.CloudKey.bootstrap`
+        """
+        return self._add((BOOTSTRAP, self._check(wire)))
+
+    def output(self, *wires):
+        for wire in wires:
+            self.outputs.append(self._check(wire))
+
+    def gate(self, name, a, b):
+        if name not in GATES:
+            raise ValueError(f"unknown gate {name}")
+        constant, ca, cb = GATES[name]
+        return self.bootstrap(self.linear([(a, ca), (b, cb)], constant))
+
+    def nand(self, a, b):
+        return self.gate("nand", a, b)
+
+    def and_(self, a, b):
+        return self.gate("and", a, b)
+
+    def or_(self, a, b):
+        return self.gate("or", a, b)
+
+    def nor(self, a, b):
+        return self.gate("nor", a, b)
+
+    def xor(self, a, b):
+        return self.gate("xor", a, b)
+
+    def xnor(self, a, b):
+        return self.gate("xnor", a, b)
+
+    def not_(self, a):
+        return -a
+
+    def mux(self, s, a, b):
+        left = self.bootstrap(self.linear([(s, 1), (a, 1)], -1))
+        right = self.bootstrap(self.linear([(b, 1), (s, -1)], -1))
+        return self.linear([(left, 1), (right, 1)], 1)
+
+    def compile(self):
+        """
+        Fuse the linear operations and sort the bootstrappings into levels, see `Program`
+        """
+        return Program(self)
+
+
+class Program:
+    """
+    Compiled circuit. The values (inputs, then bootstrapping outputs level by level) are rows of
+    a single mask array and body vector, and every level and the outputs are given by an integer
+    weight matrix over the previous rows plus a vector of torus constants.
+    """
+
+    def __init__(self, circuit):
+        if not circuit.outputs:
+            raise ValueError("the circuit has no output")
+        # affine form of every node over the source nodes (inputs and bootstrappings)
+        forms = []
+        levels = {}
+        for i, node in enumerate(circuit.nodes):
+            if node[0] == INPUT:
+                forms.append(({i: 1}, 0))
+                levels[i] = 0
+            elif node[0] == BOOTSTRAP:
+                forms.append(({i: 1}, 0))
+                levels[i] = 1 + max((levels[s] for s in forms[node[1]][0]), default=0)
+            else:
+                terms, constant = {}, int(node[2])
+                for operand, coefficient in node[1]:
+                    operand_terms, operand_constant = forms[operand]
+                    for s, c in operand_terms.items():
+                        terms[s] = terms.get(s, 0) + coefficient * c
+                    constant += coefficient * operand_constant
+                forms.append(({s: c for s, c in terms.items() if c}, constant % 2 ** 64))
+        self.n_inputs = sum(1 for node in circuit.nodes if node[0] == INPUT)
+        self.n_levels = max(levels.values(), default=0)
+        # row of every source node in the value arrays
+        order = sorted(levels, key=lambda s: (levels[s], s))
+        self._rows = {s: r for r, s in enumerate(order)}
+        self.levels = []
+        used = self.n_inputs
+        for level in range(1, self.n_levels + 1):
+            nodes = [s for s in order if levels[s] == level]
+            self.levels.append(self._weights([forms[circuit.nodes[s][1]] for s in nodes], used))
+            used += len(nodes)
+        self.outputs = self._weights([forms[o] for o in circuit.outputs], used)
+        self.timings = []
+
+    def _weights(self, forms, columns):
+        weights = np.zeros((len(forms), columns), dtype=np.int64)
+        constants = np.empty(len(forms), dtype=np.uint64)
+        for i, (terms, constant) in enumerate(forms):
+            for s, c in terms.items():
+                weights[i, self._rows[s]] = c
+            constants[i] = constant
+        return weights, constants
+
+    @property
+    def n_bootstraps(self):
+        return sum(len(weights) for weights, _ in self.levels)
+
+    @staticmethod
+    def _combine(weights, constants, mask, b):
+        # wrapping uint64 products give the right torus elements for negative weights too
+        weights = weights.astype(np.uint64)
+        used = weights.shape[1]
+        return weights @ mask[:used], weights @ b[:used] + constants
+
+    @staticmethod
+    def _bootstrap(ck, batch, executor, chunks):
+        if executor is None or len(batch) < 2:
+            return ck.bootstrap(batch)
+        bounds = np.linspace(0, len(batch), min(chunks, len(batch)) + 1).astype(int)
+        if isinstance(executor, ProcessPoolExecutor):
+            # the workers map the keys from the store instead of receiving a copy
+            futures = [
+                executor.submit(_bootstrap_stored, *ck.location, batch[start:stop])
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+        else:
+            futures = [
+                executor.submit(ck.bootstrap, batch[start:stop])
+                for start, stop in zip(bounds[:-1], bounds[1:])
+            ]
+        results = [f.result() for f in futures]
+        res = TLWEBatch(results[0].n, results[0].sigma, results[0].p)
+        res.mask = np.concatenate([r.mask for r in results])
+        res.b = np.concatenate([r.b for r in results])
+        return res
+
+    def run(self, ck, inputs, executor=None, chunks=4):
+        """
+        Evaluate the circuit with the `tfhe.gates.CloudKey` `ck` on a TLWEBatch (or a list of
+        TLWE) holding one ciphertext per input, outputs a TLWEBatch with one ciphertext per
+        output. The duration of every level is recorded in `timings`.
+
+        :param executor: optional `concurrent.futures` executor, every level is then split into
+            `chunks` batched bootstrappings submitted to it. With a process pool, `ck` must be
+            saved in or loaded from a KeyStore, and the workers map it from there.
+        """
+        if isinstance(executor, ProcessPoolExecutor) and getattr(ck, "location", None) is None:
+            raise ValueError("the cloud key must be saved in a KeyStore to run in a process pool")
+        if not isinstance(inputs, TLWEBatch):
+            inputs = TLWEBatch.from_tlwes(inputs)
+        if len(inputs) != self.n_inputs:
+            raise ValueError(f"expected {self.n_inputs} inputs, got {len(inputs)}")
+        n = inputs.n
+        total = self.n_inputs + self.n_bootstraps
+        mask = np.empty((total, n), dtype=np.uint64)
+        b = np.empty(total, dtype=np.uint64)
+        mask[: self.n_inputs] = inputs.mask
+        b[: self.n_inputs] = inputs.b
+        used = self.n_inputs
+        self.timings = []
+        for level, (weights, constants) in enumerate(self.levels, 1):
+            start = time.perf_counter()
+            batch = TLWEBatch(n, inputs.sigma, inputs.p)
+            batch.mask, batch.b = self._combine(weights, constants, mask, b)
+            res = self._bootstrap(ck, batch, executor, chunks)
+            mask[used : used + len(res)] = res.mask
+            b[used : used + len(res)] = res.b
+            used += len(res)
+            self.timings.append(
+                {"level": level, "bootstraps": len(res), "seconds": time.perf_counter() - start}
+            )
+        res = TLWEBatch(n, inputs.sigma, inputs.p)
+        res.mask, res.b = self._combine(*self.outputs, mask, b)
+        return res
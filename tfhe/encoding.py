@@ -0,0 +1,290 @@
+"""
+Vectorized conversions between plaintext values and torus elements.
+
+Torus elements are stored as uint64 arrays, the same representation used by `Torus.data`
+and `TorusPolynomial.data`. When `p` is a power of two, encoding and decoding integers are
+exact bit shifts. Out of range inputs are handled according to a policy:
+
+- "wrap": silently reduce them into the range
+- "raise": raise a ValueError
+- "count": reduce them into the range and return their number along with the result
+
+`IntEncoder`, `RealEncoder` and `FloatEncoder` precompute the constants for a given `p` (and
+data range) and should be preferred when encoding many times with the same parameters.
+"""
+from abc import ABC, abstractmethod
+
+import numpy as np
+from tfhe.torus import Torus
+
+Q = 2 ** 64
+
+POLICIES = ("wrap", "raise", "count")
+
+
+def _log2(p):
+    """
+    Returns log2(p) if p is a power of two, None otherwise
+    """
+    p = int(p)
+    if p > 0 and p & (p - 1) == 0:
+        return p.bit_length() - 1
+    return None
+
+
+def _check_policy(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"policy must be one of {POLICIES}, got {policy}")
+
+
+def _apply_policy(result, out_of_range, policy, range_repr):
+    count = int(np.count_nonzero(out_of_range))
+    if policy == "raise" and count > 0:
+        raise ValueError(f"{count} values are not in the range {range_repr}")
+    if policy == "count":
+        return result, count
+    return result
+
+
+def check_data_range(data_range):
+    if not isinstance(data_range, (list, tuple)):
+        raise TypeError("data_range must be a tuple or list")
+    if len(data_range) != 2:
+        raise ValueError("data_range must be a tuple or list of length 2")
+    if data_range[0] >= data_range[1]:
+        raise ValueError("data_range[0] must be lower than data_range[1]")
+    return data_range[0], data_range[1]
+
+
+class Encoder(ABC):
+    """
+    Base class of the encoders. An encoder maps plaintext values to integers in [0, p) and then
+    to torus elements using log2(p) bits of precision. All the constants depending on `p` are
+    computed once when the encoder is built, so it can be reused (and pickled) cheaply.
+    """
+
+    def __init__(self, p, policy="wrap"):
+        _check_policy(policy)
+        self.p = p
+        self.policy = policy
+        log2_p = _log2(p)
+        self._pow2 = log2_p is not None
+        if self._pow2:
+            shift = 64 - log2_p
+            self._shift = np.uint64(shift)
+            self._half = np.uint64(1 << (shift - 1)) if shift > 0 else np.uint64(0)
+            self._mask = np.uint64(p - 1)
+        self._scale = Q / p
+
+    def _int_to_torus(self, values):
+        """
+        Encode integers already reduced in [0, p)
+        """
+        if self._pow2:
+            return values.astype(np.uint64) << self._shift
+        return np.uint64(values * self._scale % Q)
+
+    def _torus_to_int(self, data):
+        data = np.asarray(data, dtype=np.uint64)
+        if self._pow2:
+            return ((data + self._half) >> self._shift) & self._mask
+        return np.uint64(np.round(data / self._scale) % self.p)
+
+    @abstractmethod
+    def _to_int(self, values):
+        """
+        Map plaintext values to integers in [0, p), along with a mask of out of range values
+        """
+
+    @abstractmethod
+    def _from_int(self, int_values):
+        """
+        Map integers in [0, p) back to plaintext values
+        """
+
+    def encode(self, values):
+        """
+        Encode an array of plaintext values into an uint64 array of torus elements
+        """
+        int_values, out_of_range = self._to_int(values)
+        return _apply_policy(
+            self._int_to_torus(int_values), out_of_range, self.policy, self.range_repr()
+        )
+
+    def decode(self, data):
+        """
+        Decode torus elements into plaintext values. `data` can be an uint64 array, a Torus or
+        a TorusPolynomial
+        """
+        # imported here since tfhe.torus_polynomial depends on this module
+        from tfhe.torus_polynomial import TorusPolynomial
+
+        if isinstance(data, (Torus, TorusPolynomial)):
+            data = data.data
+        return self._from_int(self._torus_to_int(data))
+
+    def round(self, data):
+        """
+        Round torus elements to the closest encoded value, which removes the noise of a
+        decrypted message
+        """
+        return self._int_to_torus(self._torus_to_int(data))
+
+    @abstractmethod
+    def range_repr(self):
+        """
+        Description of the range of the plaintext values, used in error messages
+        """
+
+    def torus(self, value):
+        """
+        Encode a single plaintext value into a Torus element, ready to be encrypted as a TLWE
+        """
+        return Torus(np.uint64(self._single(self.encode(value))))
+
+    def polynomial(self, values, big_n=1024):
+        """
+        Encode plaintext values as the coefficients of a TorusPolynomial, ready to be encrypted
+        as a TRLWE
+        """
+        # imported here since tfhe.torus_polynomial depends on this module
+        from tfhe.torus_polynomial import TorusPolynomial
+
+        return TorusPolynomial(self._single(self.encode(np.atleast_1d(values))), big_n)
+
+    def _single(self, encoded):
+        # the "count" policy returns the number of out of range values along the data
+        if self.policy == "count":
+            return encoded[0]
+        return encoded
+
+
+class IntEncoder(Encoder):
+    """
+    Encode integers in [0, p)
+    """
+
+    def _to_int(self, values):
+        values = np.asarray(values)
+        if values.dtype.kind not in "iu":
+            values = values.astype(np.int64)
+        out_of_range = values < 0
+        if self.p <= np.iinfo(values.dtype).max:
+            out_of_range |= values >= self.p
+        if not self._pow2:
+            values = values % self.p
+        # for powers of two, the shift drops the bits above log2(p)
+        return values, out_of_range
+
+    def _from_int(self, int_values):
+        return int_values
+
+    def range_repr(self):
+        return f"[0, {self.p})"
+
+
+class RealEncoder(Encoder):
+    """
+    Encode real numbers in [0, 1)
+    """
+
+    def encode(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        out_of_range = (values < 0) | (values >= 1)
+        frac = values - np.round(values)
+        # frac is in [-0.5, 0.5], two's complement takes care of negative values. 1/2 is the
+        # same torus element as -1/2, wrapping it keeps it in the int64 range.
+        scaled = np.round(frac * 2.0 ** 64)
+        scaled = np.where(scaled >= 2.0 ** 63, scaled - 2.0 ** 64, scaled)
+        result = scaled.astype(np.int64).astype(np.uint64)
+        return _apply_policy(result, out_of_range, self.policy, self.range_repr())
+
+    def _to_int(self, values):
+        # `encode` keeps the 64 bits of precision instead of rounding to a multiple of 1/p
+        values = np.asarray(values, dtype=np.float64)
+        out_of_range = (values < 0) | (values >= 1)
+        return np.round((values % 1) * self.p) % self.p, out_of_range
+
+    def _from_int(self, int_values):
+        return int_values / self.p
+
+    def range_repr(self):
+        return "[0, 1)"
+
+
+class FloatEncoder(Encoder):
+    """
+    Encode float numbers in [data_range[0], data_range[1])
+    """
+
+    def __init__(self, p, data_range, policy="wrap"):
+        super().__init__(p, policy)
+        self.low, self.high = check_data_range(data_range)
+        self.delta = self.high - self.low
+        self.step = self.delta / p
+        self._inv_step = p / self.delta
+
+    def _to_int(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        out_of_range = (values < self.low) | (values >= self.high)
+        int_values = np.round(((values - self.low) % self.delta) * self._inv_step) % self.p
+        return int_values, out_of_range
+
+    def _from_int(self, int_values):
+        return int_values * self.step + self.low
+
+    def range_repr(self):
+        return f"[{self.low}, {self.high})"
+
+
+def encode_int(values, p, policy="wrap"):
+    """
+    Encode integers in [0, p) into torus elements using log2(p) bits of precision
+    """
+    return IntEncoder(p, policy).encode(values)
+
+
+def decode_int(data, p):
+    """
+    Decode torus elements into integers in [0, p) using log2(p) bits of precision
+    """
+    return IntEncoder(p).decode(data)
+
+
+def encode_real(values, policy="wrap"):
+    """
+    Encode real numbers in [0, 1) into torus elements
+    """
+    # the precision only matters for decoding
+    return RealEncoder(Q, policy).encode(values)
+
+
+def decode_real(data, p):
+    """
+    Decode torus elements into real numbers in [0, 1) using log2(p) bits of precision
+    """
+    return RealEncoder(p).decode(data)
+
+
+def encode_float(values, p, data_range, policy="wrap"):
+    """
+    Encode float numbers in [data_range[0], data_range[1]) into torus elements using
+    log2(p) bits of precision
+    """
+    return FloatEncoder(p, data_range, policy).encode(values)
+
+
+def decode_float(data, p, data_range):
+    """
+    Decode torus elements into float numbers in [data_range[0], data_range[1]) using
+    log2(p) bits of precision
+    """
+    return FloatEncoder(p, data_range).decode(data)
+
+
+def round_torus(data, p):
+    """
+    Round torus elements to the closest multiple of 1/p, which removes the noise of a decrypted
+    message encoded with log2(p) bits of precision
+    """
+    return IntEncoder(p).round(data)
@@ -0,0 +1,58 @@
+"""
+Gadget decomposition of torus elements in base Bg = 2^bg_bit over `l` levels.
+
+Level j (starting from 0) has weight 1 / Bg^(j+1) and its digits are signed, in [-Bg/2, Bg/2).
+Instead of propagating carries level by level, Bg/2 is added at every level (plus half of the
+first dropped bit for rounding) before extracting the digits as plain bit fields, then removed
+from each digit: a single vectorized pass with no branching.
+"""
+import numpy as np
+
+
+def gadget(l, bg_bit):
+    """
+    Torus elements (uint64) 1 / Bg^(j+1) for each level j
+    """
+    if l * bg_bit > 64:
+        raise ValueError("l * bg_bit must be at most 64")
+    return np.array([1 << (64 - bg_bit * (j + 1)) for j in range(l)], dtype=np.uint64)
+
+
+def _offset(l, bg_bit):
+    half = 1 << (bg_bit - 1)
+    offset = sum(half << (64 - bg_bit * (j + 1)) for j in range(l))
+    precision = l * bg_bit
+    if precision < 64:
+        offset += 1 << (63 - precision)
+    return np.uint64(offset % 2 ** 64)
+
+
+def decompose(data, l, bg_bit):
+    """
+    Decompose torus elements of shape (..., N) into signed digits of shape (..., l, N) (int64).
+
+    :param data: uint64 array, for instance the (k+1) x N block of a TRLWE or a stack of them,
+        a TorusPolynomial or a TRLWE
+    """
+    if hasattr(data, "to_array"):
+        data = data.to_array()
+    elif hasattr(data, "data"):
+        data = data.data
+    data = np.asarray(data, dtype=np.uint64)
+    if l * bg_bit > 64:
+        raise ValueError("l * bg_bit must be at most 64")
+    shifts = np.uint64(64) - np.arange(1, l + 1, dtype=np.uint64) * np.uint64(bg_bit)
+    shifted = (data + _offset(l, bg_bit))[..., None, :] >> shifts[:, None]
+    digits = (shifted & np.uint64((1 << bg_bit) - 1)).astype(np.int64)
+    digits -= 1 << (bg_bit - 1)
+    return digits
+
+
+def recompose(digits, l, bg_bit):
+    """
+    Inverse of `decompose` up to the rounding error, outputs uint64 torus elements of shape (..., N)
+    """
+    weights = gadget(l, bg_bit)
+    return (np.asarray(digits).astype(np.uint64) * weights[:, None]).sum(
+        axis=-2, dtype=np.uint64
+    )
@@ -0,0 +1,216 @@
+"""
+Boolean gates over TLWE ciphertexts with gate bootstrapping.
+
+A bit is encrypted as the torus element 1/8 (true) or -1/8 (false). A binary gate is a linear
+combination of its inputs, whose phase then falls in (0, 1/2) exactly when the output is true,
+followed by a bootstrapping with the constant test polynomial 1/8 (which maps the phase back to
++-1/8 with a fresh noise) and a key switch back to the input key. NOT is only a negation.
+
+Every gate accepts TLWE ciphertexts or TLWEBatch ciphertexts, in which case a whole layer of
+independent gates is evaluated with a single batched bootstrapping. `apply` evaluates a layer
+mixing several kinds of gates.
+"""
+import numpy as np
+from tfhe.bootstrap import BootstrappingKey
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey
+from tfhe.encoding import encode_int
+from tfhe.keyswitch import KeySwitchingKey
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+P = 8
+
+# constant (in multiples of 1/8) and input coefficients of the linear combination of each gate
+GATES = {
+    "nand": (1, -1, -1),
+    "and": (-1, 1, 1),
+    "or": (1, 1, 1),
+    "nor": (-1, -1, -1),
+    "xor": (2, 2, 2),
+    "xnor": (-2, -2, -2),
+}
+
+
+class SecretKey:
+    """
+    LWE secret key encrypting the bits, and RLWE secret key used to bootstrap them
+    """
+
+    def __init__(self, n=630, big_n=1024, k=1, sigma=2 ** -15, rng=None):
+        """
+        :param sigma: standard deviation of the noise of the encrypted bits
+        """
+        self.lwe_key = LWESecretKey(n, rng)
+        self.rlwe_key = RLWESecretKey(big_n, k, rng)
+        self.sigma = sigma
+
+    def encrypt(self, bits, rng=None):
+        """
+        Encrypt a single bit into a TLWE, or a sequence of bits into a TLWEBatch
+        """
+        if np.ndim(bits) == 0:
+            c = TLWE(self.lwe_key.n, self.sigma, P)
+            c.encrypt(self.lwe_key, Torus.from_int(1 if bits else P - 1, P), rng)
+            return c
+        c = TLWEBatch(self.lwe_key.n, self.sigma, P)
+        messages = np.where(np.asarray(bits, dtype=bool), 1, P - 1)
+        c.encrypt(self.lwe_key, encode_int(messages, P), rng)
+        return c
+
+    def decrypt(self, c):
+        """
+        Decrypt a TLWE into a bool, or a TLWEBatch into an array of bools
+        """
+        if isinstance(c, TLWEBatch):
+            phase = c.b - c.mask @ self.lwe_key.bits()
+        else:
+            phase = (c.b - Torus(np.dot(self.lwe_key.bits(), c.mask))).data
+        # true bits are in (0, 1/2)
+        positive = (np.asarray(phase, dtype=np.uint64) >> np.uint64(63)) == 0
+        return bool(positive) if np.ndim(positive) == 0 else positive
+
+
+class CloudKey:
+    """
+    Bootstrapping and key switching keys needed to evaluate gates
+    """
+
+    def __init__(
+        self,
+        secret_key,
+        bsk_sigma=2 ** -25,
+        l=3,
+        bg_bit=7,
+        ksk_sigma=2 ** -15,
+        base_bit=2,
+        t=8,
+        rng=None,
+    ):
+        lwe_key, rlwe_key = secret_key.lwe_key, secret_key.rlwe_key
+        self.bsk = BootstrappingKey(lwe_key, rlwe_key, bsk_sigma, l, bg_bit, rng)
+        self.ksk = KeySwitchingKey(
+            rlwe_key.to_lwe_key(), lwe_key, ksk_sigma, base_bit, t, rng=rng
+        )
+        self.test_vector = self._test_vector(self.bsk.big_n)
+        # (store path, name) of the keys once saved in or loaded from a KeyStore
+        self.location = None
+
+    @staticmethod
+    def _test_vector(big_n):
+        return TorusPolynomial.from_array(
+            np.full(big_n, encode_int(1, P), dtype=np.uint64), big_n
+        )
+
+    def save(self, store, name):
+        """
+        Write the bootstrapping and key switching keys in a `tfhe.keystore.KeyStore`, as the
+        arrays `name`.bsk and `name`.ksk
+        """
+        self.bsk.save(store, f"{name}.bsk")
+        self.ksk.save(store, f"{name}.ksk")
+        self.location = (store.path, name)
+
+    @classmethod
+    def load(cls, store, name):
+        """
+        Map keys written with `save`, their pages are only read when they're used and are
+        shared by all the processes loading the same store
+        """
+        ck = cls.__new__(cls)
+        ck.bsk = BootstrappingKey.load(store, f"{name}.bsk")
+        ck.ksk = KeySwitchingKey.load(store, f"{name}.ksk")
+        ck.test_vector = cls._test_vector(ck.bsk.big_n)
+        ck.location = (store.path, name)
+        return ck
+
+    def bootstrap(self, c, keyswitch=True):
+        """
+        Map the phase of a TLWE or a TLWEBatch to 1/8 if it's in (0, 1/2) and to -1/8 otherwise
+        """
+        if isinstance(c, TLWEBatch):
+            res = self.bsk.bootstrap_batch(c, self.test_vector)
+        else:
+            res = self.bsk.bootstrap(c, self.test_vector)
+        return self.ksk.keyswitch(res) if keyswitch else res
+
+
+def _constant(value):
+    return Torus(encode_int(value % P, P))
+
+
+def _stack(a, b):
+    res = TLWEBatch(a.n, a.sigma, a.p)
+    res.mask = np.concatenate((a.mask, b.mask))
+    res.b = np.concatenate((a.b, b.b))
+    return res
+
+
+def gate(ck, name, a, b):
+    """
+    Evaluate the binary gate `name` (a key of `GATES`) on TLWE or TLWEBatch ciphertexts
+    """
+    if name not in GATES:
+        raise ValueError(f"unknown gate {name}")
+    constant, ca, cb = GATES[name]
+    return ck.bootstrap(a * ca + b * cb + _constant(constant))
+
+
+def nand(ck, a, b):
+    return gate(ck, "nand", a, b)
+
+
+def and_(ck, a, b):
+    return gate(ck, "and", a, b)
+
+
+def or_(ck, a, b):
+    return gate(ck, "or", a, b)
+
+
+def nor(ck, a, b):
+    return gate(ck, "nor", a, b)
+
+
+def xor(ck, a, b):
+    return gate(ck, "xor", a, b)
+
+
+def xnor(ck, a, b):
+    return gate(ck, "xnor", a, b)
+
+
+def not_(ck, a):
+    """
+    Negation, doesn't need a bootstrapping
+    """
+    return a * -1
+
+
+def mux(ck, s, a, b):
+    """
+    `a` if `s` else `b`, with two bootstrappings (done in a single batched one for TLWEBatch
+    inputs) and a single key switch
+    """
+    left = s + a + _constant(-1)
+    right = b - s + _constant(-1)
+    if isinstance(s, TLWEBatch):
+        both = ck.bootstrap(_stack(left, right), keyswitch=False)
+        m = len(s)
+        res = both[:m] + both[m:]
+    else:
+        res = ck.bootstrap(left, keyswitch=False) + ck.bootstrap(right, keyswitch=False)
+    return ck.ksk.keyswitch(res + _constant(1))
+
+
+def apply(ck, names, a, b):
+    """
+    Evaluate a layer of independent binary gates, the i-th one being `names[i]` applied to the
+    i-th ciphertexts of the TLWEBatch `a` and `b`, with a single batched bootstrapping
+    """
+    unknown = set(names) - set(GATES)
+    if unknown:
+        raise ValueError(f"unknown gates {sorted(unknown)}")
+    constants, ca, cb = np.array([GATES[name] for name in names]).T
+    return ck.bootstrap(a * ca + b * cb + encode_int(constants % P, P))
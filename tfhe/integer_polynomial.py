@@ -0,0 +1,57 @@
+import numpy as np
+from tfhe.poly import get_fft
+
+# bound on the coefficients keeping the products with 16 bit limbs exact in double precision
+MAX_COEFFICIENT = 1 << 16
+
+
+class IntegerPolynomial:
+    """
+    Plaintext polynomial (mod X^n + 1) with small integer coefficients, which multiplies torus
+    polynomials and TRLWE ciphertexts. Its negacyclic transform is computed on the first product
+    and kept, so repeated products by the same polynomial (e.g. a convolution filter) only
+    transform the torus side.
+    """
+
+    def __init__(self, coefficients=[], big_n=1024):
+        """
+        :param coefficients: polynomial coefficients in order of increasing degree, reduced
+            modulo X^big_n + 1
+        :param big_n: polynomial modulus degree (X ^ big_n + 1)
+        """
+        data = np.zeros(big_n, dtype=np.int64)
+        coefficients = np.asarray(coefficients, dtype=np.int64)
+        # X^big_n = -1
+        for start in range(0, len(coefficients), big_n):
+            block = coefficients[start : start + big_n]
+            sign = -1 if (start // big_n) % 2 else 1
+            data[: len(block)] += sign * block
+        if np.any(np.abs(data) >= MAX_COEFFICIENT):
+            raise ValueError(
+                f"coefficients must be smaller than {MAX_COEFFICIENT} in absolute value"
+            )
+        self.data = data
+        self.big_n = big_n
+        self._fourier = None
+
+    @property
+    def fourier(self):
+        """
+        Negacyclic transform of the coefficients, of shape (N/2,)
+        """
+        if self._fourier is None:
+            self._fourier = get_fft(self.big_n).forward(self.data)
+        return self._fourier
+
+    def mul_torus(self, data):
+        """
+        Multiply torus polynomials (uint64) of shape (..., N) by the polynomial, exact modulo 2^64.
+        Every limb is multiplied in the Fourier domain by the cached transform.
+        """
+        data = np.asarray(data, dtype=np.uint64)
+        if data.shape[-1] != self.big_n:
+            raise ValueError(f"polynomials must have {self.big_n} coefficients")
+        fft = get_fft(self.big_n)
+        transformed = fft.forward_torus(data)
+        transformed *= self.fourier
+        return fft.backward_torus(transformed)
@@ -0,0 +1,127 @@
+"""
+On-disk store for large key material.
+
+Each array is written as a raw little-endian file in the store directory and described in a
+JSON manifest (dtype, shape and free-form metadata such as the parameters of the key). Arrays
+are opened back with `np.memmap` in read-only mode: opening costs the same whatever the size of
+the key, and all the processes opening the same store share the same pages of the page cache.
+"""
+import json
+import os
+
+import numpy as np
+from tfhe.ciphertexts.tlwe import LWESecretKey
+from tfhe.ciphertexts.trlwe import RLWESecretKey
+
+MANIFEST = "manifest.json"
+
+
+class KeyStore:
+    def __init__(self, path):
+        """
+        :param path: directory of the store, created if it doesn't exist
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._manifest_path = os.path.join(path, MANIFEST)
+        self._manifest = self._read_manifest()
+
+    def _read_manifest(self):
+        if not os.path.exists(self._manifest_path):
+            return {}
+        with open(self._manifest_path) as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        tmp = self._manifest_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp, self._manifest_path)
+
+    def _array_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def names(self):
+        return sorted(self._manifest)
+
+    def __contains__(self, name):
+        return name in self._manifest
+
+    def metadata(self, name):
+        """
+        Metadata stored along the array `name`
+        """
+        if name not in self._manifest:
+            raise KeyError(f"no array named {name} in the store")
+        return self._manifest[name]["metadata"]
+
+    def save(self, name, array, **metadata):
+        """
+        Write `array` under `name`, replacing any previous array with the same name. `metadata`
+        must be JSON serializable.
+        """
+        if os.sep in name or name == MANIFEST:
+            raise ValueError(f"invalid array name {name}")
+        array = np.asarray(array)
+        # little-endian on every host, the values are byteswapped if needed
+        dtype = array.dtype.newbyteorder("<")
+        array = np.ascontiguousarray(array, dtype=dtype)
+        path = self._array_path(name)
+        tmp = path + ".tmp"
+        array.tofile(tmp)
+        os.replace(tmp, path)
+        self._manifest[name] = {
+            "dtype": dtype.str,
+            "shape": list(array.shape),
+            "metadata": metadata,
+        }
+        self._write_manifest()
+
+    def open(self, name):
+        """
+        Map the array `name` read-only, its pages are loaded lazily and shared between processes
+        """
+        if name not in self._manifest:
+            # another process may have written it since the store was opened
+            self._manifest = self._read_manifest()
+        if name not in self._manifest:
+            raise KeyError(f"no array named {name} in the store")
+        entry = self._manifest[name]
+        shape = tuple(entry["shape"])
+        if 0 in shape:
+            return np.empty(shape, dtype=entry["dtype"])
+        return np.memmap(
+            self._array_path(name), dtype=entry["dtype"], mode="r", shape=shape
+        )
+
+    def delete(self, name):
+        if name not in self._manifest:
+            raise KeyError(f"no array named {name} in the store")
+        del self._manifest[name]
+        self._write_manifest()
+        os.remove(self._array_path(name))
+
+    def save_secret_key(self, name, sk):
+        """
+        Write a LWESecretKey or a RLWESecretKey
+        """
+        if isinstance(sk, LWESecretKey):
+            self.save(name, sk.bits(), kind="lwe_secret_key", n=sk.n)
+        elif isinstance(sk, RLWESecretKey):
+            self.save(
+                name,
+                np.stack(sk.data),
+                kind="rlwe_secret_key",
+                big_n=sk.big_n,
+                k=sk.k,
+            )
+        else:
+            raise TypeError(f"can't store a secret key of type {type(sk)}")
+
+    def load_secret_key(self, name):
+        kind = self.metadata(name).get("kind")
+        if kind == "lwe_secret_key":
+            return LWESecretKey.from_bits(self.open(name))
+        if kind == "rlwe_secret_key":
+            return RLWESecretKey.from_bits(self.open(name))
+        raise ValueError(f"{name} is not a secret key")
@@ -0,0 +1,277 @@
+"""
+Key switching of TLWE ciphertexts from a LWE secret key to another one, typically from the
+k*N-dimensional key of the bootstrapped ciphertexts back to the n-dimensional input key.
+
+Every coefficient of the input mask is rounded to t digits in base 2^base_bit, and the key
+switching key holds an encryption of digit * s_i / base^(j+1) under the output key for every
+input key bit i, level j and digit value. Switching a ciphertext is then a gather of the
+n_in * t table rows selected by its digits, summed and subtracted from the trivial ciphertext
+(0, b). The table can be stored with 32 or 16 bit words to trade noise for memory: only the
+most significant bits of each torus element are kept and sums wrap around in the storage type.
+
+The packing key switch turns up to N TLWE ciphertexts into a single TRLWE whose coefficient m
+encrypts the message of the m-th ciphertext. The signed digits of the m-th mask are placed on
+X^m, so that each pair (key bit i, level j) gives a small integer polynomial that multiplies a
+TRLWE encryption of s_i / Bg^(j+1): the whole switch is an external product-like sum of n * l
+products in the Fourier domain. Sample extraction (`unpack`) goes back to TLWE ciphertexts.
+"""
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import TRLWE, encrypt_zero_array
+from tfhe.gadget import decompose, gadget
+from tfhe.poly import get_fft
+from tfhe.rng import gaussian_torus, uniform_torus
+from tfhe.torus import Torus
+
+STORAGE_DTYPES = (np.uint64, np.uint32, np.uint16)
+
+# rows gathered at once when switching a batch, bounds the size of the temporary array
+CHUNK_BYTES = 1 << 24
+
+
+def decompose_unsigned(data, t, base_bit):
+    """
+    Round torus elements (uint64) of shape (...) to t * base_bit bits and decompose them into
+    t digits in [0, 2^base_bit), outputs an int64 array of shape (..., t), most significant first
+    """
+    precision = t * base_bit
+    if precision > 64:
+        raise ValueError("t * base_bit must be at most 64")
+    data = np.asarray(data, dtype=np.uint64)
+    if precision < 64:
+        data = (data + np.uint64(1 << (63 - precision))) >> np.uint64(64 - precision)
+    shifts = np.arange(t - 1, -1, -1, dtype=np.uint64) * np.uint64(base_bit)
+    digits = (data[..., None] >> shifts) & np.uint64((1 << base_bit) - 1)
+    return digits.astype(np.int64)
+
+
+class KeySwitchingKey:
+    """
+    Table of TLWE encryptions under `sk_out` of shape (n_in, t, base, n_out + 1), the last
+    column holding the bodies
+    """
+
+    def __init__(self, sk_in, sk_out, sigma, base_bit=2, t=8, dtype=np.uint64, rng=None):
+        """
+        :param sigma: standard deviation of the noise of the table encryptions
+        :param dtype: storage type of the table, one of `STORAGE_DTYPES`
+        """
+        dtype = np.dtype(dtype)
+        if dtype not in STORAGE_DTYPES:
+            raise ValueError(f"unsupported storage type {dtype}")
+        if t * base_bit > 64:
+            raise ValueError("t * base_bit must be at most 64")
+        self.n_in = sk_in.n
+        self.n_out = sk_out.n
+        self.sigma = sigma
+        self.base_bit = base_bit
+        self.t = t
+        base = 1 << base_bit
+        shape = (self.n_in, t, base)
+        # digit * s_i / base^(j+1) for every entry of the table
+        levels = np.array([1 << (64 - base_bit * (j + 1)) for j in range(t)], dtype=np.uint64)
+        messages = (
+            sk_in.bits()[:, None, None]
+            * levels[None, :, None]
+            * np.arange(base, dtype=np.uint64)[None, None, :]
+        )
+        table = np.empty(shape + (self.n_out + 1,), dtype=np.uint64)
+        table[..., :-1] = uniform_torus(shape + (self.n_out,), rng)
+        noise = gaussian_torus(shape, sigma, rng)
+        table[..., -1] = table[..., :-1] @ sk_out.bits() + messages + noise
+        # a zero digit selects a trivial encryption of zero
+        table[:, :, 0] = 0
+        self.table = self._to_storage(table, dtype)
+
+    @staticmethod
+    def _to_storage(table, dtype):
+        bits = dtype.itemsize * 8
+        if bits == 64:
+            return table
+        shift = np.uint64(64 - bits)
+        # round to the closest multiple of 2^-bits
+        return ((table + (np.uint64(1) << (shift - np.uint64(1)))) >> shift).astype(dtype)
+
+    @classmethod
+    def from_array(cls, table, sigma, base_bit):
+        """
+        Build a key from an existing table, which isn't copied
+        """
+        key = cls.__new__(cls)
+        key.n_in, key.t, _, n_out = table.shape
+        key.n_out = n_out - 1
+        key.sigma = sigma
+        key.base_bit = base_bit
+        key.table = table
+        return key
+
+    def save(self, store, name):
+        """
+        Write the key in a `tfhe.keystore.KeyStore`
+        """
+        store.save(
+            name,
+            self.table,
+            kind="keyswitching_key",
+            sigma=self.sigma,
+            base_bit=self.base_bit,
+        )
+
+    @classmethod
+    def load(cls, store, name):
+        """
+        Map a key written with `save`, its pages are only read when they're used
+        """
+        metadata = store.metadata(name)
+        if metadata.get("kind") != "keyswitching_key":
+            raise ValueError(f"{name} is not a key switching key")
+        return cls.from_array(store.open(name), metadata["sigma"], metadata["base_bit"])
+
+    def keyswitch_array(self, mask, b):
+        """
+        Switch ciphertexts given as a mask array of shape (M, n_in) and bodies of shape (M,),
+        outputs the masks (M, n_out) and bodies (M,) under the output key
+        """
+        digits = decompose_unsigned(mask, self.t, self.base_bit)
+        m = len(mask)
+        base = 1 << self.base_bit
+        # index of the selected row in the table flattened to (n_in * t * base, n_out + 1)
+        rows = (np.arange(self.n_in * self.t) * base).reshape(self.n_in, self.t) + digits
+        rows = rows.reshape(m, -1)
+        flat = self.table.reshape(-1, self.n_out + 1)
+        acc = np.zeros((m, self.n_out + 1), dtype=self.table.dtype)
+        chunk = max(1, CHUNK_BYTES // max(1, m * flat.shape[1] * flat.itemsize))
+        for start in range(0, rows.shape[1], chunk):
+            acc += flat[rows[:, start : start + chunk]].sum(axis=1, dtype=self.table.dtype)
+        acc = acc.astype(np.uint64) << np.uint64(64 - self.table.itemsize * 8)
+        return np.negative(acc[:, :-1]), np.asarray(b, dtype=np.uint64) - acc[:, -1]
+
+    def keyswitch(self, c):
+        """
+        Switch a TLWE or a TLWEBatch encrypted under the input key to the output key
+        """
+        if not isinstance(c, (TLWE, TLWEBatch)):
+            raise TypeError(f"can't key switch object of type {type(c)}")
+        if c.n != self.n_in:
+            raise ValueError(f"expected TLWE of size {self.n_in}, got {c.n}")
+        if isinstance(c, TLWE):
+            mask, b = self.keyswitch_array(c.mask[None, :], [c.b.data])
+            res = TLWE(self.n_out, self.sigma, c.p)
+            res.mask = mask[0]
+            res.b = Torus(b[0])
+        else:
+            mask, b = self.keyswitch_array(c.mask, c.b)
+            res = TLWEBatch(self.n_out, self.sigma, c.p)
+            res.mask = mask
+            res.b = b
+        return res
+
+
+class PackingKeySwitchingKey:
+    """
+    TRLWE encryptions under a RLWE secret key of the constant polynomials s_i / Bg^(j+1), for
+    the bits s_i of a LWE secret key and the levels j of the gadget decomposition. They're kept
+    in the Fourier domain with shape (N/2, n*l, (k+1)*limbs), like TRGSW ciphertexts.
+    """
+
+    def __init__(self, lwe_sk, rlwe_sk, sigma, l=6, bg_bit=4, rng=None):
+        """
+        :param sigma: standard deviation of the noise of the TRLWE encryptions
+        """
+        self.n = lwe_sk.n
+        self.big_n = rlwe_sk.big_n
+        self.k = rlwe_sk.k
+        self.sigma = sigma
+        self.l = l
+        self.bg_bit = bg_bit
+        fft = get_fft(self.big_n)
+        rows = self.n * l
+        messages = (lwe_sk.bits()[:, None] * gadget(l, bg_bit)).reshape(-1)
+        self.fourier = np.empty(
+            (self.big_n // 2, rows, (self.k + 1) * fft.limbs), dtype=np.complex128
+        )
+        # transform by chunks of rows to bound the memory used on top of the key
+        chunk = max(1, CHUNK_BYTES // (self.fourier[:, 0].nbytes))
+        for start in range(0, rows, chunk):
+            stop = min(start + chunk, rows)
+            data = encrypt_zero_array(rlwe_sk, stop - start, sigma, rng)
+            data[:, self.k, 0] += messages[start:stop]
+            transformed = fft.forward_torus(data).transpose(3, 0, 1, 2)
+            self.fourier[:, start:stop] = transformed.reshape(self.big_n // 2, stop - start, -1)
+
+    @classmethod
+    def from_array(cls, fourier, sigma, l, bg_bit):
+        """
+        Build a key from an existing Fourier-domain array, which isn't copied
+        """
+        key = cls.__new__(cls)
+        key.big_n = fourier.shape[0] * 2
+        key.n = fourier.shape[1] // l
+        key.k = fourier.shape[2] // get_fft(key.big_n).limbs - 1
+        key.sigma = sigma
+        key.l = l
+        key.bg_bit = bg_bit
+        key.fourier = fourier
+        return key
+
+    def save(self, store, name):
+        """
+        Write the key in a `tfhe.keystore.KeyStore`
+        """
+        store.save(
+            name,
+            self.fourier,
+            kind="packing_keyswitching_key",
+            sigma=self.sigma,
+            l=self.l,
+            bg_bit=self.bg_bit,
+        )
+
+    @classmethod
+    def load(cls, store, name):
+        """
+        Map a key written with `save`, its pages are only read when they're used
+        """
+        metadata = store.metadata(name)
+        if metadata.get("kind") != "packing_keyswitching_key":
+            raise ValueError(f"{name} is not a packing key switching key")
+        return cls.from_array(
+            store.open(name), metadata["sigma"], metadata["l"], metadata["bg_bit"]
+        )
+
+    def pack(self, ciphertexts):
+        """
+        Pack a TLWEBatch or a list of at most N TLWE ciphertexts into a TRLWE whose coefficient
+        m encrypts the message of the m-th ciphertext (the others encrypt 0)
+        """
+        if not isinstance(ciphertexts, TLWEBatch):
+            ciphertexts = TLWEBatch.from_tlwes(ciphertexts)
+        m = len(ciphertexts)
+        if m > self.big_n:
+            raise ValueError(f"can't pack more than {self.big_n} ciphertexts, got {m}")
+        if ciphertexts.n != self.n:
+            raise ValueError(f"expected TLWE of size {self.n}, got {ciphertexts.n}")
+        fft = get_fft(self.big_n)
+        # digit polynomials D_(i,j) = sum_m d_(m,i,j) X^m
+        digits = decompose(ciphertexts.mask.T, self.l, self.bg_bit)
+        polys = np.zeros((self.n * self.l, self.big_n), dtype=np.int64)
+        polys[:, :m] = digits.reshape(-1, m)
+        transformed = fft.forward(polys)
+        acc = np.matmul(transformed.T[:, None, :], self.fourier)[:, 0, :]
+        acc = acc.T.reshape(self.k + 1, fft.limbs, self.big_n // 2)
+        data = np.negative(fft.backward_torus(acc))
+        data[self.k, :m] += ciphertexts.b
+        return TRLWE.from_array(data, self.sigma, ciphertexts.p)
+
+
+def unpack(c, count=None, ksk=None):
+    """
+    Inverse of `PackingKeySwitchingKey.pack`: extract the first `count` coefficients of the TRLWE
+    `c` (all of them by default) into a TLWEBatch under the extracted k*N-dimensional key,
+    optionally switched back with the KeySwitchingKey `ksk`
+    """
+    batch = c.extract(np.arange(c.big_n if count is None else count))
+    if ksk is not None:
+        batch = ksk.keyswitch(batch)
+    return batch
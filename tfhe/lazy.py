@@ -0,0 +1,191 @@
+"""
+Lazy linear arithmetic on TLWE and TRLWE ciphertexts.
+
+Inside a `lazy()` block, the operators of TLWE and TRLWE ciphertexts (addition, subtraction,
+multiplication by an integer) don't compute anything: they build a `LinearCombination` of the
+ciphertexts involved. `evaluate()` materializes the whole expression in one pass, as a single
+weighted sum over the stacked masks and bodies, instead of allocating and copying a ciphertext
+for every intermediate result:
+
+    with lazy():
+        expression = 3 * c1 + c2 - 5 * c3
+    c = expression.evaluate()
+
+Mixing a ciphertext with a `LinearCombination` is always lazy, even outside of a `lazy()` block.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import numpy as np
+
+_LAZY = ContextVar("lazy", default=False)
+
+
+def _constant_types():
+    """
+    Type of the constants that can be added to each kind of ciphertext
+    """
+    # the ciphertext modules import this one
+    from tfhe.ciphertexts.tlwe import TLWE
+    from tfhe.ciphertexts.trlwe import TRLWE
+    from tfhe.torus import Torus
+    from tfhe.torus_polynomial import TorusPolynomial
+
+    return {TLWE: Torus, TRLWE: TorusPolynomial}
+
+
+@contextmanager
+def lazy(enabled=True):
+    """
+    Make the operators of TLWE and TRLWE ciphertexts build `LinearCombination` expressions
+    """
+    token = _LAZY.set(enabled)
+    try:
+        yield
+    finally:
+        _LAZY.reset(token)
+
+
+def is_lazy():
+    return _LAZY.get()
+
+
+class LinearCombination:
+    """
+    Expression sum(coefficient * ciphertext) + constant over TLWE or TRLWE ciphertexts
+    """
+
+    def __init__(self, terms=(), constant=None):
+        """
+        :param terms: sequence of (integer coefficient, ciphertext) pairs
+        :param constant: uint64 torus element (TLWE) or coefficients (TRLWE) added to the body
+        """
+        self.terms = list(terms)
+        self.constant = constant
+
+    @classmethod
+    def of(cls, c):
+        return cls([(1, c)])
+
+    def _with_constant(self, data):
+        constant = data if self.constant is None else self.constant + data
+        return LinearCombination(self.terms, constant)
+
+    def _kind(self):
+        """
+        TLWE or TRLWE, the type of the ciphertexts of the expression (None if it has none)
+        """
+        for kind in _constant_types():
+            if self.terms and isinstance(self.terms[0][1], kind):
+                return kind
+        return None
+
+    def _term(self, coefficient, other, operation):
+        """
+        Add the TLWE, TRLWE, Torus or TorusPolynomial `other` with `coefficient` (1 or -1),
+        it must match the kind of ciphertexts of the expression
+        """
+        kind = self._kind()
+        constant_types = _constant_types()
+        if isinstance(other, tuple(constant_types)):
+            if kind is not None and not isinstance(other, kind):
+                raise TypeError(f"can't mix {kind.__name__} and {type(other).__name__}")
+            return LinearCombination(self.terms + [(coefficient, other)], self.constant)
+        if isinstance(other, tuple(constant_types.values())):
+            if kind is not None and not isinstance(other, constant_types[kind]):
+                raise TypeError(
+                    f"don't support {operation} of {kind.__name__} with {type(other).__name__}"
+                )
+            data = np.asarray(other.data, dtype=np.uint64)
+            return self._with_constant(data if coefficient == 1 else np.negative(data))
+        raise TypeError(f"don't support {operation} of LinearCombination with {type(other)}")
+
+    def __add__(self, other):
+        if isinstance(other, LinearCombination):
+            kind, other_kind = self._kind(), other._kind()
+            if kind is not None and other_kind is not None and kind is not other_kind:
+                raise TypeError(f"can't mix {kind.__name__} and {other_kind.__name__}")
+            res = LinearCombination(self.terms + other.terms, self.constant)
+            return res if other.constant is None else res._with_constant(other.constant)
+        return self._term(1, other, "addition")
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __neg__(self):
+        return self * -1
+
+    def __sub__(self, other):
+        if isinstance(other, LinearCombination):
+            return self + other * -1
+        return self._term(-1, other, "subtraction")
+
+    def __rsub__(self, other):
+        return (-self) + other
+
+    def __mul__(self, other):
+        if not isinstance(other, int):
+            raise TypeError(
+                f"don't support multiplication of LinearCombination with {type(other)}"
+            )
+        constant = None
+        if self.constant is not None:
+            constant = self.constant * np.uint64(other % 2 ** 64)
+        return LinearCombination([(a * other, c) for a, c in self.terms], constant)
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def _merged(self):
+        # sum the coefficients of a ciphertext appearing several times
+        coefficients = {}
+        ciphertexts = {}
+        for a, c in self.terms:
+            coefficients[id(c)] = coefficients.get(id(c), 0) + a
+            ciphertexts[id(c)] = c
+        return [ciphertexts[i] for i in coefficients], [coefficients[i] for i in coefficients]
+
+    def evaluate(self):
+        """
+        Materialize the expression into a TLWE or TRLWE ciphertext
+        """
+        from tfhe.ciphertexts.tlwe import TLWE
+        from tfhe.ciphertexts.trlwe import TRLWE
+        from tfhe.torus import Torus
+
+        if not self.terms:
+            raise ValueError("can't evaluate an expression without ciphertext")
+        ciphertexts, coefficients = self._merged()
+        first = ciphertexts[0]
+        for c in ciphertexts[1:]:
+            if type(c) is not type(first) or not first.have_same_param(c):
+                raise ValueError(
+                    "linear combination need to be done on ciphertexts of same parameters"
+                )
+        weights = np.array([a % 2 ** 64 for a in coefficients], dtype=np.uint64)
+        if isinstance(first, TLWE):
+            masks = np.stack([c.mask for c in ciphertexts])
+            bodies = np.array([c.b.data for c in ciphertexts], dtype=np.uint64)
+            res = TLWE(first.n, first.sigma, first.p)
+            res.mask = weights @ masks
+            b = np.atleast_1d(weights @ bodies)
+            if self.constant is not None:
+                b += self.constant
+            res.b = Torus(b[0])
+            return res
+        if isinstance(first, TRLWE):
+            data = np.tensordot(weights, np.stack([c.to_array() for c in ciphertexts]), axes=1)
+            if self.constant is not None:
+                data[-1] += self.constant
+            return TRLWE.from_array(data, first.sigma, first.p)
+        raise TypeError(f"can't evaluate a linear combination of {type(first)}")
+
+    def decrypt(self, sk):
+        return self.evaluate().decrypt(sk)
+
+
+def linear_combination(coefficients, ciphertexts):
+    """
+    sum(coefficients[i] * ciphertexts[i]) over TLWE or TRLWE ciphertexts, computed in one pass
+    """
+    return LinearCombination(zip(coefficients, ciphertexts)).evaluate()
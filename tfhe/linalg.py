@@ -0,0 +1,108 @@
+"""
+Products of plaintext integer weights with vectors of TLWE ciphertexts.
+
+A weighted sum of TLWE ciphertexts is the TLWE whose mask and body are the same weighted sum of
+the input masks and bodies, so multiplying an (m, M) integer matrix with a batch of M
+ciphertexts is the uint64 matrix product of the weights with the (M, n) mask matrix and the
+bodies: the products and sums wrap around modulo 2^64, which is the torus arithmetic, and
+negative weights are their two's complement. The matrices are processed by blocks of rows and
+columns, so the weights can be a memory-mapped array much larger than the memory.
+
+The noise of an output grows with the weights: for independent input noises of standard
+deviation sigma, the noise of sum(w_i * c_i) has a standard deviation of sigma * sqrt(sum(w_i^2)).
+"""
+import numpy as np
+from tfhe.ciphertexts.tlwe import TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.torus import Torus
+
+# size of the blocks of weights (converted to uint64) and of masks multiplied at once
+CHUNK_BYTES = 1 << 24
+
+
+def _check_weights(weights, ndim):
+    weights = np.asarray(weights)
+    if weights.ndim != ndim:
+        raise ValueError(f"expected weights with {ndim} dimensions, got {weights.ndim}")
+    if not np.issubdtype(weights.dtype, np.integer):
+        raise TypeError(f"weights must be integers, got {weights.dtype}")
+    return weights
+
+
+def _as_batch(ciphertexts):
+    if isinstance(ciphertexts, TLWEBatch):
+        return ciphertexts
+    return TLWEBatch.from_tlwes(ciphertexts)
+
+
+def estimate_noise(weights, sigma):
+    """
+    Standard deviation of the noise of the rows of `weights` applied to ciphertexts with
+    independent noises of standard deviation `sigma`: sigma * sqrt(sum(w^2)) along the last axis
+    """
+    weights = np.asarray(weights)
+    rows = weights.reshape(-1, weights.shape[-1])
+    squares = np.empty(len(rows))
+    chunk = max(1, CHUNK_BYTES // max(1, rows.shape[1] * 8))
+    for start in range(0, len(rows), chunk):
+        block = rows[start : start + chunk].astype(np.float64)
+        squares[start : start + chunk] = np.einsum("ij,ij->i", block, block)
+    return sigma * np.sqrt(squares).reshape(weights.shape[:-1])
+
+
+def matvec_array(weights, mask, b):
+    """
+    Product of integer weights of shape (m, M) with ciphertexts given as a mask array of shape
+    (M, n) and bodies of shape (M,), outputs the masks (m, n) and bodies (m,)
+    """
+    m, size = weights.shape
+    if size != len(mask):
+        raise ValueError(f"expected {size} ciphertexts, got {len(mask)}")
+    n = mask.shape[1]
+    res_mask = np.zeros((m, n), dtype=np.uint64)
+    res_b = np.zeros(m, dtype=np.uint64)
+    columns = max(1, min(size, CHUNK_BYTES // max(1, n * 8)))
+    rows = max(1, CHUNK_BYTES // (columns * 8))
+    for start in range(0, size, columns):
+        stop = start + columns
+        block_mask = np.asarray(mask[start:stop], dtype=np.uint64)
+        block_b = np.asarray(b[start:stop], dtype=np.uint64)
+        for row in range(0, m, rows):
+            # wrapping uint64 products give the right torus elements for negative weights too
+            block = weights[row : row + rows, start:stop].astype(np.uint64)
+            res_mask[row : row + rows] += block @ block_mask
+            res_b[row : row + rows] += block @ block_b
+    return res_mask, res_b
+
+
+def matvec(weights, ciphertexts, sigma=None):
+    """
+    Product of an (m, M) integer matrix with a TLWEBatch (or a list of TLWE) of M ciphertexts,
+    outputs a TLWEBatch of m ciphertexts and the estimated standard deviation of their noises
+
+    :param sigma: standard deviation of the noise of the inputs, the `sigma` of the batch by
+        default
+    """
+    weights = _check_weights(weights, 2)
+    ciphertexts = _as_batch(ciphertexts)
+    if sigma is None:
+        sigma = ciphertexts.sigma
+    res = TLWEBatch(ciphertexts.n, ciphertexts.sigma, ciphertexts.p)
+    res.mask, res.b = matvec_array(weights, ciphertexts.mask, ciphertexts.b)
+    return res, estimate_noise(weights, sigma)
+
+
+def dot(weights, ciphertexts, sigma=None):
+    """
+    Weighted sum of a TLWEBatch (or a list of TLWE) with a vector of integer weights, outputs a
+    TLWE and the estimated standard deviation of its noise
+
+    :param sigma: standard deviation of the noise of the inputs, the `sigma` of the batch by
+        default
+    """
+    weights = _check_weights(weights, 1)
+    batch, noise = matvec(weights[None, :], ciphertexts, sigma)
+    res = TLWE(batch.n, batch.sigma, batch.p)
+    res.mask = batch.mask[0]
+    res.b = Torus(batch.b[0])
+    return res, float(noise[0])
@@ -1,20 +1,237 @@
+from functools import lru_cache
+
 import numpy as np
 
 
 def polymod(p, big_n, q=2 ** 64):
     # assume polynomial modulus is always X^N + 1
-    chunks = [np.uint64(p[i : i + big_n]) for i in range(0, len(p), big_n)]
-    # padd last chunk
-    if len(chunks[-1]) != big_n:
-        chunks[-1] = np.uint64(chunks[-1].tolist() + [0] * (big_n - len(chunks[-1])))
-    sign = np.uint64(1)
-    acc = np.zeros_like(chunks[0])
-    for chunk in chunks:
-        acc += chunk * sign
-        sign *= np.uint64(-1)
-    return acc
+    p = np.asarray(p, dtype=np.uint64)
+    if len(p) == big_n:
+        return p
+    # padd to a whole number of chunks and fold them with alternating signs
+    n_chunks = max(-(-len(p) // big_n), 1)
+    if len(p) != n_chunks * big_n:
+        p = np.concatenate((p, np.zeros(n_chunks * big_n - len(p), dtype=np.uint64)))
+    chunks = p.reshape(n_chunks, big_n)
+    return chunks[0::2].sum(axis=0, dtype=np.uint64) - chunks[1::2].sum(
+        axis=0, dtype=np.uint64
+    )
 
 
 def polymul(p1, p2, q=2 ** 64):
     # using old API of numpy since it allows polymul of uint64
-    return np.polymul(p1[::-1], p2[::-1])[::-1]
\ No newline at end of file
+    return np.polymul(p1[::-1], p2[::-1])[::-1]
+
+
+class NegacyclicFFT:
+    """
+    Negacyclic transform over X^N + 1 based on a complex FFT of size N/2.
+
+    A polynomial of degree < N is folded into N/2 complex numbers and twisted by a 2N-th root
+    of unity, so that a pointwise product in the transformed domain is a product modulo X^N + 1.
+    Torus polynomials (uint64 coefficients) are split into signed limbs of `limb_bits` bits
+    before being transformed, which keeps every coefficient small enough to be rounded back
+    exactly and makes the result exact modulo 2^64.
+    """
+
+    def __init__(self, big_n, limb_bits=16):
+        if big_n < 2 or big_n & (big_n - 1):
+            raise ValueError(f"big_n must be a power of two, got {big_n}")
+        if 64 % limb_bits:
+            raise ValueError(f"limb_bits must divide 64, got {limb_bits}")
+        self.big_n = big_n
+        self.limb_bits = limb_bits
+        self.limbs = 64 // limb_bits
+        half = big_n // 2
+        self.twist = np.exp(1j * np.pi * np.arange(half) / big_n)
+        self.untwist = self.twist.conj()
+        self._limb_shifts = np.arange(self.limbs, dtype=np.uint64) * np.uint64(limb_bits)
+        self._limb_mask = np.uint64((1 << limb_bits) - 1)
+        self._limb_half = np.int64(1 << (limb_bits - 1))
+        # adding half a limb at every position turns unsigned limbs into signed ones
+        self._limb_offset = np.uint64(
+            sum(1 << (limb_bits * i + limb_bits - 1) for i in range(self.limbs))
+        )
+
+    def forward(self, x):
+        """
+        Transform real or (small) integer polynomials of shape (..., N) into (..., N/2) complex
+        """
+        x = np.asarray(x)
+        half = self.big_n // 2
+        folded = np.empty(x.shape[:-1] + (half,), dtype=np.complex128)
+        folded.real = x[..., :half]
+        folded.imag = x[..., half:]
+        folded *= self.twist
+        return np.fft.fft(folded, axis=-1)
+
+    def backward(self, c):
+        """
+        Inverse of `forward`, rounds the result to the nearest integers (int64)
+        """
+        z = np.fft.ifft(c, axis=-1)
+        z *= self.untwist
+        half = self.big_n // 2
+        x = np.empty(z.shape[:-1] + (self.big_n,), dtype=np.float64)
+        np.rint(z.real, out=x[..., :half])
+        np.rint(z.imag, out=x[..., half:])
+        return x.astype(np.int64)
+
+    def split(self, x):
+        """
+        Split uint64 coefficients of shape (..., N) into signed limbs of shape (..., limbs, N)
+        """
+        y = np.asarray(x, dtype=np.uint64) + self._limb_offset
+        limbs = (y[..., None, :] >> self._limb_shifts[:, None]) & self._limb_mask
+        return limbs.astype(np.int64) - self._limb_half
+
+    def combine(self, limbs):
+        """
+        Recombine integer limbs of shape (..., limbs, N) into uint64 coefficients modulo 2^64
+        """
+        limbs = np.asarray(limbs, dtype=np.int64).view(np.uint64)
+        res = limbs[..., 0, :].copy()
+        for i in range(1, self.limbs):
+            res += limbs[..., i, :] << self._limb_shifts[i]
+        return res
+
+    def forward_torus(self, x):
+        """
+        Transform torus polynomials (uint64) of shape (..., N) into (..., limbs, N/2) complex
+        """
+        return self.forward(self.split(x))
+
+    def backward_torus(self, c):
+        """
+        Inverse of `forward_torus`, outputs uint64 coefficients of shape (..., N)
+        """
+        return self.combine(self.backward(c))
+
+    def mul(self, p1, p2):
+        """
+        Negacyclic product of two uint64 polynomials, exact modulo 2^64
+        """
+        f1 = self.forward_torus(p1)
+        f2 = self.forward_torus(p2)
+        # limb products of weight >= 2^64 vanish modulo 2^64
+        acc = np.zeros(np.broadcast_shapes(f1.shape, f2.shape), dtype=np.complex128)
+        for i in range(self.limbs):
+            for j in range(self.limbs - i):
+                acc[..., i + j, :] += f1[..., i, :] * f2[..., j, :]
+        return self.backward_torus(acc)
+
+
+def _rotation(a, big_n):
+    """
+    Shift and sign of the multiplication by X^a modulo X^N + 1
+    """
+    a %= 2 * big_n
+    return a % big_n, a >= big_n
+
+
+def _output(data, out):
+    if out is None:
+        return np.empty_like(data), data
+    if np.shares_memory(out, data):
+        # the shifted halves would overwrite each other
+        data = data.copy()
+    return out, data
+
+
+def negacyclic_rotate(data, a, out=None):
+    """
+    Multiply polynomials of shape (..., N) by the monomial X^a modulo X^N + 1 in O(N): a roll
+    of the coefficients with a sign flip on the part that wraps around.
+
+    :param out: uint64 array of the same shape receiving the result, it may be `data` itself
+    """
+    data = np.asarray(data, dtype=np.uint64)
+    big_n = data.shape[-1]
+    shift, negate = _rotation(a, big_n)
+    out, data = _output(data, out)
+    head, tail = out[..., :shift], out[..., shift:]
+    if negate:
+        np.copyto(head, data[..., big_n - shift :])
+        np.negative(data[..., : big_n - shift], out=tail)
+    else:
+        np.negative(data[..., big_n - shift :], out=head)
+        np.copyto(tail, data[..., : big_n - shift])
+    return out
+
+
+def negacyclic_rotate_sub(data, a, out=None):
+    """
+    Compute (X^a - 1) * data modulo X^N + 1 for polynomials of shape (..., N) without
+    intermediate arrays
+
+    :param out: uint64 array of the same shape receiving the result, it may be `data` itself
+    """
+    data = np.asarray(data, dtype=np.uint64)
+    big_n = data.shape[-1]
+    shift, negate = _rotation(a, big_n)
+    out, data = _output(data, out)
+    head, tail = out[..., :shift], out[..., shift:]
+    if negate:
+        np.subtract(data[..., big_n - shift :], data[..., :shift], out=head)
+        np.add(data[..., : big_n - shift], data[..., shift:], out=tail)
+        np.negative(tail, out=tail)
+    else:
+        np.add(data[..., big_n - shift :], data[..., :shift], out=head)
+        np.negative(head, out=head)
+        np.subtract(data[..., : big_n - shift], data[..., shift:], out=tail)
+    return out
+
+
+@lru_cache(maxsize=None)
+def get_fft(big_n, limb_bits=16):
+    """
+    Returns a cached `NegacyclicFFT` engine for polynomial modulus X^big_n + 1
+    """
+    return NegacyclicFFT(big_n, limb_bits)
+
+
+def _schoolbook_mul(p1, p2, big_n):
+    return polymod(polymul(np.uint64(p1), np.uint64(p2)), big_n)
+
+
+def _fft_mul(p1, p2, big_n):
+    return get_fft(big_n).mul(p1, p2)
+
+
+BACKENDS = {
+    "schoolbook": _schoolbook_mul,
+    "fft": _fft_mul,
+}
+
+_backend = "fft"
+
+
+def set_backend(name):
+    """
+    Select the backend used by `negacyclic_mul`, one of `BACKENDS`
+    """
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"unknown polynomial multiplication backend {name}")
+    _backend = name
+
+
+def get_backend():
+    return _backend
+
+
+def negacyclic_mul(p1, p2, big_n, backend=None):
+    """
+    Multiply two polynomials of degree < big_n modulo X^big_n + 1 and 2^64.
+
+    :param backend: name of the backend to use, defaults to the one selected by `set_backend`
+    """
+    if backend is None:
+        backend = _backend
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown polynomial multiplication backend {backend}")
+    p1 = np.asarray(p1, dtype=np.uint64)
+    p2 = np.asarray(p2, dtype=np.uint64)
+    if p1.shape[-1] != big_n or p2.shape[-1] != big_n:
+        raise ValueError(f"polynomials must have {big_n} coefficients")
+    return BACKENDS[backend](p1, p2, big_n)
@@ -0,0 +1,155 @@
+"""
+Random number generation used for key generation and encryption.
+
+Everything is built on `np.random.Generator` with a counter-based bit generator (Philox by
+default, SFC64 is also available). Each thread (and each process) gets its own generator,
+spawned from a root `np.random.SeedSequence`, so parallel encryptions never share a stream.
+For reproducible parallel runs, seed the root with `seed` and hand the generators returned by
+`spawn` to the workers explicitly; every sampling function takes an optional `rng`.
+"""
+import os
+import threading
+
+import numpy as np
+from tfhe.encoding import encode_real
+
+BIT_GENERATORS = {
+    "philox": np.random.Philox,
+    "sfc64": np.random.SFC64,
+}
+
+# first spawn key component of the root seed sequences of forked processes
+_FORK_NAMESPACE = 0xF0F0
+
+_lock = threading.Lock()
+_local = threading.local()
+_root = {
+    "seed_seq": np.random.SeedSequence(),
+    "bit_generator": "philox",
+    "pid": os.getpid(),
+}
+
+
+def make_rng(seed=None, bit_generator="philox"):
+    """
+    Build a new generator.
+
+    :param seed: None (fresh OS entropy), an integer or a `np.random.SeedSequence`
+    :param bit_generator: name of the bit generator, one of `BIT_GENERATORS`
+    """
+    if bit_generator not in BIT_GENERATORS:
+        raise ValueError(f"unknown bit generator {bit_generator}")
+    return np.random.Generator(BIT_GENERATORS[bit_generator](seed))
+
+
+def seed(seed=None, bit_generator="philox"):
+    """
+    Reset the root seed sequence the per-thread generators are spawned from. The generators
+    of all the threads are replaced the next time they are requested
+    """
+    if bit_generator not in BIT_GENERATORS:
+        raise ValueError(f"unknown bit generator {bit_generator}")
+    with _lock:
+        _root["seed_seq"] = np.random.SeedSequence(seed)
+        _root["bit_generator"] = bit_generator
+        _root["pid"] = os.getpid()
+
+
+def _spawn_seed_seqs(n):
+    with _lock:
+        pid = os.getpid()
+        if _root["pid"] != pid:
+            # forked child: don't replay the streams of the parent process. The spawn key lives
+            # in its own namespace, away from the keys (i,) of the children spawned by `spawn`
+            parent = _root["seed_seq"]
+            _root["seed_seq"] = np.random.SeedSequence(
+                parent.entropy, spawn_key=parent.spawn_key + (_FORK_NAMESPACE, pid)
+            )
+            _root["pid"] = pid
+        return _root["seed_seq"].spawn(n), _root["bit_generator"]
+
+
+def spawn(n):
+    """
+    Returns `n` independent generators spawned from the root seed sequence
+    """
+    seed_seqs, bit_generator = _spawn_seed_seqs(n)
+    return [make_rng(s, bit_generator) for s in seed_seqs]
+
+
+def get_rng():
+    """
+    Returns the generator of the calling thread, creating it if needed
+    """
+    rng = getattr(_local, "rng", None)
+    if rng is None or _local.root is not _root["seed_seq"] or _local.pid != os.getpid():
+        (rng,) = spawn(1)
+        _local.rng = rng
+        _local.root = _root["seed_seq"]
+        _local.pid = os.getpid()
+    return rng
+
+
+def uniform_torus(size, rng=None):
+    """
+    Sample uniformly random torus elements (uint64) of shape `size` in a single call
+    """
+    if rng is None:
+        rng = get_rng()
+    return rng.integers(0, 2 ** 64, size=size, dtype=np.uint64)
+
+
+def gaussian_torus(size, sigma, rng=None):
+    """
+    Sample torus elements (uint64) of shape `size` following a normal distribution N(0, sigma ^ 2)
+    """
+    if rng is None:
+        rng = get_rng()
+    return encode_real(rng.normal(0, sigma, size=size))
+
+
+def binary(size, rng=None):
+    """
+    Sample uniformly random bits (uint64) of shape `size`, used for secret keys
+    """
+    if rng is None:
+        rng = get_rng()
+    return rng.integers(0, 2, size=size, dtype=np.uint64)
+
+
+# seeded (compressed) ciphertexts always expand their mask with Philox: it's counter-based, so
+# the mask of any ciphertext of a batch can be regenerated by jumping ahead in the stream
+SEED_BLOCK_WORDS = 4
+
+
+# size of the seeds of compressed ciphertexts, two ciphertexts sharing a seed under the same key
+# leak the difference of their messages so collisions must stay out of reach
+SEED_BITS = 128
+
+
+def new_seed(rng=None):
+    """
+    Draw a SEED_BITS bits seed for a compressed ciphertext, from fresh OS entropy or from `rng`
+    """
+    if rng is None:
+        return int.from_bytes(os.urandom(SEED_BITS // 8), "little")
+    words = rng.integers(0, 2 ** 64, size=SEED_BITS // 64, dtype=np.uint64)
+    return sum(int(w) << (64 * i) for i, w in enumerate(words))
+
+
+def seed_blocks(words):
+    """
+    Number of Philox blocks needed to hold `words` uint64 words
+    """
+    return -(-words // SEED_BLOCK_WORDS)
+
+
+def expand_seed(seed, size, offset=0):
+    """
+    Deterministically expand `seed` into uniformly random torus elements (uint64) of shape
+    `size`, starting `offset` blocks into the Philox stream of the seed
+    """
+    bit_generator = np.random.Philox(seed)
+    if offset:
+        bit_generator.advance(offset)
+    return bit_generator.random_raw(size)
@@ -0,0 +1,341 @@
+"""
+Versioned binary format for keys and ciphertexts.
+
+A record is made of a fixed header, a small block of parameters and the raw little-endian
+arrays of the object:
+
+    magic "TFHE" | version (u16) | kind (u16) | flags (u16) | word bits (u16)
+    | parameters size (u32) | payload size (u64) | parameters | arrays
+
+The header and the parameters take a multiple of 16 bytes and every array is padded to a
+multiple of 8 bytes, so the arrays of a record stay aligned. Loading from a buffer maps the
+arrays with `np.frombuffer` without copying them: they are read-only views of the buffer, use
+`copy()` on the loaded object to get writable arrays. Several records can be written one after
+the other in the same file and read back with `iter_load`.
+
+Compact ciphertexts (see `tfhe.ciphertexts.compact`) are stored as records of the matching
+ciphertext kind with 32 or 16 bits words.
+"""
+import struct
+
+import numpy as np
+from tfhe.ciphertexts.compact import CompactTLWE, CompactTLWEBatch, CompactTRLWE
+from tfhe.ciphertexts.tlwe import LWESecretKey, TLWE
+from tfhe.ciphertexts.tlwe_batch import TLWEBatch
+from tfhe.ciphertexts.trlwe import RLWESecretKey, TRLWE
+from tfhe.torus import Torus
+from tfhe.torus_polynomial import TorusPolynomial
+
+MAGIC = b"TFHE"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHHHHIQ")
+_ALIGNMENT = 16
+
+FLAG_SEEDED = 1
+
+KIND_LWE_SECRET_KEY = 1
+KIND_RLWE_SECRET_KEY = 2
+KIND_TLWE = 3
+KIND_TRLWE = 4
+KIND_TLWE_BATCH = 5
+
+# the 128 bits seeds of compressed ciphertexts are stored as two u64, low word first
+_PARAMS = {
+    KIND_LWE_SECRET_KEY: struct.Struct("<Q"),
+    KIND_RLWE_SECRET_KEY: struct.Struct("<QQ"),
+    KIND_TLWE: struct.Struct("<QQdQQQ"),
+    KIND_TRLWE: struct.Struct("<QQQdQQQ"),
+    KIND_TLWE_BATCH: struct.Struct("<QQQdQQQ"),
+}
+
+# version 1 records stored 64 bits seeds
+_PARAMS_V1 = {
+    KIND_LWE_SECRET_KEY: struct.Struct("<Q"),
+    KIND_RLWE_SECRET_KEY: struct.Struct("<QQ"),
+    KIND_TLWE: struct.Struct("<QQdQQ"),
+    KIND_TRLWE: struct.Struct("<QQQdQQ"),
+    KIND_TLWE_BATCH: struct.Struct("<QQQdQQ"),
+}
+
+_WORD_DTYPES = {
+    64: np.dtype("<u8"),
+    32: np.dtype("<u4"),
+    16: np.dtype("<u2"),
+}
+
+
+def _pack_p(p):
+    # p = 2^64 is stored as 0
+    return int(p) % 2 ** 64
+
+
+def _unpack_p(p):
+    return p if p != 0 else 2 ** 64
+
+
+def _split_seed(seed):
+    return seed % 2 ** 64, seed >> 64
+
+
+def _unpack_params(kind, version, buffer, offset):
+    if version == 1:
+        return _PARAMS_V1[kind].unpack_from(buffer, offset)
+    params = _PARAMS[kind].unpack_from(buffer, offset)
+    if kind in (KIND_TLWE, KIND_TRLWE, KIND_TLWE_BATCH):
+        # join the words of the seed
+        *head, seed_low, seed_high, seed_offset = params
+        return (*head, seed_low | seed_high << 64, seed_offset)
+    return params
+
+
+def _padding(size, alignment):
+    return -size % alignment
+
+
+def _encode(obj):
+    """
+    Returns the kind, flags, word size, parameters and arrays of `obj`
+    """
+    if isinstance(obj, LWESecretKey):
+        return KIND_LWE_SECRET_KEY, 0, 64, (obj.n,), [obj.bits()]
+    if isinstance(obj, RLWESecretKey):
+        return KIND_RLWE_SECRET_KEY, 0, 64, (obj.big_n, obj.k), [np.stack(obj.data)]
+    if isinstance(obj, (TLWE, TRLWE, TLWEBatch)):
+        if obj.b is None:
+            raise ValueError("nothing is encrypted")
+        flags = FLAG_SEEDED if obj.is_compressed() else 0
+        seed = obj.seed if flags else 0
+        seed_offset = obj.seed_offset if flags else 0
+        if isinstance(obj, TLWE):
+            kind = KIND_TLWE
+            params = (obj.n, _pack_p(obj.p), obj.sigma, *_split_seed(seed), seed_offset)
+            b = np.array([obj.b.data], dtype=np.uint64)
+            mask = None if flags else obj.mask
+        elif isinstance(obj, TRLWE):
+            kind = KIND_TRLWE
+            params = (obj.big_n, obj.k, _pack_p(obj.p), obj.sigma, *_split_seed(seed), seed_offset)
+            b = obj.b.data
+            mask = None if flags else np.stack([m.data for m in obj.mask])
+        else:
+            kind = KIND_TLWE_BATCH
+            params = (len(obj), obj.n, _pack_p(obj.p), obj.sigma, *_split_seed(seed), seed_offset)
+            b = obj.b
+            mask = None if flags else obj.mask
+        arrays = [b] if mask is None else [mask, b]
+        return kind, flags, 64, params, arrays
+    if isinstance(obj, (CompactTLWE, CompactTRLWE, CompactTLWEBatch)):
+        if obj.b is None:
+            raise ValueError("nothing is encrypted")
+        if isinstance(obj, CompactTLWE):
+            kind = KIND_TLWE
+            params = (obj.n, _pack_p(obj.p), obj.sigma, 0, 0, 0)
+            b = obj.b.reshape(1)
+        elif isinstance(obj, CompactTRLWE):
+            kind = KIND_TRLWE
+            params = (obj.big_n, obj.k, _pack_p(obj.p), obj.sigma, 0, 0, 0)
+            b = obj.b
+        else:
+            kind = KIND_TLWE_BATCH
+            params = (len(obj), obj.n, _pack_p(obj.p), obj.sigma, 0, 0, 0)
+            b = obj.b
+        return kind, 0, obj.bits, params, [obj.mask, b]
+    raise TypeError(f"can't serialize object of type {type(obj)}")
+
+
+class _Reader:
+    """
+    Map consecutive arrays of a payload without copying them
+    """
+
+    def __init__(self, buffer, offset, dtype):
+        self.buffer = buffer
+        self.offset = offset
+        self.dtype = dtype
+
+    def take(self, shape):
+        count = int(np.prod(shape))
+        array = np.frombuffer(self.buffer, self.dtype, count, self.offset)
+        size = count * self.dtype.itemsize
+        self.offset += size + _padding(size, 8)
+        return array.reshape(shape)
+
+
+def _decode_compact(kind, params, reader, bits):
+    if kind == KIND_TLWE:
+        n, p, sigma, _, _ = params
+        c = CompactTLWE(n, sigma, _unpack_p(p), bits)
+        c.mask = reader.take((n,))
+        c.b = reader.take(())
+    elif kind == KIND_TRLWE:
+        big_n, k, p, sigma, _, _ = params
+        c = CompactTRLWE(big_n, sigma, _unpack_p(p), k, bits)
+        c.mask = reader.take((k, big_n))
+        c.b = reader.take((big_n,))
+    elif kind == KIND_TLWE_BATCH:
+        m, n, p, sigma, _, _ = params
+        c = CompactTLWEBatch(n, sigma, _unpack_p(p), bits)
+        c.mask = reader.take((m, n))
+        c.b = reader.take((m,))
+    else:
+        raise ValueError(f"record kind {kind} can't have {bits} bits words")
+    return c
+
+
+def _decode(kind, flags, params, reader):
+    bits = reader.dtype.itemsize * 8
+    if bits != 64:
+        return _decode_compact(kind, params, reader, bits)
+    if kind == KIND_LWE_SECRET_KEY:
+        (n,) = params
+        return LWESecretKey.from_bits(reader.take((n,)))
+    if kind == KIND_RLWE_SECRET_KEY:
+        big_n, k = params
+        return RLWESecretKey.from_bits(reader.take((k, big_n)))
+    seeded = flags & FLAG_SEEDED
+    if kind == KIND_TLWE:
+        n, p, sigma, seed, seed_offset = params
+        c = TLWE(n, sigma, _unpack_p(p))
+        if not seeded:
+            c.mask = reader.take((n,))
+        c.b = Torus(reader.take((1,))[0])
+    elif kind == KIND_TRLWE:
+        big_n, k, p, sigma, seed, seed_offset = params
+        c = TRLWE(big_n, sigma, _unpack_p(p), k)
+        if not seeded:
+            c.mask = [TorusPolynomial.from_array(m, big_n) for m in reader.take((k, big_n))]
+        c.b = TorusPolynomial.from_array(reader.take((big_n,)), big_n)
+    elif kind == KIND_TLWE_BATCH:
+        m, n, p, sigma, seed, seed_offset = params
+        c = TLWEBatch(n, sigma, _unpack_p(p))
+        if not seeded:
+            c.mask = reader.take((m, n))
+        c.b = reader.take((m,))
+    else:
+        raise ValueError(f"unknown record kind {kind}")
+    if seeded:
+        c.seed = seed
+        c.seed_offset = seed_offset
+    return c
+
+
+def _header_and_params(obj):
+    kind, flags, word_bits, params, arrays = _encode(obj)
+    dtype = _WORD_DTYPES[word_bits]
+    arrays = [np.ascontiguousarray(a, dtype=dtype) for a in arrays]
+    packed = _PARAMS[kind].pack(*params)
+    packed += bytes(_padding(_HEADER.size + len(packed), _ALIGNMENT))
+    payload_size = sum(a.nbytes + _padding(a.nbytes, 8) for a in arrays)
+    header = _HEADER.pack(
+        MAGIC, VERSION, kind, flags, word_bits, len(packed), payload_size
+    )
+    return header + packed, arrays
+
+
+def _parse_header(buffer, offset=0):
+    magic, version, kind, flags, word_bits, params_size, payload_size = _HEADER.unpack_from(
+        buffer, offset
+    )
+    if magic != MAGIC:
+        raise ValueError("not a TFHE record")
+    if version > VERSION:
+        raise ValueError(f"unsupported format version {version}")
+    if kind not in _PARAMS:
+        raise ValueError(f"unknown record kind {kind}")
+    if word_bits not in _WORD_DTYPES:
+        raise ValueError(f"unsupported word size {word_bits}")
+    return version, kind, flags, word_bits, params_size, payload_size
+
+
+def dump(obj, f):
+    """
+    Write `obj` to the binary file object `f`
+    """
+    head, arrays = _header_and_params(obj)
+    f.write(head)
+    for a in arrays:
+        f.write(memoryview(a.reshape(-1)).cast("B"))
+        f.write(bytes(_padding(a.nbytes, 8)))
+
+
+def dumps(obj):
+    """
+    Serialize `obj` into bytes
+    """
+    head, arrays = _header_and_params(obj)
+    parts = [head]
+    for a in arrays:
+        parts.append(a.tobytes())
+        parts.append(bytes(_padding(a.nbytes, 8)))
+    return b"".join(parts)
+
+
+def _loads_from(buffer, offset):
+    version, kind, flags, word_bits, params_size, payload_size = _parse_header(buffer, offset)
+    params_offset = offset + _HEADER.size
+    params = _unpack_params(kind, version, buffer, params_offset)
+    reader = _Reader(buffer, params_offset + params_size, _WORD_DTYPES[word_bits])
+    obj = _decode(kind, flags, params, reader)
+    return obj, params_offset + params_size + payload_size
+
+
+def loads(buffer):
+    """
+    Deserialize an object from a bytes-like object, arrays are not copied
+    """
+    obj, _ = _loads_from(buffer, 0)
+    return obj
+
+
+def iter_loads(buffer):
+    """
+    Deserialize all the records stored one after the other in a bytes-like object
+    """
+    offset = 0
+    while offset < len(buffer):
+        obj, offset = _loads_from(buffer, offset)
+        yield obj
+
+
+def _read_into(f, view):
+    """
+    Fill `view` from `f`, whose reads may be short (pipes, sockets), returns the number of
+    bytes read, which is less than the size of `view` only at the end of the file
+    """
+    total = 0
+    while total < len(view):
+        read = f.readinto(view[total:])
+        if not read:
+            break
+        total += read
+    return total
+
+
+def load(f):
+    """
+    Read a single object from the binary file object `f`, its arrays are backed by a single
+    writable buffer
+    """
+    head = bytearray(_HEADER.size)
+    read = _read_into(f, memoryview(head))
+    if read == 0:
+        raise EOFError("no record left to read")
+    if read < _HEADER.size:
+        raise ValueError("truncated record")
+    _, _, _, _, params_size, payload_size = _parse_header(head)
+    buffer = bytearray(_HEADER.size + params_size + payload_size)
+    buffer[: _HEADER.size] = head
+    if _read_into(f, memoryview(buffer)[_HEADER.size :]) != len(buffer) - _HEADER.size:
+        raise ValueError("truncated record")
+    return loads(buffer)
+
+
+def iter_load(f):
+    """
+    Read all the objects stored one after the other in the binary file object `f`
+    """
+    while True:
+        try:
+            yield load(f)
+        except EOFError:
+            return
@@ -108,9 +108,8 @@ class Torus:
         if isinstance(other, Torus):
             return Torus(self.data + other.data)
         else:
-            raise TypeError(
-                f"doesn't support addition of torus elements with {type(other)}"
-            )
+            # let ciphertexts handle the reflected operation
+            return NotImplemented
 
     def __radd__(self, other):
         return self.__add__(other)
@@ -119,9 +118,8 @@ class Torus:
         if isinstance(other, Torus):
             return Torus(self.data - other.data)
         else:
-            raise TypeError(
-                f"doesn't support subtraction of torus elements with {type(other)}"
-            )
+            # let ciphertexts handle the reflected operation
+            return NotImplemented
 
     def __rsub__(self, other):
         if isinstance(other, Torus):
@@ -1,5 +1,14 @@
 import numpy as np
-from tfhe.poly import polymod
+from tfhe.encoding import (
+    decode_float,
+    decode_int,
+    decode_real,
+    encode_float,
+    encode_int,
+    encode_real,
+)
+from tfhe.gadget import decompose
+from tfhe.poly import negacyclic_rotate, negacyclic_rotate_sub, polymod
 
 
 class TorusPolynomial:
@@ -21,8 +30,18 @@ class TorusPolynomial:
     def _apply_poly_mod(self):
         self.data = polymod(self.data, self.big_n, self.q)
 
+    @classmethod
+    def from_array(cls, data, big_n):
+        """
+        Wrap an uint64 array of exactly `big_n` coefficients without copying or reducing it
+        """
+        new = cls.__new__(cls)
+        new.data = data
+        new.big_n = big_n
+        return new
+
     def copy(self):
-        new = TorusPolynomial(self.data.copy(), big_n=self.big_n)
+        new = TorusPolynomial.from_array(self.data.copy(), self.big_n)
         new.q = self.q
         return new
 
@@ -31,16 +50,7 @@ class TorusPolynomial:
         """
         Takes a list of real numbers from [0, 1) and outputs a TorusPolynomial object representing it
         """
-        if isinstance(values, float):
-            values = [values]
-        coeffs = []
-        for value in values:
-            # if value < 0 or value >= 1:
-            #     print(
-            #         f"Warning: value {value} is not in the range [0, 1), it will be converted into a real modulo 1 = {value % 1}"
-            #     )
-            value = value % 1
-            coeffs.append((value * cls.q) % cls.q)
+        coeffs = encode_real(np.atleast_1d(values))
         if big_n is None:
             return TorusPolynomial(coeffs)
         else:
@@ -51,164 +61,150 @@ class TorusPolynomial:
         Takes a TorusPolynomial element and outputs its real representation in [0, 1) using
         log2(p) bits of precision
         """
-        result = []
-        for coeff in self.data:
-            # this mask any bits not included in the left most log2(p) bits
-            rounded = np.uint64(np.round(coeff / (self.q / p))) / p
-            result.append(rounded)
-        # fill zero coefficients
-        result = result + [0] * (self.big_n - len(result))
-        return result
+        return decode_real(self.data, p)
 
     @classmethod
-    def from_int(cls, values, p, big_n=None):
+    def from_int(cls, values, p, big_n=None, policy="wrap"):
         """
         Takes a list of integer numbers in [0, p) and outputs a Torus object representing it
         using log2(p) bits of precision
+
+        :param policy: handling of the out of range values, see `tfhe.encoding`. With "count",
+            the number of out of range values is returned along with the polynomial
         """
-        if isinstance(values, (int, np.uint64, np.int64)):
-            values = [values]
-        coeffs = []
-        for value in values:
-            if value < 0 or value >= p:
-                print(
-                    f"Warning: value {value} is not in the range [0, p), it will be converted into an integer modulo p = {value % p}"
-                )
-            value = (int(value % p) * (cls.q / p)) % cls.q
-            coeffs.append(value)
+        coeffs = encode_int(np.atleast_1d(values), p, policy=policy)
+        return cls._from_encoded(coeffs, big_n, policy)
 
+    @staticmethod
+    def _from_encoded(coeffs, big_n, policy):
+        if policy == "count":
+            coeffs, out_of_range = coeffs
         if big_n is None:
-            return TorusPolynomial(coeffs)
+            poly = TorusPolynomial(coeffs)
         else:
-            return TorusPolynomial(coeffs, big_n=big_n)
+            poly = TorusPolynomial(coeffs, big_n=big_n)
+        if policy == "count":
+            return poly, out_of_range
+        return poly
 
     def to_int(self, p):
         """
         Takes a TorusPolynomial element and outputs its integer representation in [0, p) using
         log2(p) bits of precision
         """
-        result = []
-        for coeff in self.data:
-            result.append(np.uint64(np.round(coeff / (self.q / p))) % np.uint64(p))
-        # fill zero coefficients
-        result = result + [0] * (self.big_n - len(result))
-        return result
+        return decode_int(self.data, p)
 
     @classmethod
-    def from_float(cls, values, p, data_range, big_n=None):
+    def from_float(cls, values, p, data_range, big_n=None, policy="wrap"):
         """
         Takes a list of float numbers in [data_range[0], data_range[1]) and outputs a Torus object representing it
         using log2(p) bits of precision
-        """
-        if isinstance(values, float):
-            values = [values]
-        if not isinstance(data_range, (list, tuple)):
-            raise TypeError("data_range must be a tuple or list")
-        if len(data_range) != 2:
-            raise ValueError("data_range must be a tuple or list of length 2")
-        if data_range[0] >= data_range[1]:
-            raise ValueError("data_range[0] must be lower than data_range[1]")
-        low = data_range[0]
-        high = data_range[1]
-        delta = high - low
-        offset = low
-
-        coeffs = []
-        for value in values:
-            if value < low or value >= high:
-                print(
-                    f"Warning: value {value} is not in the range [{low}, {high}), it will be converted into a float in that range => {(value - offset) % delta + offset}"
-                )
-            # convert to int in [0, p)
-            value = float((value - offset) % delta)
-            step = delta / p
-            coeffs.append(((round(value / step) % p) * (cls.q / p)) % cls.q)
 
-        if big_n is None:
-            return TorusPolynomial(coeffs)
-        else:
-            return TorusPolynomial(coeffs, big_n=big_n)
+        :param policy: handling of the out of range values, see `from_int`
+        """
+        coeffs = encode_float(np.atleast_1d(values), p, data_range, policy=policy)
+        return cls._from_encoded(coeffs, big_n, policy)
 
     def to_float(self, p, data_range):
         """
         Takes a Torus element and outputs its float representation in [data_range[0], data_range[1]) using
         log2(p) bits of precision
         """
-        if not isinstance(data_range, (list, tuple)):
-            raise TypeError("data_range must be a tuple or list")
-        if len(data_range) != 2:
-            raise ValueError("data_range must be a tuple or list of length 2")
-        if data_range[0] >= data_range[1]:
-            raise ValueError("data_range[0] must be lower than data_range[1]")
-        low = data_range[0]
-        high = data_range[1]
-        delta = high - low
-        offset = low
-        step = delta / p
-        result = []
-        for coeff in self.data:
-            int_value = np.uint64(np.round(coeff / (self.q / p))) % np.uint64(p)
-            result.append(int_value * step + offset)
-        # fill zero coefficients
-        result = result + [0] * (self.big_n - len(result))
-        return result
+        return decode_float(self.data, p, data_range)
+
+    def decompose(self, l, bg_bit):
+        """
+        Signed gadget decomposition of the coefficients in base 2^bg_bit, outputs an l x N int64
+        array (see `tfhe.gadget`)
+        """
+        return decompose(self.data, l, bg_bit)
+
+    def _check_compatible(self, other):
+        if self.big_n != other.big_n:
+            raise ValueError(
+                f"Polynomial modulus degree don't match {self.big_n} and {other.big_n}"
+            )
 
     def __add__(self, other):
         if isinstance(other, TorusPolynomial):
-            if self.big_n != other.big_n:
-                raise ValueError(
-                    f"Polynomial modulus degree don't match {self.big_n} and {other.big_n}"
-                )
-            rs = self.data.tolist() + [0] * (self.big_n - len(self.data))
-            ls = other.data.tolist() + [0] * (self.big_n - len(other.data))
-            return TorusPolynomial(
-                [(x + y) % self.q for x, y in zip(rs, ls)], big_n=self.big_n
-            )
+            self._check_compatible(other)
+            return TorusPolynomial.from_array(self.data + other.data, self.big_n)
         else:
-            raise TypeError(
-                f"doesn't support addition of torus polynomial elements with {type(other)}"
-            )
+            # let ciphertexts handle the reflected operation
+            return NotImplemented
 
     def __radd__(self, other):
         return self.__add__(other)
 
-    def __sub__(self, other):
+    def __iadd__(self, other):
         if isinstance(other, TorusPolynomial):
-            if self.big_n != other.big_n:
-                raise ValueError(
-                    f"Polynomial modulus degree don't match {self.big_n} and {other.big_n}"
-                )
-            rs = self.data.tolist() + [0] * (self.big_n - len(self.data))
-            ls = other.data.tolist() + [0] * (self.big_n - len(other.data))
-            return TorusPolynomial(
-                [(x - y) % self.q for x, y in zip(rs, ls)], big_n=self.big_n
-            )
+            self._check_compatible(other)
+            self.data += other.data
+            return self
         else:
             raise TypeError(
-                f"doesn't support subtraction of torus polynomial elements with {type(other)}"
+                f"doesn't support addition of torus polynomial elements with {type(other)}"
             )
 
+    def __sub__(self, other):
+        if isinstance(other, TorusPolynomial):
+            self._check_compatible(other)
+            return TorusPolynomial.from_array(self.data - other.data, self.big_n)
+        else:
+            # let ciphertexts handle the reflected operation
+            return NotImplemented
+
     def __rsub__(self, other):
         if isinstance(other, TorusPolynomial):
-            if self.big_n != other.big_n:
-                raise ValueError(
-                    f"Polynomial modulus degree don't match {self.big_n} and {other.big_n}"
-                )
-            rs = other.data.tolist() + [0] * (self.big_n - len(other.data))
-            ls = self.data.tolist() + [0] * (self.big_n - len(self.data))
-            return TorusPolynomial(
-                [(x - y) % self.q for x, y in zip(rs, ls)], big_n=self.big_n
+            self._check_compatible(other)
+            return TorusPolynomial.from_array(other.data - self.data, self.big_n)
+        else:
+            raise TypeError(
+                f"doesn't support subtraction of torus polynomial elements with {type(other)}"
             )
+
+    def __isub__(self, other):
+        if isinstance(other, TorusPolynomial):
+            self._check_compatible(other)
+            self.data -= other.data
+            return self
         else:
             raise TypeError(
                 f"doesn't support subtraction of torus polynomial elements with {type(other)}"
             )
 
+    def rotate(self, a, out=None):
+        """
+        Multiply by the monomial X^a, in O(N)
+
+        :param out: TorusPolynomial receiving the result, it may be `self` for an in-place rotation
+        """
+        if out is None:
+            return TorusPolynomial.from_array(negacyclic_rotate(self.data, a), self.big_n)
+        self._check_compatible(out)
+        negacyclic_rotate(self.data, a, out=out.data)
+        return out
+
+    def rotate_sub(self, a, out=None):
+        """
+        Compute (X^a - 1) * self, in O(N) and without temporaries
+
+        :param out: TorusPolynomial receiving the result, it may be `self`
+        """
+        if out is None:
+            return TorusPolynomial.from_array(negacyclic_rotate_sub(self.data, a), self.big_n)
+        self._check_compatible(out)
+        negacyclic_rotate_sub(self.data, a, out=out.data)
+        return out
+
+    def __neg__(self):
+        return TorusPolynomial.from_array(np.negative(self.data), self.big_n)
+
     def __mul__(self, other):
         if isinstance(other, int):
-            other = np.uint64(other)
+            other = np.uint64(other % self.q)
         if isinstance(other, np.uint64):
-            return TorusPolynomial(self.data * other, big_n=self.big_n)
+            return TorusPolynomial.from_array(self.data * other, self.big_n)
         else:
             raise TypeError(
                 f"doesn't support multiplication of torus elements with {type(other)}"